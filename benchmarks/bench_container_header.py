@@ -0,0 +1,106 @@
+"""
+Compare reading the duration from the container header against spawning a probe process,
+over a synthetic corpus shaped like a directory batch import.
+
+The corpus mixes faststart MP4, MOV with the moov box after a large mdat, MKV and WebM files.
+When ffprobe is installed each file is probed with it, otherwise a no-op process is spawned
+instead, which is a lower bound of the ffprobe cost.
+
+Usage:
+    python -m benchmarks.bench_container_header --files 400 --mdat-mb 8
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import struct
+import tempfile
+import time
+
+from src.resolvers.container_header import read_header_duration
+from src.resolvers.thumbnail_resolver import run_process
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def _ebml(element_id: int, payload: bytes) -> bytes:
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    return id_bytes + (0x01 << 56 | len(payload)).to_bytes(8, "big") + payload
+
+
+def _mp4(duration: float, mdat: bytes, moov_first: bool) -> bytes:
+    mvhd = _box(b"mvhd", bytes(4) + struct.pack(">IIII", 0, 0, 1000, int(duration * 1000)) + bytes(80))
+    boxes = [_box(b"moov", mvhd), _box(b"mdat", mdat)]
+    return _box(b"ftyp", b"isom" * 4) + b"".join(boxes if moov_first else boxes[::-1])
+
+
+def _matroska(duration: float, mdat: bytes, doc_type: bytes) -> bytes:
+    info = _ebml(0x1549A966, _ebml(0x2AD7B1, (1_000_000).to_bytes(3, "big")) + _ebml(0x4489, struct.pack(">d", duration * 1000)))
+    return _ebml(0x1A45DFA3, _ebml(0x4282, doc_type)) + _ebml(0x18538067, info + _ebml(0x1F43B675, mdat))
+
+
+def build_corpus(directory: str, files: int, mdat_mb: int) -> list[str]:
+    mdat = os.urandom(mdat_mb * 1024 * 1024)
+    builders = [
+        ("mp4", lambda d: _mp4(d, mdat, moov_first=True)),
+        ("mov", lambda d: _mp4(d, mdat, moov_first=False)),
+        ("mkv", lambda d: _matroska(d, mdat, b"matroska")),
+        ("webm", lambda d: _matroska(d, mdat, b"webm")),
+    ]
+    paths = []
+    for i in range(files):
+        extension, build = builders[i % len(builders)]
+        path = os.path.join(directory, f"video_{i:05d}.{extension}")
+        with open(path, "wb") as video_file:
+            video_file.write(build(60.0 + i))
+        paths.append(path)
+    return paths
+
+
+def bench_header(paths: list[str]) -> tuple[float, int]:
+    started = time.perf_counter()
+    found = sum(read_header_duration(path) is not None for path in paths)
+    return time.perf_counter() - started, found
+
+
+async def bench_process(paths: list[str], concurrency: int) -> tuple[float, str]:
+    ffprobe = shutil.which("ffprobe")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def probe(path: str) -> None:
+        command = ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "json", path] \
+            if ffprobe else ["true"]
+        async with semaphore:
+            try:
+                await run_process(command, timeout=30)
+            except Exception:
+                pass
+
+    started = time.perf_counter()
+    await asyncio.gather(*(probe(path) for path in paths))
+    return time.perf_counter() - started, "ffprobe" if ffprobe else "no-op process"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=400)
+    parser.add_argument("--mdat-mb", type=int, default=8, help="size of the media data in each file")
+    parser.add_argument("--concurrency", type=int, default=max(os.cpu_count() // 2, 1))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = build_corpus(directory, args.files, args.mdat_mb)
+
+        header_elapsed, found = bench_header(paths)
+        process_elapsed, process_kind = asyncio.run(bench_process(paths, args.concurrency))
+
+    print(f"{args.files} files, {args.mdat_mb} MiB media data each")
+    print(f"container header: {header_elapsed * 1000:9.1f} ms  ({header_elapsed / args.files * 1e6:8.1f} µs/file, {found} durations)")
+    print(f"{process_kind:>16}: {process_elapsed * 1000:9.1f} ms  ({process_elapsed / args.files * 1e6:8.1f} µs/file, concurrency {args.concurrency})")
+    print(f"speed-up: {process_elapsed / header_elapsed:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Compare throughput and server CPU cost per stream of the real video response path under uvicorn,
+with its stock h11 protocol (aiofiles chunks) against `SendfileH11Protocol` (zerocopysend, kernel sendfile).
+
+The server runs in this process and serves the test file through `FileRangeResponse`; every stream is
+an HTTP client in a separate process that drains the response, so only the serving side is accounted here.
+
+Usage:
+    python -m benchmarks.bench_stream --size-mb 256 --streams 12
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import time
+
+import uvicorn
+from uvicorn.protocols.http.h11_impl import H11Protocol
+
+from src.resolvers.file_response import FileRangeResponse
+from src.server import SendfileH11Protocol
+
+_CLIENT_SCRIPT = (
+    "import socket, sys\n"
+    "sock = socket.create_connection(('127.0.0.1', int(sys.argv[1])))\n"
+    "sock.sendall(b'GET /video HTTP/1.1\\r\\nHost: bench\\r\\nConnection: close\\r\\n\\r\\n')\n"
+    "while sock.recv(1024 * 1024):\n"
+    "    pass\n"
+)
+
+_PROTOCOLS = {"aiofiles": H11Protocol, "sendfile": SendfileH11Protocol}
+
+
+def _make_app(path: str, size: int, chunk_size: int):
+    async def app(scope, receive, send):
+        response = FileRangeResponse(
+            path, 0, size, headers={"Content-Length": str(size)}, media_type="video/mp4", chunk_size=chunk_size
+        )
+        await response(scope, receive, send)
+
+    return app
+
+
+async def _run(mode: str, path: str, size: int, streams: int, chunk_size: int) -> tuple[float, float]:
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    port = listener.getsockname()[1]
+    config = uvicorn.Config(
+        _make_app(path, size, chunk_size), http=_PROTOCOLS[mode], lifespan="off", log_level="warning",
+        access_log=False,
+    )
+    server = uvicorn.Server(config)
+    serve_task = asyncio.create_task(server.serve(sockets=[listener]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    clients = [
+        await asyncio.create_subprocess_exec(sys.executable, "-c", _CLIENT_SCRIPT, str(port))
+        for _ in range(streams)
+    ]
+    await asyncio.gather(*[client.wait() for client in clients])
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    server.should_exit = True
+    await serve_task
+    listener.close()
+    return wall, cpu
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--streams", type=int, default=12)
+    parser.add_argument("--chunk-size", type=int, default=1024 * 1024)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp:
+        block = os.urandom(1024 * 1024)
+        for _ in range(args.size_mb):
+            tmp.write(block)
+        path = tmp.name
+
+    try:
+        print(f"file={args.size_mb} MiB streams={args.streams} chunk={args.chunk_size}")
+        for mode in _PROTOCOLS:
+            wall, cpu = asyncio.run(_run(mode, path, size, args.streams, args.chunk_size))
+            total_mb = args.size_mb * args.streams
+            print(
+                f"{mode:<9} throughput={total_mb / wall:8.1f} MiB/s "
+                f"cpu/stream={cpu / args.streams * 1000:8.1f} ms "
+                f"cpu/GiB={cpu / (total_mb / 1024) * 1000:8.1f} ms"
+            )
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Compare the latency of thumbnail extraction with an accurate seek (decode from the previous keyframe
+up to the timestamp) against the keyframe-only fast seek, per container/codec.
+
+A test video is encoded for every format whose encoder is available, with a long GOP so that an
+accurate seek has many frames to decode. Both modes run the exact command built by the thumbnail
+resolver for the default rendition.
+
+Usage:
+    python -m benchmarks.bench_thumbnail_seek --duration 300 --gop 250 --repeat 5
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.resolvers.thumbnail_rendition import negotiate_rendition
+from src.resolvers.thumbnail_resolver import build_thumbnail_command, run_process, thumbnail_seek_target
+
+FORMATS = [
+    # (name, extension, encoder options)
+    ("H.264 / MP4", "mp4", ["-c:v", "libx264", "-preset", "ultrafast"]),
+    ("H.265 / MKV", "mkv", ["-c:v", "libx265", "-preset", "ultrafast"]),
+    ("VP9 / WebM", "webm", ["-c:v", "libvpx-vp9", "-deadline", "realtime", "-cpu-used", "8"]),
+    ("MPEG-4 / AVI", "avi", ["-c:v", "mpeg4"]),
+]
+
+
+def _encoder_available(encoder: str) -> bool:
+    output = subprocess.run(["ffmpeg", "-hide_banner", "-encoders"], capture_output=True, text=True).stdout
+    return f" {encoder} " in output
+
+
+def _encode_sample(path: str, duration: int, gop: int, encoder_args: list[str]) -> None:
+    subprocess.run(
+        [
+            "ffmpeg", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", f"testsrc2=size=1280x720:rate=25:duration={duration}",
+            *encoder_args, "-g", str(gop), "-pix_fmt", "yuv420p", path,
+        ],
+        check=True,
+    )
+
+
+async def _time_extraction(path: str, ss: float, fast_seek: bool, repeat: int) -> float:
+    rendition = negotiate_rendition(None, None)
+    timings = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        output_path = os.path.join(output_dir, f"thumbnail.{rendition.extension}")
+        command = build_thumbnail_command(path, ss, [rendition], [output_path], fast_seek=fast_seek)
+        command.insert(1, "-y")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await run_process(command, timeout=120)
+            timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+async def run(duration: int, gop: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'format':<14} {'accurate':>10} {'fast':>10} {'speed-up':>9}")
+        for name, extension, encoder_args in FORMATS:
+            if not _encoder_available(encoder_args[1]):
+                print(f"{name:<14} skipped, encoder {encoder_args[1]} not available")
+                continue
+            path = os.path.join(directory, f"sample.{extension}")
+            _encode_sample(path, duration, gop, encoder_args)
+            ss = thumbnail_seek_target(duration)
+
+            accurate = await _time_extraction(path, ss, fast_seek=False, repeat=repeat)
+            fast = await _time_extraction(path, ss, fast_seek=True, repeat=repeat)
+            print(f"{name:<14} {accurate * 1000:8.1f}ms {fast * 1000:8.1f}ms {accurate / fast:8.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=int, default=300, help="length of the sample videos in seconds")
+    parser.add_argument("--gop", type=int, default=250, help="keyframe interval in frames (25 fps)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if shutil.which("ffmpeg") is None:
+        sys.exit("ffmpeg is required for this benchmark")
+    asyncio.run(run(args.duration, args.gop, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -66,22 +66,26 @@ export const GET_SUGGESTIONS = gql`
 `;
 
 export const BROWSE_DIRECTORY = gql`
-  query BrowseDirectory($path: RelativePathInput!) {
-    browseDirectory(path: $path) {
-      node {
-        id
-        isDir
-        name
-        tags {
+  query BrowseDirectory($path: RelativePathInput!, $page: BrowsePageInput) {
+    browseDirectory(path: $path, page: $page) {
+      nodes {
+        node {
+          id
+          isDir
           name
+          tags {
+            name
+          }
+          author
+          loved
+          lastModifyTime
+          introduction
+          size
+          duration
         }
-        author
-        loved
-        lastModifyTime
-        introduction
-        size
-        duration
       }
+      nextCursor
+      totalCount
     }
   }
 `;
@@ -30,6 +30,19 @@ export enum BatchResultType {
   Success = 'Success'
 }
 
+export type BrowsePageInput = {
+  ascending?: Scalars['Boolean']['input'];
+  cursor?: InputMaybe<Scalars['String']['input']>;
+  pageSize?: InputMaybe<Scalars['Int']['input']>;
+  sortBy?: BrowseSortOption;
+};
+
+export enum BrowseSortOption {
+  LastModifyTime = 'LastModifyTime',
+  Name = 'Name',
+  Size = 'Size'
+}
+
 export type DirectoryMetadataResult = {
   __typename?: 'DirectoryMetadataResult';
   lastModifiedTime: Scalars['Float']['output'];
@@ -47,6 +60,13 @@ export type FileBrowseNode = {
   node: Video;
 };
 
+export type FileBrowsePage = {
+  __typename?: 'FileBrowsePage';
+  nextCursor?: Maybe<Scalars['String']['output']>;
+  nodes: Array<FileBrowseNode>;
+  totalCount: Scalars['Int']['output'];
+};
+
 export type Mutation = {
   __typename?: 'Mutation';
   deleteVideo: VideoMutationResult;
@@ -79,7 +99,7 @@ export type Pagination = {
 export type Query = {
   __typename?: 'Query';
   SearchVideos: VideoSearchResult;
-  browseDirectory: Array<FileBrowseNode>;
+  browseDirectory: FileBrowsePage;
   getDirectoryMetadata: DirectoryMetadataResult;
   getSuggestions: Array<Scalars['String']['output']>;
   getTopTags: Array<VideoTag>;
@@ -93,6 +113,7 @@ export type QuerySearchVideosArgs = {
 
 
 export type QueryBrowseDirectoryArgs = {
+  page?: InputMaybe<BrowsePageInput>;
   path: RelativePathInput;
 };
 
@@ -296,10 +317,11 @@ export type GetSuggestionsQuery = { __typename?: 'Query', getSuggestions: Array<
 
 export type BrowseDirectoryQueryVariables = Exact<{
   path: RelativePathInput;
+  page?: InputMaybe<BrowsePageInput>;
 }>;
 
 
-export type BrowseDirectoryQuery = { __typename?: 'Query', browseDirectory: Array<{ __typename?: 'FileBrowseNode', node: { __typename?: 'Video', id: string, isDir: boolean, name: string, author: string, loved: boolean, lastModifyTime: number, introduction: string, size: number, duration: number, tags: Array<{ __typename?: 'VideoTag', name: string }> } }> };
+export type BrowseDirectoryQuery = { __typename?: 'Query', browseDirectory: { __typename?: 'FileBrowsePage', nextCursor?: string | null, totalCount: number, nodes: Array<{ __typename?: 'FileBrowseNode', node: { __typename?: 'Video', id: string, isDir: boolean, name: string, author: string, loved: boolean, lastModifyTime: number, introduction: string, size: number, duration: number, tags: Array<{ __typename?: 'VideoTag', name: string }> } }> } };
 
 export type GetDirectoryMetadataQueryVariables = Exact<{
   path: RelativePathInput;
@@ -524,22 +546,26 @@ export const GetSuggestionsDocument = gql`
     }
   }
 export const BrowseDirectoryDocument = gql`
-    query BrowseDirectory($path: RelativePathInput!) {
-  browseDirectory(path: $path) {
-    node {
-      id
-      isDir
-      name
-      tags {
+    query BrowseDirectory($path: RelativePathInput!, $page: BrowsePageInput) {
+  browseDirectory(path: $path, page: $page) {
+    nodes {
+      node {
+        id
+        isDir
         name
+        tags {
+          name
+        }
+        author
+        loved
+        lastModifyTime
+        introduction
+        size
+        duration
       }
-      author
-      loved
-      lastModifyTime
-      introduction
-      size
-      duration
     }
+    nextCursor
+    totalCount
   }
 }
     `;
@@ -1,17 +1,15 @@
-import { Component, inject, signal, computed, effect, OnDestroy } from '@angular/core';
+import { Component, inject, signal, computed, effect, untracked, OnDestroy } from '@angular/core';
 import { MatDialog } from '@angular/material/dialog';
+import { first, Subscription } from 'rxjs';
 import { GqlService } from '../../services/GQL-service/GQL.service';
-import {
-  BrowseDirectoryDetail,
-  FileBrowseNode,
-} from '../../shared/models/GQL-result.model';
+import { BrowsePageInput } from '../../core/graphql/generated/graphql';
+import { FileBrowseNode } from '../../shared/models/GQL-result.model';
 import { PageStateService } from '../../services/Page-state-service/page-state.service';
 import { environment } from '../../../environments/environment';
 import { 
   SortCriterion, 
-  ItemsSortOption, 
   ManagementRefreshState, 
-  comparatorBySortOption 
+  sortOptionByColumn 
 } from '../../shared/models/management.model';
 import { BottomToolbar } from '../../shared/components/bottom-toolbar/bottom-toolbar';
 import { FileBrowseTable } from '../../shared/components/file-browse-table/file-browse-table';
@@ -41,7 +39,12 @@ export class Management implements OnDestroy{
     order: true
   });
   currentPath = signal<string[]>([]);
-  directoryContents = signal(this.gqlService.initialSignalData<BrowseDirectoryDetail>([]));
+  directoryContents = signal(this.gqlService.initialSignalData<FileBrowseNode[]>([]));
+  // cursor of the next page of the current directory, null once every page is loaded
+  nextCursor = signal<string | null>(null);
+  totalCount = signal<number>(0);
+  loadingMore = signal<boolean>(false);
+  private directorySubscription?: Subscription;
   selectedIds = signal<Set<string>>(new Set());
 
   isAtRoot = computed(() => this.currentPath().length === 0);
@@ -71,54 +74,91 @@ export class Management implements OnDestroy{
         path,
         false
       );
-      this.loadDirectory(path.length > 0 ? path.join('/') : undefined);
+      // the sort order is read when loading, it must not reload the directory by itself
+      untracked(() => this.loadDirectory(path.length > 0 ? path.join('/') : undefined));
     });
   }
 
   ngOnDestroy(): void {
+    this.directorySubscription?.unsubscribe();
     this.pathHistoryService.clearAllHistory();
   }
 
   // ─── Directory Data Loading ────────────────────────────────────────
 
+  // Pages are sorted by the server, a new sort order reloads the directory from its first page
+  private pageInput(cursor?: string): BrowsePageInput {
+    return {
+      sortBy: sortOptionByColumn[this.sortCriteria().index],
+      ascending: this.sortCriteria().order,
+      cursor: cursor
+    };
+  }
+
   private loadDirectory(relativePath?: string, refreshCache: boolean = false) {
-    this.gqlService.browseDirectoryQuery(relativePath, refreshCache).subscribe({
-      next: (result) => {
-        // Sometimes this condition can be true twice in a single request, because of the cache update after the request
-        // So for the second time, newState will be undefined, and we shoudn't apply the sorting and scrolling again
-        if(!result.loading && result.data) {
-          const newState = this.stateService.getState<ManagementRefreshState>(
-            environment.management_api + environment.refreshKey + environment.scrollKey,
-            false
-          );
-          if(newState?.sortCriteria){
-            this.sortCriteria.set(newState.sortCriteria);
-            this.sortItemsBy(this.sortCriteria().index, result.data);
-            this.directoryContents.set({...this.directoryContents(), loading: result.loading, error: result.error});
-            setTimeout(() => {
-              if(newState !== undefined){
-                this.scrollTo(newState.scrollPosition);
-              }
-            }, 200);
+    const refreshState = this.stateService.getState<ManagementRefreshState>(
+      environment.management_api + environment.refreshKey + environment.scrollKey,
+      false
+    );
+    if (refreshState?.sortCriteria) {
+      this.sortCriteria.set(refreshState.sortCriteria);
+    }
+
+    this.directorySubscription?.unsubscribe();
+    this.directoryContents.set(this.gqlService.initialSignalData<FileBrowseNode[]>([]));
+    this.nextCursor.set(null);
+    this.loadingMore.set(false);
+    this.directorySubscription = this.gqlService.browseDirectoryQuery(relativePath, refreshCache, this.pageInput())
+      // Only the settled result: a later cache update would drop the pages appended since
+      .pipe(first(result => !result.loading))
+      .subscribe({
+        next: (result) => {
+          this.directoryContents.set({ loading: false, error: result.error, data: result.data?.nodes ?? null });
+          this.nextCursor.set(result.data?.nextCursor ?? null);
+          this.totalCount.set(result.data?.totalCount ?? 0);
+          this.selectedIds.set(new Set());
+          if (refreshState) {
+            setTimeout(() => this.scrollTo(refreshState.scrollPosition), 200);
           }
-        }else{
-          this.directoryContents.set(result);
+        },
+        error: (err) => {
+          this.toastService.emitErrorOrWarning('Failed to load directory: ' + err.message, 'error');
         }
-        this.selectedIds.set(new Set());
-      },
-      error: (err) => {
-        this.toastService.emitErrorOrWarning('Failed to load directory: ' + err.message, 'error');
-      }
-    });
+      });
+  }
+
+  loadMore() {
+    const cursor = this.nextCursor();
+    if (!cursor || this.loadingMore()) return;
+    const path = this.currentPath();
+    this.loadingMore.set(true);
+    this.directorySubscription = this.gqlService.browseDirectoryQuery(
+      path.length > 0 ? path.join('/') : undefined, false, this.pageInput(cursor)
+    )
+      .pipe(first(result => !result.loading))
+      .subscribe({
+        next: (result) => {
+          if (result.data) {
+            const nodes = result.data.nodes;
+            this.directoryContents.update(contents => ({ ...contents, data: [...(contents.data ?? []), ...nodes] }));
+            this.nextCursor.set(result.data.nextCursor ?? null);
+            this.totalCount.set(result.data.totalCount);
+          } else if (result.error) {
+            this.toastService.emitErrorOrWarning('Failed to load more items: ' + result.error, 'error');
+          }
+          this.loadingMore.set(false);
+        },
+        error: (err) => {
+          this.loadingMore.set(false);
+          this.toastService.emitErrorOrWarning('Failed to load more items: ' + err.message, 'error');
+        }
+      });
   }
 
   refreshDirectory() {
     const path = this.currentPath();
     // get current scroll position
-    this.setRefreshState(this.getParentScrollContainer()?.scrollTop, {
-      index: this.sortCriteria().index,
-      order: !this.sortCriteria().order
-    });
+    this.setRefreshState(this.getParentScrollContainer()?.scrollTop, this.sortCriteria());
     this.loadDirectory(path.length > 0 ? path.join('/') : undefined, true);
   }
 
@@ -152,7 +192,7 @@ export class Management implements OnDestroy{
     });
   }
 
-  setRefreshState(scrollTop: number = 0, sortCriteria: SortCriterion = { index: 0, order: false }) {
+  setRefreshState(scrollTop: number = 0, sortCriteria: SortCriterion = { index: 0, order: true }) {
     this.stateService.setState<ManagementRefreshState>(
       environment.management_api + environment.refreshKey + environment.scrollKey,
       { scrollPosition: scrollTop, sortCriteria: sortCriteria} as ManagementRefreshState,
@@ -208,39 +248,14 @@ export class Management implements OnDestroy{
 
   // ─── Sorting ───────────────────────────────────────────────────────
 
-  getSortOptionForColumn(columnIndex: number, asc: ItemsSortOption, desc: ItemsSortOption): ItemsSortOption {
-    this.sortCriteria.update(criteria => {
-      if (criteria.index === columnIndex) {
-        // Toggle sort order
-        criteria.order = !criteria.order;
-      } else {
-        criteria.index = columnIndex;
-        criteria.order = true;
-      }
-      return criteria;
-    });
-    return this.sortCriteria().order ? asc : desc;
-  }
-
-  sortItemsBy(columnIndex: number, contents: FileBrowseNode[] | null) {
-    if (!contents) return;
-    let sortedContents = [...contents];
-
-    const option = (() => {
-      switch(columnIndex){
-        case 0:
-          return this.getSortOptionForColumn(0, ItemsSortOption.NAME_ASC, ItemsSortOption.NAME_DESC);
-        case 1:
-          return this.getSortOptionForColumn(1, ItemsSortOption.SIZE_ASC, ItemsSortOption.SIZE_DESC);
-        case 2:
-          return this.getSortOptionForColumn(2, ItemsSortOption.DATE_ASC, ItemsSortOption.DATE_DESC);
-        default:
-          return ItemsSortOption.NAME_ASC;
-      }
-    })();
-
-    sortedContents.sort(comparatorBySortOption(option))
-    this.directoryContents.set({ ...this.directoryContents(), data: sortedContents });
+  sortItemsBy(columnIndex: number) {
+    this.sortCriteria.update(criteria => criteria.index === columnIndex
+      // Toggle sort order
+      ? { index: columnIndex, order: !criteria.order }
+      : { index: columnIndex, order: true }
+    );
+    const path = this.currentPath();
+    this.loadDirectory(path.length > 0 ? path.join('/') : undefined);
   }
 
   // ─── Dialog Operations result ─────────────────────────────────────────────
@@ -13,6 +13,7 @@ import {
   SearchFrom,
   VideoSortOption,
   BrowseDirectoryGQL,
+  BrowsePageInput,
   DeleteVideoGQL,
   VideosBatchOperationInput,
   DirectoryVideosBatchOperationInput,
@@ -186,15 +187,23 @@ export class GqlService {
     )
   }
 
-  browseDirectoryQuery(relativePath?: string, refreshCache: boolean = false): Observable<ResultState<BrowseDirectoryDetail>> {
+  browseDirectoryQuery(relativePath?: string, refreshCache: boolean = false,
+                       page: BrowsePageInput = {}): Observable<ResultState<BrowseDirectoryDetail>> {
     return this.toResultStateObservable(
       this.browseDirectoryGQL.watch({
-        variables: { path: { 
-          relativePath: relativePath,
-          refreshFlag: refreshCache 
-        } }
+        variables: { 
+          path: { 
+            relativePath: relativePath,
+            refreshFlag: refreshCache 
+          },
+          page: page
+        }
       }).valueChanges,
-      (data) => this.filterUndefinedResult(data.browseDirectory ?? []) as BrowseDirectoryDetail
+      (data) => ({
+        nodes: this.filterUndefinedResult(data.browseDirectory?.nodes ?? []),
+        nextCursor: data.browseDirectory?.nextCursor ?? null,
+        totalCount: data.browseDirectory?.totalCount ?? 0
+      } as BrowseDirectoryDetail)
     )
   }
 
@@ -1,6 +1,7 @@
 import { HttpClient } from "@angular/common/http";
 import { inject, Injectable } from "@angular/core";
 import { environment } from "../../../environments/environment";
+import { retry, throwError, timer } from "rxjs";
 
 @Injectable({
   providedIn: "root",
@@ -8,15 +9,38 @@ import { environment } from "../../../environments/environment";
 export class HttpClientService {
     private httpClient = inject(HttpClient); 
 
-    getThumbnailUrl(videoId: string, thumbnailId?: string) {
+    getThumbnailUrl(videoId: string, thumbnailId?: string, size: 'tiny' | 'card' | 'poster' = 'card') {
         return this.httpClient.get(environment.backend_api + environment.videopage_thumbnail_api, {
             responseType: 'blob',
             observe: 'response',
+            // the server answers with WebP when it is explicitly accepted
+            headers: { Accept: 'image/webp,image/jpeg;q=0.9' },
             params: {
                 video_id: videoId,
                 thumbnail_id: thumbnailId ?? '',
+                size: size,
+            },
+            withCredentials: false
+        }).pipe(
+            // 503: the thumbnail is still being rendered by the server's background worker
+            retry({
+                count: 5,
+                delay: (error, retryCount) => error.status === 503 ? timer(2000 * retryCount) : throwError(() => error)
+            })
+        );
+    }
+
+    getThumbnails(videoIds: string[], size: 'tiny' | 'card' | 'poster' = 'card') {
+        // one multipart/form-data response, a part named after each video id that could be served
+        return this.httpClient.get(environment.backend_api + environment.videopage_thumbnails_api, {
+            responseType: 'blob',
+            observe: 'response',
+            headers: { Accept: 'image/webp,image/jpeg;q=0.9' },
+            params: {
+                video_id: videoIds,
+                size: size,
             },
             withCredentials: false
         });
     }
-}
\ No newline at end of file
+}
@@ -0,0 +1,129 @@
+import { TestBed } from '@angular/core/testing';
+import { provideHttpClient } from '@angular/common/http';
+import { HttpTestingController, provideHttpClientTesting, TestRequest } from '@angular/common/http/testing';
+import { firstValueFrom } from 'rxjs';
+import { environment } from '../../../environments/environment';
+import { ThumbnailBatchService } from './thumbnail-batch.service';
+
+const BOUNDARY = 'thumbnail-batch-spec';
+
+// multipart/form-data body shaped like the /video/thumbnails response: one part per served video id
+function multipart(parts: Record<string, string>): Blob {
+  const body = Object.entries(parts).map(([videoId, content]) =>
+    `--${BOUNDARY}\r\n`
+    + `Content-Disposition: form-data; name="${videoId}"; filename="${videoId}.webp"\r\n`
+    + `Content-Type: image/webp\r\n\r\n${content}\r\n`
+  ).join('') + `--${BOUNDARY}--\r\n`;
+  return new Blob([body]);
+}
+
+function flushMultipart(request: TestRequest, parts: Record<string, string>) {
+  request.flush(multipart(parts), { headers: { 'Content-Type': `multipart/form-data; boundary=${BOUNDARY}` } });
+}
+
+describe('ThumbnailBatchService', () => {
+  let service: ThumbnailBatchService;
+  let httpTesting: HttpTestingController;
+
+  const thumbnailsUrl = environment.backend_api + environment.videopage_thumbnails_api;
+  // the batch is sent from a microtask queued by the first request of the tick
+  const nextTick = () => Promise.resolve();
+
+  beforeEach(() => {
+    TestBed.configureTestingModule({
+      providers: [provideHttpClient(), provideHttpClientTesting()],
+    });
+    service = TestBed.inject(ThumbnailBatchService);
+    httpTesting = TestBed.inject(HttpTestingController);
+  });
+
+  afterEach(() => {
+    httpTesting.verify();
+  });
+
+  it('should be created', () => {
+    expect(service).toBeTruthy();
+  });
+
+  it('batches the cards of one tick into one request', async () => {
+    const thumbnails = ['a', 'b', 'c'].map(id => firstValueFrom(service.getThumbnail(id)));
+    await nextTick();
+
+    const request = httpTesting.expectOne(req => req.url === thumbnailsUrl);
+    expect(request.request.params.getAll('video_id')).toEqual(['a', 'b', 'c']);
+    expect(request.request.params.get('size')).toBe('card');
+    flushMultipart(request, { a: 'A', b: 'B', c: 'C' });
+
+    const blobs = await Promise.all(thumbnails);
+    expect(await Promise.all(blobs.map(blob => blob!.text()))).toEqual(['A', 'B', 'C']);
+  });
+
+  it('requests a video shown on several cards once', async () => {
+    const first = firstValueFrom(service.getThumbnail('a'));
+    const second = firstValueFrom(service.getThumbnail('a'));
+    const other = firstValueFrom(service.getThumbnail('b'));
+    await nextTick();
+
+    const request = httpTesting.expectOne(req => req.url === thumbnailsUrl);
+    expect(request.request.params.getAll('video_id')).toEqual(['a', 'b']);
+    flushMultipart(request, { a: 'A', b: 'B' });
+
+    expect(await (await first)!.text()).toBe('A');
+    expect(await (await second)!.text()).toBe('A');
+    expect(await (await other)!.text()).toBe('B');
+  });
+
+  it('splits the multipart response across the cards', async () => {
+    const served = firstValueFrom(service.getThumbnail('a'));
+    const pending = firstValueFrom(service.getThumbnail('b'));
+    await nextTick();
+
+    // no part for b: still rendering or missing, its card falls back to the single thumbnail endpoint
+    flushMultipart(httpTesting.expectOne(req => req.url === thumbnailsUrl), { a: 'A' });
+
+    expect(await (await served)!.text()).toBe('A');
+    expect(await pending).toBeNull();
+  });
+
+  it('starts a new batch on the next tick', async () => {
+    const first = firstValueFrom(service.getThumbnail('a'));
+    await nextTick();
+    const firstRequest = httpTesting.expectOne(req => req.url === thumbnailsUrl);
+
+    const second = firstValueFrom(service.getThumbnail('b'));
+    await nextTick();
+    const secondRequest = httpTesting.expectOne(req => req.url === thumbnailsUrl);
+
+    expect(secondRequest.request.params.getAll('video_id')).toEqual(['b']);
+    flushMultipart(firstRequest, { a: 'A' });
+    flushMultipart(secondRequest, { b: 'B' });
+    expect(await (await first)!.text()).toBe('A');
+    expect(await (await second)!.text()).toBe('B');
+  });
+
+  it('splits batches larger than the server limit', async () => {
+    const ids = Array.from({ length: 150 }, (_, i) => `video-${i}`);
+    const thumbnails = ids.map(id => firstValueFrom(service.getThumbnail(id)));
+    await nextTick();
+
+    const requests = httpTesting.match(req => req.url === thumbnailsUrl);
+    expect(requests.map(request => request.request.params.getAll('video_id'))).toEqual([ids.slice(0, 100), ids.slice(100)]);
+    for (const request of requests) {
+      const videoIds = request.request.params.getAll('video_id')!;
+      flushMultipart(request, Object.fromEntries(videoIds.map(id => [id, id.toUpperCase()])));
+    }
+
+    const blobs = await Promise.all(thumbnails);
+    expect(await blobs[149]!.text()).toBe('VIDEO-149');
+  });
+
+  it('gives every card of a failed batch null', async () => {
+    const thumbnails = ['a', 'b'].map(id => firstValueFrom(service.getThumbnail(id)));
+    await nextTick();
+
+    httpTesting.expectOne(req => req.url === thumbnailsUrl)
+      .flush(null, { status: 503, statusText: 'Service Unavailable' });
+
+    expect(await Promise.all(thumbnails)).toEqual([null, null]);
+  });
+});
@@ -0,0 +1,62 @@
+import { inject, Injectable } from "@angular/core";
+import { Observable, Subject, catchError, from, map, of, switchMap, take } from "rxjs";
+import { HttpClientService } from "../Http-client-service/Http-client.service";
+
+/**
+ * Collects the thumbnail requests of the cards rendered in the same tick into a single
+ * `/video/thumbnails` request. A card receives its image blob, or null if the server could not
+ * provide it in time (the card then falls back to the single thumbnail endpoint).
+ */
+@Injectable({
+  providedIn: "root",
+})
+export class ThumbnailBatchService {
+    private httpClientService = inject(HttpClientService);
+
+    // the server refuses larger batches
+    private readonly maxBatchSize = 100;
+
+    private pending = new Map<string, Subject<Blob | null>>();
+    private flushScheduled = false;
+
+    getThumbnail(videoId: string): Observable<Blob | null> {
+        let subject = this.pending.get(videoId);
+        if (!subject) {
+            subject = new Subject<Blob | null>();
+            this.pending.set(videoId, subject);
+        }
+        if (!this.flushScheduled) {
+            this.flushScheduled = true;
+            queueMicrotask(() => this.flush());
+        }
+        return subject.pipe(take(1));
+    }
+
+    private flush() {
+        const batch = this.pending;
+        this.pending = new Map();
+        this.flushScheduled = false;
+
+        const ids = [...batch.keys()];
+        for (let i = 0; i < ids.length; i += this.maxBatchSize) {
+            const chunk = ids.slice(i, i + this.maxBatchSize);
+            this.httpClientService.getThumbnails(chunk).pipe(
+                switchMap(response => {
+                    const contentType = response.headers.get('Content-Type');
+                    if (!response.body || !contentType) return of(null);
+                    // the browser parses multipart/form-data itself
+                    return from(new Response(response.body, { headers: { 'Content-Type': contentType } }).formData());
+                }),
+                map(formData => new Map(chunk.map(id => {
+                    const part = formData?.get(id);
+                    return [id, part instanceof Blob ? part : null] as const;
+                }))),
+                catchError(() => of(new Map<string, Blob | null>()))
+            ).subscribe(images => {
+                for (const id of chunk) {
+                    batch.get(id)!.next(images.get(id) ?? null);
+                }
+            });
+        }
+    }
+}
@@ -35,9 +35,13 @@ export class FileBrowseTable {
   selectedIds = input.required<Set<string>>();
   currentPath = input.required<string[]>();
   visibleTagsCount = input<number>(3);
+  totalCount = input<number>(0);
+  hasMore = input<boolean>(false);
+  loadingMore = input<boolean>(false);
 
   // --- Outputs ---
   sort = output<number>();
+  loadMore = output<void>();
   refresh = output<void>();
   nodeClick = output<FileBrowseNode>();
   selectionToggle = output<string>();
@@ -4,6 +4,9 @@ import { MatCardModule } from '@angular/material/card';
 import { MatChipsModule } from '@angular/material/chips';
 import { SearchedVideo } from '../../models/GQL-result.model';
 import { HttpClientService } from '../../../services/Http-client-service/Http-client.service';
+import { ThumbnailBatchService } from '../../../services/thumbnail-batch-service/thumbnail-batch.service';
+import { map, of, switchMap } from 'rxjs';
+import { environment } from '../../../../environments/environment';
 
 @Component({
   selector: 'app-video-card',
@@ -14,12 +17,16 @@ export class VideoCard {
   video = input<SearchedVideo | null>(null);
 
   private httpClientService = inject(HttpClientService);
+  private thumbnailBatchService = inject(ThumbnailBatchService);
 
   readonly defaultThumbnail = '/videoicon.png';
 
   thumbnailSrc = signal(this.defaultThumbnail);
   isDefaultThumbnail = signal(true);
 
+  // hover preview clip, only requested while the card is hovered (the video element handles ranges itself)
+  previewSrc = signal<string | null>(null);
+
   formattedDuration = computed(() => {
     const totalSeconds = this.video()?.duration ?? 0.0;
     const hours = Math.floor(totalSeconds / 3600);
@@ -49,9 +56,12 @@ export class VideoCard {
         return;
       }
 
-      this.httpClientService.getThumbnailUrl(video.id, video.thumbnail ?? '')
-        .subscribe(response => {
-          const blob = response.body;
+      // cards rendered together share one batch request, misses fall back to the single endpoint
+      this.thumbnailBatchService.getThumbnail(video.id).pipe(
+        switchMap(blob => blob
+          ? of(blob)
+          : this.httpClientService.getThumbnailUrl(video.id, video.thumbnail ?? '').pipe(map(response => response.body)))
+      ).subscribe(blob => {
           if (blob) {
             const url = URL.createObjectURL(blob);
             this.thumbnailSrc.set(url);
@@ -65,6 +75,18 @@ export class VideoCard {
     });
   }
 
+  startPreview() {
+    const video = this.video();
+    if (!video?.id || !video.duration) return;
+    this.previewSrc.set(
+      `${environment.backend_api}${environment.videopage_preview_api}?video_id=${encodeURIComponent(video.id)}`
+    );
+  }
+
+  stopPreview() {
+    this.previewSrc.set(null);
+  }
+
   get formattedDate(): string {
     if (!this.video()) return '';
     return new Date(this.video()!.lastModifyTime * 1000).toLocaleDateString(undefined, {
@@ -14,6 +14,10 @@ export class ImageRequestInterceptor implements HttpInterceptor {
         return next.handle(req).pipe(
             catchError((error) => {
                 if(req.url.includes(environment.videopage_thumbnail_api)) {
+                    if(error.status === 503) {
+                        // retried by the caller while the thumbnail is being generated
+                        throw error;
+                    }
                     this.toastService.emitErrorOrWarning(
                         `Failed to load video thumbnail image or video duration - video_id: ${req.params.get('video_id')}`,
                         'error'
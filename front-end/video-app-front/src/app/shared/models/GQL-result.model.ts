@@ -28,8 +28,8 @@ export type VideoMutationDetail = UpdateVideoMetadataMutation['updateVideoMetada
 export type VideoRecordViewDetail = RecordVideoViewMutation['recordVideoView'];
 
 export type BrowseDirectoryDetail = BrowseDirectoryQuery['browseDirectory'];
-export type FileBrowseNode = BrowseDirectoryQuery['browseDirectory'][0];
-export type BrowsedVideo = BrowseDirectoryQuery['browseDirectory'][0]['node'];
+export type FileBrowseNode = BrowseDirectoryQuery['browseDirectory']['nodes'][0];
+export type BrowsedVideo = BrowseDirectoryQuery['browseDirectory']['nodes'][0]['node'];
 
 export type DeleteVideoDetail = DeleteVideoMutation['deleteVideo'];
 
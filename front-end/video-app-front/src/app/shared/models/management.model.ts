@@ -1,4 +1,4 @@
-import { FileBrowseNode } from "./GQL-result.model";
+import { BrowseSortOption } from "../../core/graphql/generated/graphql";
 
 export type SortCriterion = {
     index: number;
@@ -10,28 +10,9 @@ export type ManagementRefreshState = {
   sortCriteria: SortCriterion;
 };
 
-export enum ItemsSortOption {
-  NAME_ASC = 'NAME_ASC',
-  NAME_DESC = 'NAME_DESC',
-  SIZE_ASC = 'SIZE_ASC',
-  SIZE_DESC = 'SIZE_DESC',
-  DATE_ASC = 'DATE_ASC',
-  DATE_DESC = 'DATE_DESC'
-}
-
-export function comparatorBySortOption(option: ItemsSortOption) {
-    switch(option){
-        case ItemsSortOption.NAME_ASC:
-            return (a: FileBrowseNode, b: FileBrowseNode) => a.node.name.localeCompare(b.node.name);
-        case ItemsSortOption.NAME_DESC:
-            return (a: FileBrowseNode, b: FileBrowseNode) => b.node.name.localeCompare(a.node.name);
-        case ItemsSortOption.SIZE_ASC:
-            return (a: FileBrowseNode, b: FileBrowseNode) => (a.node.size ?? 0) - (b.node.size ?? 0);
-        case ItemsSortOption.SIZE_DESC:
-            return (a: FileBrowseNode, b: FileBrowseNode) => (b.node.size ?? 0) - (a.node.size ?? 0);
-        case ItemsSortOption.DATE_ASC:
-            return (a: FileBrowseNode, b: FileBrowseNode) => (a.node.lastModifyTime ?? 0) - (b.node.lastModifyTime ?? 0);
-        case ItemsSortOption.DATE_DESC:
-            return (a: FileBrowseNode, b: FileBrowseNode) => (b.node.lastModifyTime ?? 0) - (a.node.lastModifyTime ?? 0);
-    }
-}
\ No newline at end of file
+// sort key sent to the server for each sortable column of the file browse table
+export const sortOptionByColumn: BrowseSortOption[] = [
+  BrowseSortOption.Name,
+  BrowseSortOption.Size,
+  BrowseSortOption.LastModifyTime
+];
@@ -8,6 +8,8 @@ export const environment = {
     management_api: "/management",
     videopage_api: "/video",
     videopage_thumbnail_api: "/video/thumbnail",
+    videopage_thumbnails_api: "/video/thumbnails",
+    videopage_preview_api: "/video/preview",
     pageListSize: 5,
     refreshKey: "_refresh_key",
     scrollKey: "_scroll_position",
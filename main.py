@@ -1,9 +1,11 @@
 from src.app import create_app
 from src.logger import get_logger
+from src.server import SendfileH11Protocol
 
 if __name__ == "__main__":
     import uvicorn
 
     logger = get_logger("main")
     logger.info("Starting application using Uvicorn")
-    uvicorn.run("main:create_app", host="localhost", port=12000, log_level="info", factory=create_app)
\ No newline at end of file
+    uvicorn.run("main:create_app", host="localhost", port=12000, log_level="info", factory=create_app,
+                http=SendfileH11Protocol)
\ No newline at end of file
@@ -5,10 +5,13 @@ from strawberry.fastapi import GraphQLRouter
 from strawberry.subscriptions import GRAPHQL_TRANSPORT_WS_PROTOCOL, GRAPHQL_WS_PROTOCOL
 from src.schema.strawberry_schema import schema
 from src.db.setup_mongo import setup_mongo
-from src.router import video_router
+from src.router import metrics_router, video_router
 from fastapi.middleware.cors import CORSMiddleware
 from src.config import get_settings
 from src.logger import setup_logger, get_logger
+from src.resolvers.library_scanner import get_library_scanner
+from src.resolvers.library_watcher import get_library_watcher
+from src.resolvers.media_worker import get_media_worker
 
 # Initialize logger
 settings = get_settings()
@@ -23,7 +26,15 @@ async def lifespan(app: FastAPI):
         retention=settings.logging.retention,
     )
     await setup_mongo()
+    get_media_worker().start()
+    if settings.watcher.enabled:
+        await get_library_watcher().start()
+    if settings.library_scan.resume_on_startup:
+        await get_library_scanner().resume()
     yield
+    await get_library_scanner().stop()
+    await get_library_watcher().stop()
+    await get_media_worker().stop()
     logger.info("Application shutdown")
 
 async def global_exception_handler(request: Request, exc: HTTPException):
@@ -34,6 +45,7 @@ async def global_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
+        headers=exc.headers,
     )
 
 def create_app():
@@ -58,6 +70,7 @@ def create_app():
     )
     app.include_router(graphql_app, prefix="/graphql")
     app.include_router(video_router.router)
+    app.include_router(metrics_router.router)
 
 
     logger.info("Application startup complete")
@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import Optional
+from typing import Literal, Optional
 from pydantic import BaseModel, Field
 import yaml
 from pydantic_settings import BaseSettings
@@ -12,6 +12,7 @@ class PageSize(BaseModel):
     homepage_videos: int = 10
     homepage_tags: int = 50
     searchpage: int = 15
+    browse: int = 100
 
 
 class SuggestionLimit(BaseModel):
@@ -36,6 +37,91 @@ class ValidationConfig(BaseModel):
     max_tags_count: int = 50
     page_number_min: int = 1
     page_number_max: int = 10000
+    browse_page_size_max: int = 500
+
+
+class StreamConfig(BaseModel):
+    chunk_size: int = 1024 * 1024  # in bytes, used when the server cannot sendfile
+    # hand the file to the ASGI server when it advertises `http.response.zerocopysend` or `http.response.pathsend`,
+    # uvicorn does with the `src.server.SendfileH11Protocol` the app is started with (main.py, Dockerfile)
+    use_sendfile: bool = True
+
+
+class ThumbnailVariant(BaseModel):
+    width: int  # in pixels, frames narrower than this are not upscaled
+    quality: int = 80  # 1-100, mapped onto the JPEG / WebP encoder scale
+
+
+class ThumbnailCacheConfig(BaseModel):
+    cache_dir: str = "cache/thumbnails"
+    max_size_mb: int = 512
+    memory_cache_mb: int = 64  # most requested thumbnails kept in memory in front of the disk store
+    memory_cache_max_item_kb: int = 256  # larger images (e.g. posters) are only read from disk
+    variants: dict[str, ThumbnailVariant] = Field(default_factory=lambda: {
+        "tiny": ThumbnailVariant(width=64, quality=50),
+        "card": ThumbnailVariant(width=320, quality=80),
+        "poster": ThumbnailVariant(width=1280, quality=85),
+    })
+    default_variant: str = "card"
+    webp: bool = True  # also render WebP, served to clients whose Accept header allows it
+    # "representative": pick the most informative of a few sampled keyframes (one ffmpeg pass, choice persisted)
+    # "fixed": the frame at seek_fraction, also the fallback when sampling fails
+    frame_selection: Literal["fixed", "representative"] = "representative"
+    representative_samples: int = 6
+    seek_fraction: float = 0.1  # thumbnail frame position as a fraction of the duration, 10 s in when unknown
+    fast_seek: bool = True  # grab the nearest keyframe instead of decoding up to the exact timestamp
+
+
+class FfmpegLimiterConfig(BaseModel):
+    min_limit: int = 1
+    max_limit: Optional[int] = None  # defaults to the number of CPUs
+    latency_ratio: float = 2.0  # shrink when process latency exceeds this multiple of its baseline
+    max_load_per_cpu: float = 1.5  # shrink above this 1-minute load average per CPU
+    streams_per_slot: int = 2  # every N active video streams take one slot off the maximum
+    adjust_interval: float = 2  # in seconds, minimum delay between two limit changes
+
+
+class StoryboardConfig(BaseModel):
+    tile_width: int = 160
+    tile_height: int = 90
+    columns: int = 10
+    max_tiles: int = 100
+    min_interval: float = 2  # in seconds, short videos get fewer tiles
+    timeout: float = 120  # in seconds, the sprite sheet is rendered in a single pass over the whole video
+
+
+class PreviewConfig(BaseModel):
+    enabled: bool = True  # render hover preview clips in the background, after thumbnails and metadata
+    cache_dir: str = "cache/previews"
+    max_size_mb: int = 256  # separate from the thumbnail store, clips never evict thumbnails
+    duration: float = 3  # in seconds, taken from the thumbnail position
+    width: int = 320
+    fps: int = 12
+    format: Literal["webm", "webp"] = "webm"  # VP9 WebM, or animated WebP
+    bitrate_kbps: int = 200  # WebM only
+    quality: int = 60  # animated WebP only
+    timeout: float = 60  # in seconds
+
+
+class MediaWorkerConfig(BaseModel):
+    workers: int = 2  # concurrent pre-generation jobs, ffmpeg processes stay bounded by the ffmpeg limiter
+    backfill: bool = True  # walk the library at startup for videos without thumbnail or metadata
+    backfill_batch_size: int = 200
+    request_wait: float = 10  # in seconds, how long a thumbnail request waits for the worker before a 503
+    max_attempts: int = 3  # failed pre-generations of a file before it is given up on, until the file changes
+
+
+class WatcherConfig(BaseModel):
+    enabled: bool = True  # keep the database and the directory index in sync with changes made outside of the app
+    mode: Literal["auto", "inotify", "polling"] = "auto"  # auto: inotify on local disks, polling on network mounts
+    poll_interval: float = 60  # in seconds, polling only
+    debounce: float = 2  # in seconds of quiet before a batch of changes is applied
+    max_delay: float = 30  # in seconds, a batch is applied after this delay even if changes keep coming
+
+
+class LibraryScanConfig(BaseModel):
+    batch_size: int = 200  # video files probed and written per step, the scan is checkpointed after each one
+    resume_on_startup: bool = True  # resume a scan interrupted by a restart
 
 
 class LoggingConfig(BaseModel):
@@ -48,7 +134,20 @@ class Settings(BaseSettings):
     resource_paths: dict[str, str] = Field(default_factory=dict)
     ROOT_PATH: Optional[str] = None
     cache_config: CacheConfig = CacheConfig()
-    ffmpeg_semaphore_limit: int = 4
+    metadata_cache_config: CacheConfig = CacheConfig(max_size=4096, ttl=60)
+    directory_batch_chunk_size: int = 500  # video files written per step of a directory batch operation
+    directory_scan_workers: int = 8  # directories listed in parallel when aggregating a tree, each scandir is a round trip on a network mount
+    directory_scan_timeout: float = 600  # in seconds, a tree scan stuck on an unresponsive mount fails after this delay
+    ffmpeg_semaphore_limit: int = 4  # initial limit of the adaptive ffmpeg/ffprobe limiter, at least half the CPUs
+    ffmpeg_limiter: FfmpegLimiterConfig = FfmpegLimiterConfig()
+    ffmpeg_timeout: float = 30  # in seconds, ffmpeg/ffprobe processes are killed after this delay
+    stream_config: StreamConfig = StreamConfig()
+    thumbnail_cache: ThumbnailCacheConfig = ThumbnailCacheConfig()
+    media_worker: MediaWorkerConfig = MediaWorkerConfig()
+    storyboard: StoryboardConfig = StoryboardConfig()
+    preview: PreviewConfig = PreviewConfig()
+    watcher: WatcherConfig = WatcherConfig()
+    library_scan: LibraryScanConfig = LibraryScanConfig()
     page_size_default: PageSize = PageSize()
     suggestion_limit: SuggestionLimit = SuggestionLimit()
     video_extensions: list[str] = Field(default_factory=lambda: [".mp4"])
@@ -1,8 +1,12 @@
 from typing import Optional
 from beanie import Document, Indexed
 import pymongo
+from pymongo.collation import Collation, CollationStrength
 from pydantic import BaseModel, Field
 
+# order of the Name browse sort: case-insensitive, case only breaks ties between otherwise equal names
+NAME_COLLATION = Collation(locale="en", strength=CollationStrength.TERTIARY)
+
 class VideoModel(Document):
     path: Indexed(str, pymongo.ASCENDING, unique=True)  # type: ignore 
     isDir: bool
@@ -17,7 +21,18 @@ class VideoModel(Document):
     viewCount: Optional[int] = 0
     lastViewTime: Optional[float] = 0.0
     thumbnail: Optional[str] = None
+    thumbnailTimestamp: Optional[float] = None  # frame chosen by representative frame selection, in seconds
     duration: Optional[float] = 0.0
+    mediaFailures: Optional[int] = 0  # failed thumbnail/metadata pre-generation attempts on the current file
+
+    # technical metadata filled by a single ffprobe pass
+    container: Optional[str] = None
+    videoCodec: Optional[str] = None
+    audioCodec: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    bitrate: Optional[int] = None  # bits per second
+    keyframeInterval: Optional[float] = None  # seconds
 
     class Settings:
         name = "videos"
@@ -32,6 +47,33 @@ class VideoModel(Document):
             # compound index: viewCount + lastViewTime (used for popular videos)
             [("viewCount", pymongo.DESCENDING), ("lastViewTime", pymongo.DESCENDING)],
             [("duration", pymongo.DESCENDING)],
+            # search filters on technical metadata
+            [("videoCodec", pymongo.ASCENDING)],
+            [("height", pymongo.DESCENDING)],
+            # browse pages: sort key + path tie-break, the Name sort uses the collated path
+            [("size", pymongo.ASCENDING), ("path", pymongo.ASCENDING)],
+            [("lastModifyTime", pymongo.ASCENDING), ("path", pymongo.ASCENDING)],
+            pymongo.IndexModel([("path", pymongo.ASCENDING)], name="path_name_order", collation=NAME_COLLATION),
+        ]
+
+class DirectoryModel(Document):
+    """Recursive aggregates of the video files under a directory, kept up to date incrementally."""
+    path: Indexed(str, pymongo.ASCENDING, unique=True)  # type: ignore
+    parent: Optional[str] = None  # None for a resource root
+    size: float = 0.0
+    lastModifyTime: float = 0.0
+    videoCount: int = 0
+
+    class Settings:
+        name = "directories"
+        indexes = [
+            [("parent", pymongo.ASCENDING)],
+            # browse pages: sub directories of a parent in sort key + path order
+            [("parent", pymongo.ASCENDING), ("size", pymongo.ASCENDING), ("path", pymongo.ASCENDING)],
+            [("parent", pymongo.ASCENDING), ("lastModifyTime", pymongo.ASCENDING), ("path", pymongo.ASCENDING)],
+            pymongo.IndexModel(
+                [("parent", pymongo.ASCENDING), ("path", pymongo.ASCENDING)], name="parent_path_name_order", collation=NAME_COLLATION
+            ),
         ]
 
 class VideoTagModel(Document):
@@ -39,4 +81,17 @@ class VideoTagModel(Document):
     tag_count: int = Field(Indexed(int, pymongo.DESCENDING), alias="count")  # type: ignore
 
     class Settings:
-        name = "tags"
\ No newline at end of file
+        name = "tags"
+
+class LibraryScanModel(Document):
+    """Checkpoint of the full-library scan, a single document saved after every batch."""
+    status: str = "Idle"  # Idle, Running, Done or Failed
+    pendingDirectories: list[str] = Field(default_factory=list)  # walk stack of host paths, directories not listed yet
+    videosSeen: int = 0
+    videosAdded: int = 0
+    startedAt: Optional[float] = None
+    finishedAt: Optional[float] = None
+    error: Optional[str] = None
+
+    class Settings:
+        name = "library_scans"
@@ -1,6 +1,6 @@
 from beanie import init_beanie
 from pymongo import AsyncMongoClient
-from .models.Video_model import VideoModel, VideoTagModel
+from .models.Video_model import DirectoryModel, LibraryScanModel, VideoModel, VideoTagModel
 from src.config import MongoConfig, get_settings
 from src.logger import get_logger
 
@@ -19,5 +19,5 @@ async def setup_mongo():
     client = AsyncMongoClient(mongo_uri)
 
     #initialize Beanie with the client and database name
-    await init_beanie(database=client.get_database(mongo_config.database), document_models=[VideoModel, VideoTagModel])
+    await init_beanie(database=client.get_database(mongo_config.database), document_models=[VideoModel, VideoTagModel, DirectoryModel, LibraryScanModel])
     logger.info("MongoDB setup complete")
\ No newline at end of file
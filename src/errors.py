@@ -26,3 +26,10 @@ class InputValidationError(Exception):
         self.field = field
         self.issue = issue
         super().__init__(f"Input validation error on field '{field}': {issue}")
+
+
+class MediaProcessError(Exception):
+    def __init__(self, command: str, details: str):
+        self.command = command
+        self.details = details
+        super().__init__(f"Media process '{command}' failed: {details}")
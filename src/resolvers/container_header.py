@@ -0,0 +1,159 @@
+import mmap
+import struct
+
+from src.logger import get_logger
+
+logger = get_logger("container_header")
+
+# ISO base media file format (MP4 / MOV / M4V)
+_MP4_TOP_LEVEL_BOXES = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot"}
+
+# Matroska / WebM element ids, marker bits included
+_EBML_HEADER_ID = 0x1A45DFA3
+_SEGMENT_ID = 0x18538067
+_INFO_ID = 0x1549A966
+_CLUSTER_ID = 0x1F43B675
+_TIMECODE_SCALE_ID = 0x2AD7B1
+_DURATION_ID = 0x4489
+_DEFAULT_TIMECODE_SCALE = 1_000_000  # nanoseconds
+
+
+def read_header_duration(file_path: str) -> float | None:
+    """
+    Read the duration of an MP4/MOV/M4V (`mvhd` box) or MKV/WebM (Segment Info Duration) file
+    straight from its container header, without spawning ffprobe.
+
+    Only the header pages are touched through mmap, the media data is never read.
+    Blocking, call through `run_in_threadpool`.
+
+    :param file_path: Path of the video file
+    :return: The duration in seconds, or None if the format is not supported or the header
+             does not carry a usable duration (e.g. fragmented MP4, live WebM)
+    :rtype: float | None
+    """
+    try:
+        with open(file_path, "rb") as video_file, \
+                mmap.mmap(video_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if len(data) >= 8 and data[4:8] in _MP4_TOP_LEVEL_BOXES:
+                return _read_mp4_duration(data)
+            if len(data) >= 4 and int.from_bytes(data[0:4], "big") == _EBML_HEADER_ID:
+                return _read_matroska_duration(data)
+    except (OSError, ValueError) as e:
+        # ValueError: empty file, which cannot be mapped
+        logger.debug(f"Cannot read container header of {file_path}: {e}")
+    except (struct.error, IndexError) as e:
+        logger.debug(f"Truncated container header in {file_path}: {e}")
+    return None
+
+
+# ============================================================
+# MP4 / MOV
+# ============================================================
+
+def _iter_boxes(data: mmap.mmap, start: int, end: int):
+    """Yield (type, payload_start, box_end) for each box between start and end."""
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size:
+            return
+        yield box_type, offset + header_size, min(offset + size, end)
+        offset += size
+
+
+def _read_mp4_duration(data: mmap.mmap) -> float | None:
+    # moov may come after mdat when the file was not "faststart"-ed, skipping boxes is free with mmap
+    for box_type, payload, box_end in _iter_boxes(data, 0, len(data)):
+        if box_type != b"moov":
+            continue
+        for child_type, child_payload, _ in _iter_boxes(data, payload, box_end):
+            if child_type == b"mvhd":
+                return _parse_mvhd(data, child_payload)
+        return None
+    return None
+
+
+def _parse_mvhd(data: mmap.mmap, offset: int) -> float | None:
+    version = data[offset]
+    if version == 1:
+        timescale, duration = struct.unpack_from(">IQ", data, offset + 4 + 16)
+        unknown = 0xFFFFFFFFFFFFFFFF
+    else:
+        timescale, duration = struct.unpack_from(">II", data, offset + 4 + 8)
+        unknown = 0xFFFFFFFF
+    if timescale == 0 or duration in (0, unknown):
+        return None
+    return duration / timescale
+
+
+# ============================================================
+# Matroska / WebM (EBML)
+# ============================================================
+
+def _read_vint(data: mmap.mmap, offset: int, keep_marker: bool) -> tuple[int | None, int]:
+    """
+    Read an EBML variable length integer, returning (value, next offset).
+    The value is None for a size with all data bits set ("unknown size").
+    """
+    first = data[offset]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError("Invalid EBML variable length integer")
+
+    value = first if keep_marker else first & (mask - 1)
+    for byte in data[offset + 1:offset + length]:
+        value = (value << 8) | byte
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        return None, offset + length
+    return value, offset + length
+
+
+def _iter_elements(data: mmap.mmap, start: int, end: int):
+    """Yield (id, payload_start, payload_end) for each element between start and end."""
+    offset = start
+    while offset < end:
+        element_id, offset = _read_vint(data, offset, keep_marker=True)
+        size, offset = _read_vint(data, offset, keep_marker=False)
+        payload_end = end if size is None else min(offset + size, end)
+        yield element_id, offset, payload_end
+        if size is None:
+            return
+        offset = payload_end
+
+
+def _read_matroska_duration(data: mmap.mmap) -> float | None:
+    for element_id, payload, payload_end in _iter_elements(data, 0, len(data)):
+        if element_id != _SEGMENT_ID:
+            continue
+        for child_id, child_payload, child_end in _iter_elements(data, payload, payload_end):
+            if child_id == _INFO_ID:
+                return _parse_segment_info(data, child_payload, child_end)
+            if child_id == _CLUSTER_ID:
+                # media data starts, Info is always written before the first cluster
+                return None
+        return None
+    return None
+
+
+def _parse_segment_info(data: mmap.mmap, start: int, end: int) -> float | None:
+    timecode_scale = _DEFAULT_TIMECODE_SCALE
+    duration = None
+    for element_id, payload, payload_end in _iter_elements(data, start, end):
+        size = payload_end - payload
+        if element_id == _TIMECODE_SCALE_ID and 0 < size <= 8:
+            timecode_scale = int.from_bytes(data[payload:payload_end], "big")
+        elif element_id == _DURATION_ID and size in (4, 8):
+            duration = struct.unpack_from(">f" if size == 4 else ">d", data, payload)[0]
+    if not duration or duration <= 0:
+        return None
+    return duration * timecode_scale / 1e9
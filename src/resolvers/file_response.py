@@ -0,0 +1,174 @@
+import os
+import secrets
+from typing import Mapping
+
+import aiofiles
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from src.logger import get_logger
+from src.resolvers.process_limiter import get_process_limiter
+
+logger = get_logger("file_response")
+
+# ASGI extensions that let the server push file bytes itself (kernel sendfile)
+ZEROCOPY_SEND_EXTENSION = "http.response.zerocopysend"
+PATH_SEND_EXTENSION = "http.response.pathsend"
+
+
+class FileRangeResponse(Response):
+    """
+    Response that serves `length` bytes of a file starting at `start`.
+
+    When `use_sendfile` is enabled and the ASGI server advertises the `zerocopysend`
+    extension, the open file descriptor is handed to the server which pushes the bytes
+    with `os.sendfile`, so no chunk is ever copied through Python. A full-file response
+    may also use the `pathsend` extension. Otherwise the file is read in chunks with aiofiles.
+    Stock uvicorn advertises neither extension, the app runs it with `src.server.SendfileH11Protocol`
+    which implements `zerocopysend` on top of `loop.sendfile`.
+
+    GET bodies count as active streams for the ffmpeg process limiter, unless `count_stream` is off
+    (e.g. for short preview clips). HEAD requests send no body and are never counted.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        start: int,
+        length: int,
+        status_code: int = 200,
+        headers: Mapping[str, str] | None = None,
+        media_type: str | None = None,
+        chunk_size: int = 1024 * 1024,
+        use_sendfile: bool = True,
+        count_stream: bool = True,
+    ) -> None:
+        self.path = path
+        self.start = start
+        self.length = length
+        self.chunk_size = chunk_size
+        self.use_sendfile = use_sendfile
+        self.count_stream = count_stream
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.count_stream or scope.get("method", "GET").upper() == "HEAD":
+            await self._send_response(scope, send)
+            return
+        # active streams compete with ffmpeg for the disk, the process limiter leaves them room
+        async with get_process_limiter().stream():
+            await self._send_response(scope, send)
+
+    async def _send_response(self, scope: Scope, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        if scope.get("method", "GET").upper() == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if self.use_sendfile and PATH_SEND_EXTENSION in extensions and ZEROCOPY_SEND_EXTENSION not in extensions \
+                and self._is_whole_file():
+            await send({"type": PATH_SEND_EXTENSION, "path": self.path})
+            return
+
+        await self._send_file_range(send, extensions, self.start, self.length)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    def _is_whole_file(self) -> bool:
+        return self.start == 0 and self.length == os.path.getsize(self.path)
+
+    async def _send_file_range(self, send: Send, extensions: dict, start: int, length: int) -> None:
+        """Send `length` bytes from `start` as body messages, leaving the response open."""
+        if self.use_sendfile and ZEROCOPY_SEND_EXTENSION in extensions:
+            # the server calls os.sendfile on our descriptor for the requested byte range
+            with open(self.path, "rb") as video_file:
+                await send({
+                    "type": ZEROCOPY_SEND_EXTENSION,
+                    "file": video_file,
+                    "offset": start,
+                    "count": length,
+                    "more_body": True,
+                })
+        else:
+            async for chunk in iter_file_range(self.path, start, length, self.chunk_size):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+
+class MultipartByteRangesResponse(FileRangeResponse):
+    """
+    206 response carrying several byte ranges of one file as `multipart/byteranges` (RFC 7233 §4.1).
+    Each part body goes through the same sendfile / chunked path as `FileRangeResponse`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ranges: list[tuple[int, int]],
+        file_size: int,
+        content_type: str,
+        headers: Mapping[str, str] | None = None,
+        chunk_size: int = 1024 * 1024,
+        use_sendfile: bool = True,
+        count_stream: bool = True,
+    ) -> None:
+        boundary = secrets.token_hex(13)
+        self.parts = [
+            (
+                start,
+                end - start + 1,
+                (
+                    f"--{boundary}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n"
+                ).encode("latin-1"),
+            )
+            for start, end in ranges
+        ]
+        self.closing = f"--{boundary}--\r\n".encode("latin-1")
+        content_length = sum(len(header) + length + 2 for _, length, header in self.parts) + len(self.closing)
+
+        super().__init__(
+            path,
+            start=0,
+            length=content_length,
+            status_code=206,
+            headers={
+                **(headers or {}),
+                "Content-Type": f"multipart/byteranges; boundary={boundary}",
+                "Content-Length": str(content_length),
+            },
+            chunk_size=chunk_size,
+            use_sendfile=use_sendfile,
+            count_stream=count_stream,
+        )
+
+    async def _send_response(self, scope: Scope, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        if scope.get("method", "GET").upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        for start, length, header in self.parts:
+            await send({"type": "http.response.body", "body": header, "more_body": True})
+            await self._send_file_range(send, extensions, start, length)
+            await send({"type": "http.response.body", "body": b"\r\n", "more_body": True})
+        await send({"type": "http.response.body", "body": self.closing, "more_body": False})
+
+
+async def iter_file_range(path: str, start: int, length: int, chunk_size: int = 1024 * 1024):
+    """Yield `length` bytes of the file starting at `start`, reading at most `chunk_size` at a time."""
+    async with aiofiles.open(path, "rb") as video_file:
+        await video_file.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await video_file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
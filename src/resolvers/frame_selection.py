@@ -0,0 +1,84 @@
+import math
+
+# Size of the grayscale samples scored in Python, enough for a luma histogram
+SAMPLE_WIDTH = 64
+SAMPLE_HEIGHT = 36
+SAMPLE_BYTES = SAMPLE_WIDTH * SAMPLE_HEIGHT
+
+HISTOGRAM_BINS = 32
+
+# Mean luma outside of this range is a black intro, a fade or a white title card
+MIN_MEAN_LUMA = 24
+MAX_MEAN_LUMA = 232
+
+
+def sample_timestamps(duration: float, count: int) -> list[float]:
+    """
+    Candidate thumbnail positions spread over the video, skipping the first 5 % (intro, logos)
+    and the last 15 % (credits), so that every fast seek lands on a keyframe inside the video.
+    """
+    if duration <= 0 or count <= 0:
+        return []
+    start, end = duration * 0.05, duration * 0.85
+    if count == 1:
+        return [round((start + end) / 2, 3)]
+    step = (end - start) / (count - 1)
+    return [round(start + i * step, 3) for i in range(count)]
+
+
+def build_frame_sampling_command(video_path: str, timestamps: list[float]) -> list[str]:
+    """
+    FFmpeg command decoding the keyframe at or before each timestamp, in a single process.
+
+    Every timestamp opens the file as its own input with a fast seek, so only the regions around
+    the samples are read instead of the whole file. The frames are shrunk to grayscale
+    `SAMPLE_WIDTH` x `SAMPLE_HEIGHT` and written to stdout back to back as raw bytes.
+    """
+    command = ["ffmpeg", "-loglevel", "error"]
+    for timestamp in timestamps:
+        command += ["-skip_frame", "nokey", "-noaccurate_seek", "-ss", str(timestamp), "-i", video_path]
+
+    filter_graph = ";".join(
+        f"[{i}:v]trim=end_frame=1,scale={SAMPLE_WIDTH}:{SAMPLE_HEIGHT},format=gray,setsar=1[f{i}]"
+        for i in range(len(timestamps))
+    )
+    filter_graph += ";" + "".join(f"[f{i}]" for i in range(len(timestamps)))
+    filter_graph += f"concat=n={len(timestamps)}:v=1:a=0[out]"
+    return command + ["-an", "-filter_complex", filter_graph, "-map", "[out]", "-f", "rawvideo", "pipe:1"]
+
+
+def score_frame(gray: bytes) -> float:
+    """
+    How informative a frame looks: the entropy of its luma histogram, weighted by its contrast.
+    Dark, washed out or flat frames (black intros, fades, logos on a plain background) score near 0.
+    """
+    if not gray:
+        return 0.0
+    histogram = [0] * HISTOGRAM_BINS
+    total = 0
+    for value in gray:
+        histogram[value * HISTOGRAM_BINS // 256] += 1
+        total += value
+    count = len(gray)
+    mean = total / count
+
+    entropy = -sum(n / count * math.log2(n / count) for n in histogram if n)
+    variance = sum(n * ((i + 0.5) * 256 / HISTOGRAM_BINS - mean) ** 2 for i, n in enumerate(histogram)) / count
+
+    score = entropy / math.log2(HISTOGRAM_BINS) * (0.5 + 0.5 * min(1.0, math.sqrt(variance) / 48))
+    if mean < MIN_MEAN_LUMA or mean > MAX_MEAN_LUMA:
+        score *= 0.1
+    return score
+
+
+def pick_representative(frames: bytes, timestamps: list[float]) -> float | None:
+    """
+    Timestamp of the best scoring sample in the output of `build_frame_sampling_command`.
+
+    :return: None if the output does not hold one frame per timestamp (e.g. a seek past a truncated end)
+    """
+    if not timestamps or len(frames) != SAMPLE_BYTES * len(timestamps):
+        return None
+    scores = [score_frame(frames[i * SAMPLE_BYTES:(i + 1) * SAMPLE_BYTES]) for i in range(len(timestamps))]
+    best = max(range(len(timestamps)), key=lambda i: scores[i])
+    return timestamps[best]
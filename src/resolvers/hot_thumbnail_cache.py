@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from functools import lru_cache
+
+from src.config import get_settings
+
+
+class HotThumbnailCache:
+    """
+    In-memory LRU of the most requested thumbnails, in front of the disk store.
+
+    The budget is the total size of the cached images rather than an entry count, since a poster
+    weighs a hundred times a placeholder. Images bigger than `max_item_bytes` are never kept, so a
+    few posters cannot flush the whole grid. The cached `bytes` objects are immutable and handed to
+    the response as they are, without any copy.
+
+    Only meant to be used from the event loop, it does no IO and takes no lock.
+    """
+
+    def __init__(self, max_size_bytes: int, max_item_bytes: int):
+        self.max_size_bytes = max_size_bytes
+        self.max_item_bytes = max_item_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()  # least recently used first
+        self._total_size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> bytes | None:
+        data = self._entries.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_item_bytes or len(data) > self.max_size_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._total_size -= len(previous)
+        self._entries[key] = data
+        self._total_size += len(data)
+        while self._total_size > self.max_size_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._total_size -= len(evicted)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._total_size,
+            "maxBytes": self.max_size_bytes,
+        }
+
+
+@lru_cache
+def get_hot_thumbnail_cache() -> HotThumbnailCache:
+    thumbnail_cache = get_settings().thumbnail_cache
+    return HotThumbnailCache(
+        max_size_bytes=thumbnail_cache.memory_cache_mb * 1024 * 1024,
+        max_item_bytes=thumbnail_cache.memory_cache_max_item_kb * 1024
+    )
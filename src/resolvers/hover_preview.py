@@ -0,0 +1,71 @@
+from pydantic import BaseModel
+
+from src.config import PreviewConfig
+from src.resolvers.thumbnail_store import ThumbnailStore
+
+
+class HoverPreviewSpec(BaseModel):
+    """
+    A short, silent, low-bitrate clip played while a video card is hovered: `duration` seconds from
+    `start`, scaled to `width` at `fps` frames per second, as VP9 WebM or animated WebP.
+    """
+    start: float
+    duration: float
+    width: int
+    fps: int
+    format: str
+    bitrateKbps: int
+    quality: int
+
+    @classmethod
+    def for_video(cls, video_duration: float, start: float, config: PreviewConfig) -> "HoverPreviewSpec":
+        """Clip starting at `start` (the thumbnail position), moved back so that it fits in the video."""
+        duration = min(config.duration, video_duration)
+        return cls(
+            start=round(max(0.0, min(start, video_duration - duration)), 3),
+            duration=duration,
+            width=config.width,
+            fps=config.fps,
+            format=config.format,
+            bitrateKbps=config.bitrate_kbps,
+            quality=config.quality,
+        )
+
+    @property
+    def identity(self) -> str:
+        """Part of the store key, a new configuration must produce a new clip."""
+        encoding = f"{self.bitrateKbps}k" if self.format == "webm" else f"q{self.quality}"
+        return f"preview:{self.format}:{self.start:.3f}+{self.duration:.3f}:{self.width}@{self.fps}:{encoding}"
+
+    @property
+    def media_type(self) -> str:
+        return f"video/{self.format}" if self.format == "webm" else f"image/{self.format}"
+
+    @property
+    def extension(self) -> str:
+        return self.format
+
+    def store_key(self, path: str, last_modify_time: float, size: float) -> str:
+        return ThumbnailStore.make_key(f"{path}#{self.identity}", last_modify_time, size)
+
+    def build_command(self, video_path: str, output_path: str) -> list[str]:
+        """ffmpeg command rendering the clip into `output_path` (a seekable file, so WebM gets its cues)."""
+        if self.format == "webm":
+            encoder_args = [
+                "-c:v", "libvpx-vp9", "-b:v", f"{self.bitrateKbps}k",
+                "-deadline", "realtime", "-cpu-used", "8", "-row-mt", "1",
+                "-f", "webm",
+            ]
+        else:
+            encoder_args = ["-c:v", "libwebp", "-quality", str(self.quality), "-loop", "0", "-f", "webp"]
+        return [
+            "ffmpeg",
+            "-loglevel", "error",
+            "-ss", str(self.start),
+            "-t", str(self.duration),
+            "-i", video_path,
+            "-an", "-sn",
+            "-vf", f"fps={self.fps},scale=w='min({self.width},iw)':h=-2",
+            *encoder_args,
+            output_path,
+        ]
@@ -0,0 +1,177 @@
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import Response
+
+# Upper bound on ranges served in one multipart response, beyond that the header is ignored (RFC 7233 §6.1)
+MAX_RANGES = 16
+
+
+# ============================================================
+# Range requests (RFC 7233)
+# ============================================================
+
+def parse_range_header(range_header: str, file_size: int) -> list[tuple[int, int]] | None:
+    """
+    Parse a Range header into a sorted list of inclusive (start, end) byte ranges.
+
+    Supports `start-end`, open-ended `start-` and suffix `-length` specs, separated by commas.
+    Overlapping or adjacent ranges are coalesced.
+
+    Args:
+        range_header: Raw value of the Range header
+        file_size: Size of the representation in bytes
+
+    Returns:
+        The satisfiable ranges, or None when the header is malformed and must be ignored
+        (the caller then answers with the full representation)
+
+    Raises:
+        HTTPException: 416 when the header is valid but none of the ranges can be satisfied
+    """
+    unit, _, range_set = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not range_set.strip():
+        return None
+
+    ranges: list[tuple[int, int]] = []
+    specs = range_set.split(",")
+    if len(specs) > MAX_RANGES:
+        return None
+
+    for spec in specs:
+        first, dash, last = spec.strip().partition("-")
+        if not dash or not (first.isdigit() or last.isdigit()):
+            return None
+        if (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+
+        if not first:
+            # suffix range: the last N bytes
+            suffix_length = int(last)
+            if suffix_length == 0 or file_size == 0:
+                continue
+            ranges.append((max(0, file_size - suffix_length), file_size - 1))
+            continue
+
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start >= file_size:
+            continue
+        end = int(last) if last else file_size - 1
+        ranges.append((start, min(end, file_size - 1)))
+
+    if not ranges:
+        raise HTTPException(
+            status_code=416,
+            detail="The requested scope is invalid.",
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+
+    return _coalesce_ranges(ranges)
+
+
+def _coalesce_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def if_range_matches(if_range: str | None, etag: str | None, last_modified: str | None) -> bool:
+    """
+    Evaluate an If-Range precondition: the range is honored only when the validator still matches.
+
+    An entity tag must match strongly, a date must equal the current Last-Modified exactly.
+    A missing If-Range header always matches.
+    """
+    if if_range is None:
+        return True
+
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return etag is not None and not if_range.startswith("W/") and if_range == etag
+
+    if last_modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(if_range) == parsedate_to_datetime(last_modified)
+    except (TypeError, ValueError):
+        return False
+
+
+def http_date(timestamp: float) -> str:
+    """Format a POSIX timestamp as an IMF-fixdate, e.g. for Last-Modified."""
+    return formatdate(timestamp, usegmt=True)
+
+
+# ============================================================
+# Conditional requests (RFC 7232)
+# ============================================================
+
+def make_etag(path: str, last_modify_time: float, size: float) -> str:
+    """Strong entity tag derived from the file identity stored on VideoModel."""
+    identity = f"{path}:{last_modify_time}:{size}".encode("utf-8")
+    return f'"{hashlib.md5(identity, usedforsecurity=False).hexdigest()}"'
+
+
+def is_not_modified(headers: Headers, etag: str, last_modify_time: float) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since for a GET request.
+    If-None-Match takes precedence, If-Modified-Since is only considered when it is absent.
+    """
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # weak comparison
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag.removeprefix("W/") in candidates
+
+    if_modified_since = headers.get("If-Modified-Since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have a one second resolution
+        return int(last_modify_time) <= since
+
+    return False
+
+
+def not_modified_response(validator_headers: dict[str, str]) -> Response:
+    """304 response repeating the validators and caching headers of the full response."""
+    return Response(status_code=304, headers=validator_headers)
+
+
+# ============================================================
+# Content negotiation (RFC 9110 §12.5.1)
+# ============================================================
+
+def accepts_media_type(accept: str | None, media_type: str) -> bool:
+    """
+    Whether an Accept header lists `media_type` itself with a non-zero quality, e.g. `image/webp;q=0` refuses it.
+    Wildcard ranges are not enough: `*/*` never proves that a client can decode a newer format.
+    """
+    if not accept:
+        return False
+    for media_range in accept.split(","):
+        name, *params = [part.strip() for part in media_range.split(";")]
+        if name.lower() != media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        return quality > 0
+    return False
@@ -0,0 +1,160 @@
+import asyncio
+from functools import lru_cache
+import os
+import time
+from typing import AsyncGenerator
+
+from fastapi.concurrency import run_in_threadpool
+from pymongo.errors import BulkWriteError
+
+from src.config import get_settings
+from src.db.models.Video_model import LibraryScanModel, VideoModel
+from src.logger import get_logger
+from src.resolvers.media_worker import MediaPriority, get_media_worker
+from src.resolvers.resolver_utils import resolver_utils
+
+logger = get_logger("library_scanner")
+
+
+class LibraryScanner:
+    """
+    Background scan of the whole library, so that search sees videos whose folder was never browsed.
+
+    Every resource root is walked depth first, `batch_size` video files at a time: the files missing
+    from the database are probed (container header first, ffprobe bounded by the process limiter)
+    and inserted with one bulk write, then the walk stack is checkpointed in the `library_scans`
+    collection once every directory listed so far is written. A scan stopped by a restart or a failure
+    resumes from its last checkpoint: only the directories listed since then are walked again.
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self._task: asyncio.Task | None = None
+        self._scan: LibraryScanModel | None = None
+        self._changed = asyncio.Event()
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, restart: bool = False) -> LibraryScanModel:
+        """
+        Start the scan in the background, or return the running one.
+        An unfinished scan (running when the app stopped, or failed) is resumed unless `restart` is set.
+        """
+        if self.is_running:
+            return self._scan
+        scan = await LibraryScanModel.find_one() or LibraryScanModel()
+        if restart or scan.status not in ("Running", "Failed"):
+            utils = resolver_utils()
+            roots = [utils.to_host_path(utils.get_absolute_root_resource_path(name)) for name in get_settings().resource_paths]
+            scan.pendingDirectories = list(reversed(roots))
+            scan.videosSeen = scan.videosAdded = 0
+            scan.startedAt = time.time()
+        scan.status = "Running"
+        scan.finishedAt = None
+        scan.error = None
+        await scan.save()
+        self._scan = scan
+        self._task = asyncio.create_task(self._run(scan))
+        logger.info(f"Library scan started, {len(scan.pendingDirectories)} directories pending")
+        return scan
+
+    async def resume(self) -> None:
+        """Resume a scan interrupted by a restart, at startup."""
+        if await LibraryScanModel.find_one({"status": "Running"}) is not None:
+            await self.start()
+
+    async def stop(self) -> None:
+        """Cancel the scan, its checkpoint stays Running so that it is resumed at the next startup."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def get_scan(self) -> LibraryScanModel:
+        if self._scan is not None:
+            return self._scan
+        return await LibraryScanModel.find_one() or LibraryScanModel()
+
+    async def watch(self) -> AsyncGenerator[LibraryScanModel, None]:
+        """The scan as it is now, then after every checkpoint until it is over."""
+        while True:
+            changed = self._changed
+            yield (await self.get_scan()).model_copy(deep=True)
+            if not self.is_running:
+                return
+            await changed.wait()
+
+    def stats(self) -> dict:
+        scan = self._scan
+        return {
+            "running": self.is_running,
+            "pendingDirectories": len(scan.pendingDirectories) if scan else 0,
+            "videosSeen": scan.videosSeen if scan else 0,
+            "videosAdded": scan.videosAdded if scan else 0,
+        }
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _run(self, scan: LibraryScanModel) -> None:
+        utils = resolver_utils()
+        # the walk stack is kept in mounted paths, checkpointed in host paths like every other path in the database
+        pending_directories = [utils.to_mounted_path(path) for path in scan.pendingDirectories]
+        try:
+            while pending_directories:
+                entries = await run_in_threadpool(utils.walk_video_entries, pending_directories, self.batch_size)
+                # a single large directory overshoots the batch size: probe and write it batch by batch
+                for start in range(0, len(entries), self.batch_size):
+                    await self._insert_missing_videos(scan, entries[start:start + self.batch_size])
+                    self._notify()
+
+                # every directory popped from the stack has been listed and its videos written
+                scan.pendingDirectories = [utils.to_host_path(path) for path in pending_directories]
+                await scan.save()
+                self._notify()
+            scan.status = "Done"
+            scan.finishedAt = time.time()
+            logger.info(f"Library scan done, {scan.videosSeen} videos seen, {scan.videosAdded} added")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Library scan failed: {e}")
+            scan.status = "Failed"
+            scan.error = str(e)
+        await scan.save()
+        self._notify()
+
+    async def _insert_missing_videos(self, scan: LibraryScanModel, entries: list[os.DirEntry[str]]) -> None:
+        """Probe and insert, with one lookup and one bulk write, the walked videos that are not in the database."""
+        if not entries:
+            return
+        utils = resolver_utils()
+        collection = VideoModel.get_pymongo_collection()
+        paths = [utils.to_host_path(entry.path) for entry in entries]
+        existing_paths = {doc["path"] async for doc in collection.find({"path": {"$in": paths}}, {"path": 1})}
+        new_entries = [entry for entry, path in zip(entries, paths) if path not in existing_paths]
+        scan.videosSeen += len(entries)
+        if not new_entries:
+            return
+
+        operations = await asyncio.gather(*[
+            utils.process_new_video_entry(entry=entry, author=None, tagsOperation=None, update_tags={})
+            for entry in new_entries
+        ])
+        try:
+            result = await collection.bulk_write(operations, ordered=False)
+            inserted_ids = [str(_id) for _id in result.upserted_ids.values()]
+        except BulkWriteError as bwe:
+            logger.error(f"Bulk write error during library scan: {bwe.details}")
+            inserted_ids = [str(upsert["_id"]) for upsert in bwe.details.get("upserted", [])]
+        scan.videosAdded += len(inserted_ids)
+        # thumbnails, and the technical metadata a header read leaves out
+        get_media_worker().enqueue(inserted_ids, MediaPriority.BACKFILL)
+
+
+@lru_cache
+def get_library_scanner() -> LibraryScanner:
+    return LibraryScanner(batch_size=get_settings().library_scan.batch_size)
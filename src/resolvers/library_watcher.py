@@ -0,0 +1,511 @@
+import asyncio
+from functools import lru_cache
+import os
+import re
+from typing import Callable, Literal, NamedTuple
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from pymongo import DeleteOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from src.config import get_settings
+from src.db.models.Video_model import DirectoryModel, VideoModel
+from src.logger import get_logger
+from src.resolvers.inotify import (
+    IN_CLOSE_WRITE, IN_CREATE, IN_DELETE, IN_DELETE_SELF, IN_IGNORED, IN_MOVED_FROM, IN_MOVED_TO, IN_ONLYDIR,
+    IN_Q_OVERFLOW, Inotify, inotify_available, is_network_file_system,
+)
+from src.resolvers.media_worker import MediaPriority, get_media_worker
+from src.resolvers.resolver_utils import resolver_utils
+from src.resolvers.video_metadata_cache import get_video_metadata_cache
+
+logger = get_logger("library_watcher")
+
+
+class FileChange(BaseModel):
+    """A change reported by a watch backend, only a hint of where to look: the batch compares disk and database."""
+    kind: Literal["created", "deleted", "modified"]
+    path: str  # absolute (mounted) path, standard format
+    isDir: bool = False
+
+
+class _DiskFile(NamedTuple):
+    size: float
+    lastModifyTime: float
+
+
+class _DirectoryState(NamedTuple):
+    mtime_ns: int
+    videos: frozenset[str]
+    sub_directories: frozenset[str]
+
+
+class _InotifyWatch:
+    """
+    Recursive inotify watch of one resource root: one watch per directory, new directories are watched
+    as they appear. A queue overflow is reported as a change of the whole root.
+    """
+
+    MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE | IN_DELETE_SELF | IN_ONLYDIR
+
+    def __init__(self, root: str, notify: Callable[[FileChange], None]):
+        self.root = root
+        self._notify = notify
+        self._inotify = Inotify()
+        self._directories: dict[int, str] = {}  # watch descriptor -> directory path
+        self._new_trees: set[asyncio.Task] = set()
+
+    async def watch_tree(self, path: str) -> None:
+        """
+        Watch a directory and all its sub directories. The tree is walked in a worker thread,
+        the watch table is only updated on the event loop.
+
+        Raises:
+            OSError: ENOSPC once the `fs.inotify.max_user_watches` limit is reached
+        """
+        self._directories.update(await run_in_threadpool(self._add_watches, path))
+
+    def _add_watches(self, path: str) -> dict[int, str]:
+        """Blocking, add a watch on every directory of a tree."""
+        directories: dict[int, str] = {}
+        for directory, _, _ in os.walk(path):
+            try:
+                directories[self._inotify.add_watch(directory, self.MASK)] = resolver_utils().get_path_standard_format(directory)
+            except FileNotFoundError:
+                continue
+        return directories
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        loop.add_reader(self._inotify.fd, self._on_readable)
+
+    def close(self, loop: asyncio.AbstractEventLoop) -> None:
+        loop.remove_reader(self._inotify.fd)
+        for task in self._new_trees:
+            task.cancel()
+        self._inotify.close()
+
+    def _on_readable(self) -> None:
+        utils = resolver_utils()
+        for event in self._inotify.read_events():
+            if event.mask & IN_Q_OVERFLOW:
+                logger.warning(f"inotify queue overflow on {self.root}, the whole resource path is checked")
+                self._notify(FileChange(kind="modified", path=self.root, isDir=True))
+                continue
+            if event.mask & IN_IGNORED:
+                self._directories.pop(event.wd, None)
+                continue
+            directory = self._directories.get(event.wd)
+            if directory is None or not event.name:
+                continue
+            path = utils.get_path_standard_format(os.path.join(directory, event.name))
+
+            if event.mask & (IN_CREATE | IN_MOVED_TO):
+                kind = "created"
+            elif event.mask & (IN_DELETE | IN_MOVED_FROM):
+                kind = "deleted"
+            else:
+                kind = "modified"
+
+            if event.is_dir:
+                if kind == "created":
+                    # a directory moved in can be a large tree: it is walked off the loop,
+                    # and reported once watched so that the batch lists it after the watches are in place
+                    task = asyncio.create_task(self._watch_new_tree(path))
+                    self._new_trees.add(task)
+                    task.add_done_callback(self._new_trees.discard)
+                    continue
+                if event.mask & IN_MOVED_FROM:
+                    self._unwatch_tree(path)
+                self._notify(FileChange(kind=kind, path=path, isDir=True))
+            elif utils.is_video_file(event.name):
+                self._notify(FileChange(kind=kind, path=path))
+
+    async def _watch_new_tree(self, path: str) -> None:
+        try:
+            await self.watch_tree(path)
+        except OSError as e:
+            logger.warning(f"Cannot watch new directory {path}: {e}")
+        # files created before the watch is in place are found when the batch lists the directory
+        self._notify(FileChange(kind="created", path=path, isDir=True))
+
+    def _unwatch_tree(self, path: str) -> None:
+        """Watches follow a moved directory, its new location is watched again from its MOVED_TO event."""
+        prefix = path.rstrip("/") + "/"
+        for wd, directory in list(self._directories.items()):
+            if directory == path or directory.startswith(prefix):
+                self._inotify.remove_watch(wd)
+                del self._directories[wd]
+
+
+class _PollingWatch:
+    """
+    Periodic comparison with a snapshot of one resource root, for network mounts where inotify never
+    sees changes made by other hosts. Every directory is stat-ed on each pass but only the ones whose
+    modification time changed are listed again. Files rewritten in place are not detected.
+    """
+
+    def __init__(self, root: str, interval: float, notify: Callable[[FileChange], None]):
+        self.root = root
+        self.interval = interval
+        self._notify = notify
+        self._snapshot: dict[str, _DirectoryState] = {}
+
+    async def run(self) -> None:
+        await run_in_threadpool(self.snapshot_tree, self.root)
+        while True:
+            await asyncio.sleep(self.interval)
+            for change in await run_in_threadpool(self.poll):
+                self._notify(change)
+
+    def snapshot_tree(self, path: str) -> None:
+        """Blocking, record the state of a directory and of all its sub directories."""
+        pending_directories = [path]
+        while pending_directories:
+            directory = pending_directories.pop()
+            state = self._read_directory(directory)
+            if state is None:
+                continue
+            self._snapshot[directory] = state
+            pending_directories.extend(f"{directory.rstrip('/')}/{name}" for name in state.sub_directories)
+
+    def poll(self) -> list[FileChange]:
+        """Blocking, the changes since the previous pass."""
+        changes: list[FileChange] = []
+        for path in list(self._snapshot):
+            previous = self._snapshot.get(path)
+            if previous is None:
+                continue  # removed with its parent during this pass
+            try:
+                if os.stat(path).st_mtime_ns == previous.mtime_ns:
+                    continue
+            except OSError:
+                continue  # reported by its parent
+            current = self._read_directory(path)
+            if current is None:
+                continue
+            self._snapshot[path] = current
+
+            prefix = path.rstrip("/") + "/"
+            for name in current.videos - previous.videos:
+                changes.append(FileChange(kind="created", path=prefix + name))
+            for name in previous.videos - current.videos:
+                changes.append(FileChange(kind="deleted", path=prefix + name))
+            for name in current.sub_directories - previous.sub_directories:
+                self.snapshot_tree(prefix + name)
+                changes.append(FileChange(kind="created", path=prefix + name, isDir=True))
+            for name in previous.sub_directories - current.sub_directories:
+                self._forget_tree(prefix + name)
+                changes.append(FileChange(kind="deleted", path=prefix + name, isDir=True))
+        return changes
+
+    def _read_directory(self, path: str) -> _DirectoryState | None:
+        utils = resolver_utils()
+        videos, sub_directories = [], []
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            sub_directories.append(entry.name)
+                        elif entry.is_file() and utils.is_video_file(entry.name):
+                            videos.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.error(f"Error accessing directory {path} to poll changes: {e}")
+            return None
+        return _DirectoryState(mtime_ns, frozenset(videos), frozenset(sub_directories))
+
+    def _forget_tree(self, path: str) -> None:
+        prefix = path.rstrip("/") + "/"
+        for directory in [directory for directory in self._snapshot if directory == path or directory.startswith(prefix)]:
+            del self._snapshot[directory]
+
+
+class LibraryWatcher:
+    """
+    Keeps VideoModel and the directory index in sync with file changes made outside of the app.
+
+    Every resource path is watched with inotify, or polled when it is a network mount (inotify only sees
+    local changes), when inotify is unavailable or when its watch limit is reached. Changes are debounced
+    into batches: a batch compares the files on disk with the videos in the database under the changed
+    paths, so the order of the events does not matter. A video deleted and a video created with the same
+    size and modification time in one batch is a move, its document keeps its tags, views and metadata.
+    """
+
+    def __init__(self, mode: str, poll_interval: float, debounce: float, max_delay: float):
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._pending: dict[str, FileChange] = {}
+        self._wakeup = asyncio.Event()
+        self._inotify_watches: list[_InotifyWatch] = []
+        self._tasks: list[asyncio.Task] = []
+        self.backends: dict[str, str] = {}  # resource root -> "inotify" or "polling"
+        self.batches = 0
+        self.created = 0
+        self.deleted = 0
+        self.moved = 0
+        self.modified = 0
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        utils = resolver_utils()
+        loop = asyncio.get_running_loop()
+        for name in get_settings().resource_paths:
+            root = utils.get_absolute_root_resource_path(name)
+            if not os.path.isdir(root):
+                logger.warning(f"Resource path {root} is not a directory, it is not watched")
+                continue
+            if await self._start_inotify(root, loop):
+                self.backends[root] = "inotify"
+            else:
+                self.backends[root] = "polling"
+                self._tasks.append(asyncio.create_task(_PollingWatch(root, self.poll_interval, self.notify).run()))
+        self._tasks.append(asyncio.create_task(self._apply_loop()))
+        logger.info(f"Library watcher started: {self.backends}")
+
+    async def stop(self) -> None:
+        loop = asyncio.get_running_loop()
+        for watch in self._inotify_watches:
+            watch.close(loop)
+        self._inotify_watches = []
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Library watcher stopped")
+
+    async def _start_inotify(self, root: str, loop: asyncio.AbstractEventLoop) -> bool:
+        if self.mode == "polling" or not inotify_available():
+            return False
+        if self.mode == "auto" and await run_in_threadpool(is_network_file_system, root):
+            return False
+        try:
+            watch = _InotifyWatch(root, self.notify)
+        except OSError as e:
+            logger.warning(f"inotify unavailable for {root}, falling back to polling: {e}")
+            return False
+        try:
+            await watch.watch_tree(root)
+        except OSError as e:
+            watch.close(loop)
+            logger.warning(f"Cannot watch every directory of {root} with inotify, falling back to polling: {e}")
+            return False
+        watch.start(loop)
+        self._inotify_watches.append(watch)
+        return True
+
+    def notify(self, change: FileChange) -> None:
+        """Queue a change for the next batch, the latest change of a path wins."""
+        self._pending[change.path] = change
+        self._wakeup.set()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.is_running,
+            "backends": self.backends,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "created": self.created,
+            "deleted": self.deleted,
+            "moved": self.moved,
+            "modified": self.modified,
+        }
+
+    async def _apply_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            first_change = loop.time()
+            # wait for a quiet period, a copy of many files is applied in a single batch
+            while loop.time() - first_change < self.max_delay:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.debounce)
+                except asyncio.TimeoutError:
+                    break
+            self._wakeup.clear()
+            changes = list(self._pending.values())
+            self._pending.clear()
+            try:
+                await self.apply_changes(changes)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error applying {len(changes)} file changes: {e}")
+
+    async def apply_changes(self, changes: list[FileChange]) -> None:
+        """
+        Bring the videos under the changed paths in line with the disk, then refresh the aggregates
+        of the directories around them.
+
+        :param changes: Changes of one batch, at most one per path
+        """
+        if not changes:
+            return
+        utils = resolver_utils()
+        changed_files = [change.path for change in changes if not change.isDir]
+        changed_directories = [change.path for change in changes if change.isDir]
+
+        on_disk: dict[str, _DiskFile] = await run_in_threadpool(self._read_disk, changed_files, changed_directories)
+        scope_filters: list[dict] = []
+        if changed_files:
+            scope_filters.append({"path": {"$in": [utils.to_host_path(path) for path in changed_files]}})
+        for directory in changed_directories:
+            scope_filters.append({"path": {"$regex": "^" + re.escape(utils.to_host_path(directory).rstrip("/") + "/")}})
+        in_database: dict[str, dict] = {
+            doc["path"]: doc async for doc in VideoModel.get_pymongo_collection().find(
+                {"$or": scope_filters},
+                {"_id": 1, "path": 1, "size": 1, "lastModifyTime": 1, "tags": 1}
+            )
+        }
+
+        created = {host_path: file for path, file in on_disk.items() if (host_path := utils.to_host_path(path)) not in in_database}
+        deleted = {host_path: doc for host_path, doc in in_database.items() if utils.to_mounted_path(host_path) not in on_disk}
+        modified = {
+            host_path: file for path, file in on_disk.items()
+            if (host_path := utils.to_host_path(path)) in in_database
+            and (in_database[host_path]["size"], in_database[host_path]["lastModifyTime"]) != (file.size, file.lastModifyTime)
+        }
+        moved = self._pair_moves(created, deleted)
+
+        operations: list[UpdateOne | DeleteOne] = []
+        for old_path, new_path in moved.items():
+            operations.append(UpdateOne(
+                {"_id": deleted[old_path]["_id"]},
+                {"$set": {"path": new_path, "name": os.path.basename(new_path)}}
+            ))
+        for host_path, file in modified.items():
+            # new content: thumbnail frame and technical metadata are probed again by the media worker
+            operations.append(UpdateOne(
+                {"_id": in_database[host_path]["_id"]},
+                {"$set": {
+                    "size": file.size, "lastModifyTime": file.lastModifyTime,
+                    "thumbnailTimestamp": None, "duration": 0.0, "mediaFailures": 0,
+                }}
+            ))
+        for host_path, doc in deleted.items():
+            if host_path not in moved:
+                operations.append(DeleteOne({"_id": doc["_id"]}))
+        new_files = [host_path for host_path in created if host_path not in moved.values()]
+        first_insert = len(operations)
+        for host_path in new_files:
+            file = created[host_path]
+            operations.append(UpdateOne(
+                {"path": host_path},
+                {"$setOnInsert": VideoModel(
+                    path=host_path,
+                    name=os.path.basename(host_path),
+                    isDir=False,
+                    lastModifyTime=file.lastModifyTime,
+                    size=file.size,
+                    tags=[]
+                ).model_dump()},
+                upsert=True
+            ))
+
+        updated_ids = [str(deleted[old_path]["_id"]) for old_path in moved] + [str(in_database[path]["_id"]) for path in modified]
+        if operations:
+            try:
+                result = await VideoModel.get_pymongo_collection().bulk_write(operations, ordered=False)
+                updated_ids += [str(_id) for index, _id in result.upserted_ids.items() if index >= first_insert]
+            except BulkWriteError as bwe:
+                logger.error(f"Bulk write error while applying file changes: {bwe.details}")
+
+        removed = [doc for host_path, doc in deleted.items() if host_path not in moved]
+        if removed:
+            update_tags: dict[str, tuple[int, bool]] = {}
+            for doc in removed:
+                utils.track_tag_change(update_tags, set(doc.get("tags") or []), False)
+            await utils.update_tag_counts(update_tags)
+
+        get_video_metadata_cache().invalidate(*updated_ids, *[str(doc["_id"]) for doc in removed])
+        get_media_worker().enqueue(updated_ids, MediaPriority.IMPORTED)
+        await self._refresh_directories(changed_files, changed_directories)
+
+        self.batches += 1
+        self.created += len(new_files)
+        self.deleted += len(removed)
+        self.moved += len(moved)
+        self.modified += len(modified)
+        logger.info(
+            f"Applied {len(changes)} file changes: {len(new_files)} created, {len(removed)} deleted, "
+            f"{len(moved)} moved, {len(modified)} modified"
+        )
+
+    def _pair_moves(self, created: dict[str, _DiskFile], deleted: dict[str, dict]) -> dict[str, str]:
+        """Old path -> new path of the deleted and created videos sharing a size and modification time, unambiguous ones only."""
+        created_by_identity: dict[tuple[float, float], list[str]] = {}
+        for host_path, file in created.items():
+            created_by_identity.setdefault((file.size, file.lastModifyTime), []).append(host_path)
+        deleted_by_identity: dict[tuple[float, float], list[str]] = {}
+        for host_path, doc in deleted.items():
+            deleted_by_identity.setdefault((doc["size"], doc["lastModifyTime"]), []).append(host_path)
+        return {
+            old_paths[0]: created_by_identity[identity][0]
+            for identity, old_paths in deleted_by_identity.items()
+            if len(old_paths) == 1 and len(created_by_identity.get(identity, [])) == 1
+        }
+
+    def _read_disk(self, files: list[str], directories: list[str]) -> dict[str, _DiskFile]:
+        """Blocking, the video files currently on disk among the changed paths, by mounted path."""
+        utils = resolver_utils()
+        on_disk: dict[str, _DiskFile] = {}
+        for path in files:
+            try:
+                stat = os.stat(path)
+                on_disk[path] = _DiskFile(float(stat.st_size), stat.st_mtime)
+            except OSError:
+                continue
+        for directory in directories:
+            for entry in utils.get_all_video_entries_in_directory(directory) if os.path.isdir(directory) else []:
+                try:
+                    stat = entry.stat()
+                    on_disk[utils.get_path_standard_format(entry.path)] = _DiskFile(float(stat.st_size), stat.st_mtime)
+                except OSError:
+                    continue
+        return on_disk
+
+    async def _refresh_directories(self, changed_files: list[str], changed_directories: list[str]) -> None:
+        """
+        Changed directories still on disk are rescanned if indexed, removed ones leave the index,
+        then every parent directory is recomputed shallowly, deepest first so that each one reads
+        up to date children.
+        """
+        utils = resolver_utils()
+        for directory in sorted(changed_directories, key=lambda path: path.count("/"), reverse=True):
+            if os.path.isdir(directory):
+                # a new directory is indexed by the refresh of its parent
+                if await DirectoryModel.find_one({"path": utils.to_host_path(directory)}) is not None:
+                    await utils.rebuild_directory_aggregates(directory)
+            else:
+                await utils.refresh_directory_aggregate(directory)
+
+        parents = {
+            utils.get_path_standard_format(os.path.dirname(path))
+            for path in changed_files + changed_directories
+            # a resource root has no parent in the index
+            if utils.get_parent_directory(utils.to_host_path(path)) is not None
+        }
+        for directory in sorted(parents, key=lambda path: path.count("/"), reverse=True):
+            await utils.refresh_directory_aggregate(directory)
+
+
+@lru_cache
+def get_library_watcher() -> LibraryWatcher:
+    watcher = get_settings().watcher
+    return LibraryWatcher(
+        mode=watcher.mode,
+        poll_interval=watcher.poll_interval,
+        debounce=watcher.debounce,
+        max_delay=watcher.max_delay,
+    )
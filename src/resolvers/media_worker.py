@@ -0,0 +1,389 @@
+import asyncio
+from enum import IntEnum
+from functools import lru_cache
+import itertools
+
+from bson import ObjectId
+from fastapi.concurrency import run_in_threadpool
+
+from src.config import get_settings
+from src.db.models.Video_model import VideoModel
+from src.logger import get_logger
+from src.resolvers.hover_preview import HoverPreviewSpec
+from src.resolvers.storyboard import StoryboardLayout
+from src.resolvers.thumbnail_rendition import list_renditions, rendition_key
+from src.resolvers.thumbnail_resolver import get_thumbnail_resolver, needs_probe, thumbnail_seek_target
+from src.resolvers.thumbnail_store import get_preview_store, get_thumbnail_store
+from src.resolvers.video_metadata_cache import get_video_metadata_cache
+
+logger = get_logger("media_worker")
+
+
+class MediaPriority(IntEnum):
+    """Lower value is served first."""
+    VIEWING = 0  # on the user's screen right now
+    STORYBOARD = 1  # seek preview sprite sheet of a video being played
+    IMPORTED = 2  # just added or updated by a batch operation
+    BACKFILL = 3  # library walk at startup
+    PREVIEW = 4  # hover preview clips, only when nothing else is waiting
+
+
+class MediaWorkerPool:
+    """
+    Background pool rendering thumbnails and probing technical metadata ahead of requests.
+
+    Video ids are consumed from a priority queue: the videos the user is looking at first,
+    then the storyboards of the videos being played, freshly imported videos, a full-library backfill,
+    and last the hover preview clips of the videos already processed. Results are persisted in the thumbnail store and on
+    VideoModel, so request paths only read them.
+    ffmpeg/ffprobe processes stay bounded by the adaptive process limiter.
+    """
+
+    def __init__(self, workers: int, backfill: bool, backfill_batch_size: int):
+        self.workers = workers
+        self.backfill = backfill
+        self.backfill_batch_size = backfill_batch_size
+        self._queue: asyncio.PriorityQueue[tuple[int, int, str]] = asyncio.PriorityQueue()
+        self._queued: dict[str, int] = {}  # video id -> best priority waiting in the queue
+        self._running: dict[str, asyncio.Future] = {}  # video id -> job currently processed or awaited
+        self._queued_previews: set[str] = set()
+        self._queued_storyboards: set[str] = set()
+        self._failed_storyboards: set[str] = set()  # store keys, the key changes with the file
+        self._backfill_pending: set[str] = set()  # video ids of the backfill page not processed yet
+        self._backfill_drained = asyncio.Event()
+        self._sequence = itertools.count()
+        self._tasks: list[asyncio.Task] = []
+        self.processed = 0
+        self.failed = 0
+        self.previews_rendered = 0
+        self.previews_failed = 0
+        self.storyboards_rendered = 0
+        self.storyboards_failed = 0
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.backfill:
+            self._tasks.append(asyncio.create_task(self._backfill()))
+        logger.info(f"Media worker pool started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Media worker pool stopped")
+
+    def enqueue(self, video_ids: list[str], priority: MediaPriority) -> None:
+        """Queue videos for pre-generation, an id already queued is only moved to a better priority."""
+        for video_id in video_ids:
+            video_id = str(video_id)
+            queued_priority = self._queued.get(video_id)
+            if queued_priority is not None and queued_priority <= priority:
+                continue
+            self._queued[video_id] = priority
+            self._queue.put_nowait((priority, next(self._sequence), video_id))
+
+    def enqueue_previews(self, video_ids: list[str]) -> None:
+        """Queue hover preview clips behind every other job."""
+        if not get_settings().preview.enabled:
+            return
+        for video_id in video_ids:
+            video_id = str(video_id)
+            if video_id in self._queued_previews:
+                continue
+            self._queued_previews.add(video_id)
+            self._queue.put_nowait((MediaPriority.PREVIEW, next(self._sequence), video_id))
+
+    def enqueue_storyboards(self, video_ids: list[str]) -> None:
+        """Queue seek preview sprite sheets right behind the thumbnails on screen."""
+        for video_id in video_ids:
+            video_id = str(video_id)
+            if video_id in self._queued_storyboards:
+                continue
+            self._queued_storyboards.add(video_id)
+            self._queue.put_nowait((MediaPriority.STORYBOARD, next(self._sequence), video_id))
+
+    def storyboard_failed(self, key: str) -> bool:
+        """True if rendering the sprite sheet stored under `key` already failed, it is not retried until restart."""
+        return key in self._failed_storyboards
+
+    async def wait_for(self, video_id: str, timeout: float) -> bool:
+        """
+        Put a video at the front of the queue and wait until its job is done.
+        Without running workers (e.g. outside the app lifespan) the job is processed inline.
+
+        :return: False if the job did not finish within `timeout` seconds
+        """
+        if not self.is_running:
+            await self.run_now(video_id)
+            return True
+
+        future = self._running.get(video_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._running[video_id] = future
+            self.enqueue([video_id], MediaPriority.VIEWING)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def run_now(self, video_id: str) -> None:
+        """
+        Process a video right away instead of waiting for a worker, joining its job if one is already running.
+        Used for batches, whose parallelism is then only bounded by the process limiter.
+        """
+        future = self._running.get(video_id)
+        if future is not None:
+            await asyncio.shield(future)
+            return
+        self._queued.pop(video_id, None)
+        await self._run_job(video_id)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.is_running,
+            "queued": len(self._queued),
+            "processed": self.processed,
+            "failed": self.failed,
+            "queuedPreviews": len(self._queued_previews),
+            "previewsRendered": self.previews_rendered,
+            "previewsFailed": self.previews_failed,
+            "queuedStoryboards": len(self._queued_storyboards),
+            "storyboardsRendered": self.storyboards_rendered,
+            "storyboardsFailed": self.storyboards_failed,
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            priority, _, video_id = await self._queue.get()
+            try:
+                if priority == MediaPriority.PREVIEW:
+                    self._queued_previews.discard(video_id)
+                    await self._run_preview_job(video_id)
+                    continue
+                if priority == MediaPriority.STORYBOARD:
+                    self._queued_storyboards.discard(video_id)
+                    await self._run_storyboard_job(video_id)
+                    continue
+                # skip entries superseded by a better priority that has already been served
+                if self._queued.get(video_id) != priority:
+                    continue
+                del self._queued[video_id]
+                await self._run_job(video_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, video_id: str) -> None:
+        future = self._running.get(video_id)
+        if future is None or future.done():
+            future = asyncio.get_running_loop().create_future()
+            self._running[video_id] = future
+        try:
+            await self.process(video_id)
+            self.processed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"Pre-generation failed for video {video_id}: {e}")
+            await self._record_failure(video_id)
+        finally:
+            if self._running.get(video_id) is future:
+                del self._running[video_id]
+            if not future.done():
+                future.set_result(None)
+            if video_id in self._backfill_pending:
+                self._backfill_pending.discard(video_id)
+                if not self._backfill_pending:
+                    self._backfill_drained.set()
+
+    async def _record_failure(self, video_id: str) -> None:
+        """Count the failed attempt on the video, so that requests and the backfill stop retrying it."""
+        if not ObjectId.is_valid(video_id):
+            return
+        try:
+            await VideoModel.get_pymongo_collection().update_one(
+                {"_id": ObjectId(video_id)},
+                {"$inc": {"mediaFailures": 1}}
+            )
+        except Exception as e:
+            logger.warning(f"Could not record the failed pre-generation of video {video_id}: {e}")
+        get_video_metadata_cache().invalidate(video_id)
+
+    async def _run_preview_job(self, video_id: str) -> None:
+        try:
+            if await self.process_preview(video_id):
+                self.previews_rendered += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.previews_failed += 1
+            logger.warning(f"Hover preview failed for video {video_id}: {e}")
+
+    async def _run_storyboard_job(self, video_id: str) -> None:
+        try:
+            if await self.process_storyboard(video_id):
+                self.storyboards_rendered += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.storyboards_failed += 1
+            logger.warning(f"Storyboard failed for video {video_id}: {e}")
+
+    async def process(self, video_id: str) -> None:
+        """
+        Probe the metadata of one video and render its thumbnail renditions if they are missing, then persist them.
+        In representative mode the thumbnail frame is chosen once and persisted with them.
+        """
+        video = await get_video_metadata_cache().get(video_id)
+        if video is None or video.fileSize < 0:
+            return
+
+        thumbnail_store = get_thumbnail_store()
+        thumbnail_resolver = get_thumbnail_resolver()
+        update_query = {}
+
+        # probed first, the thumbnail position depends on the duration
+        duration = video.duration
+        if needs_probe(video.duration, video.container):
+            probe_result = await thumbnail_resolver.probe_video(video.mountedPath)
+            if probe_result is not None:
+                update_query.update(probe_result.to_update_query())
+                duration = probe_result.duration or duration
+
+        renditions = {rendition.tag: rendition for rendition in list_renditions()}
+        keys = {
+            tag: rendition_key(video.path, video.lastModifyTime, video.size, rendition)
+            for tag, rendition in renditions.items()
+        }
+        missing = [
+            rendition for tag, rendition in renditions.items()
+            if not await run_in_threadpool(thumbnail_store.contains, keys[tag], rendition.extension)
+        ]
+        if missing:
+            timestamp = video.thumbnailTimestamp
+            if timestamp is None and duration > 0 \
+                    and get_settings().thumbnail_cache.frame_selection == "representative":
+                timestamp = await thumbnail_resolver.select_representative_frame(video.mountedPath, duration)
+                if timestamp is not None:
+                    update_query["thumbnailTimestamp"] = timestamp
+            # every missing size and format from one decoded frame
+            images = await thumbnail_resolver.generate_thumbnail(video.mountedPath, missing, duration, timestamp)
+            for tag, image in images.items():
+                await run_in_threadpool(thumbnail_store.write, keys[tag], image, renditions[tag].extension)
+
+        key = thumbnail_store.make_key(video.path, video.lastModifyTime, video.size)
+        if video.thumbnail != key:
+            update_query["thumbnail"] = key
+        if video.mediaFailures:
+            update_query["mediaFailures"] = 0
+        if update_query:
+            await VideoModel.get_pymongo_collection().update_one(
+                {"_id": ObjectId(video.videoId)},
+                {"$set": update_query}
+            )
+            get_video_metadata_cache().invalidate(video.videoId)
+        self.enqueue_previews([video.videoId])
+
+    async def process_preview(self, video_id: str) -> bool:
+        """
+        Render the hover preview clip of one video if it is missing. Needs the probed duration.
+
+        :return: True if a clip was rendered
+        """
+        video = await get_video_metadata_cache().get(video_id)
+        if video is None or video.fileSize < 0 or video.duration <= 0:
+            return False
+
+        # the clip starts on the thumbnail frame
+        start = video.thumbnailTimestamp if video.thumbnailTimestamp is not None else thumbnail_seek_target(video.duration)
+        spec = HoverPreviewSpec.for_video(video.duration, start, get_settings().preview)
+        key = spec.store_key(video.path, video.lastModifyTime, video.size)
+        preview_store = get_preview_store()
+        if await run_in_threadpool(preview_store.contains, key, spec.extension):
+            return False
+        clip = await get_thumbnail_resolver().generate_preview(video.mountedPath, spec)
+        await run_in_threadpool(preview_store.write, key, clip, spec.extension)
+        return True
+
+    async def process_storyboard(self, video_id: str) -> bool:
+        """
+        Render the storyboard sprite sheet of one video if it is missing. Needs the probed duration.
+        A failed render is remembered, so that requests answer an error instead of queueing it again.
+
+        :return: True if a sprite sheet was rendered
+        """
+        video = await get_video_metadata_cache().get(video_id)
+        if video is None or video.fileSize < 0 or video.duration <= 0:
+            return False
+
+        storyboard_config = get_settings().storyboard
+        key = StoryboardLayout.store_key(video.path, video.lastModifyTime, video.size, storyboard_config)
+        thumbnail_store = get_thumbnail_store()
+        if key in self._failed_storyboards or await run_in_threadpool(thumbnail_store.contains, key):
+            return False
+        layout = StoryboardLayout.for_duration(video.duration, storyboard_config)
+        try:
+            sprite = await get_thumbnail_resolver().generate_storyboard(video.mountedPath, layout)
+        except Exception:
+            self._failed_storyboards.add(key)
+            raise
+        await run_in_threadpool(thumbnail_store.write, key, sprite)
+        return True
+
+    async def _backfill(self) -> None:
+        """
+        Walk the library by _id and queue every video still missing its thumbnail or metadata,
+        except the ones whose pre-generation already failed `max_attempts` times.
+        """
+        missing_filter = {
+            "isDir": False,
+            "mediaFailures": {"$not": {"$gte": get_settings().media_worker.max_attempts}},
+            "$or": [
+                {"thumbnail": None},
+                {"duration": {"$in": [None, 0.0]}},
+                {"container": None},
+            ],
+        }
+        last_id = None
+        total = 0
+        try:
+            while True:
+                page_filter = missing_filter if last_id is None else {**missing_filter, "_id": {"$gt": last_id}}
+                docs = await VideoModel.get_pymongo_collection().find(page_filter, {"_id": 1}) \
+                    .sort("_id", 1).limit(self.backfill_batch_size).to_list(None)
+                if not docs:
+                    break
+                last_id = docs[-1]["_id"]
+                total += len(docs)
+                video_ids = [str(doc["_id"]) for doc in docs]
+                self._backfill_pending = set(video_ids)
+                self._backfill_drained.clear()
+                self.enqueue(video_ids, MediaPriority.BACKFILL)
+                # keep the queue short so videos on screen never wait behind the whole library,
+                # only this page is awaited: the preview clips it queues are rendered while the next page runs
+                await self._backfill_drained.wait()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Library backfill stopped: {e}")
+            return
+        logger.info(f"Library backfill done, {total} videos queued")
+
+
+@lru_cache
+def get_media_worker() -> MediaWorkerPool:
+    media_worker = get_settings().media_worker
+    return MediaWorkerPool(
+        workers=media_worker.workers,
+        backfill=media_worker.backfill,
+        backfill_batch_size=media_worker.backfill_batch_size,
+    )
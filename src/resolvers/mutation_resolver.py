@@ -4,8 +4,11 @@ from bson import ObjectId
 import time
 
 from src.logger import get_logger
+from src.resolvers.library_scanner import get_library_scanner
 from src.resolvers.resolver_utils import resolver_utils
+from src.resolvers.video_metadata_cache import get_video_metadata_cache
 from src.schema.types.fileBrowse_type import VideoMutationResult
+from src.schema.types.library_scan_type import LibraryScanStatus
 
 from src.schema.types.video_type import UpdateVideoMetadataInput, Video
 from src.db.models.Video_model import VideoModel
@@ -58,6 +61,7 @@ class MutationResolver:
                 video_model.tags = validated_input.tags
 
                 await video_model.save()
+                get_video_metadata_cache().invalidate(str(video_model.id))
                 await resolver_utils().update_tag_counts(update_tags=update_tags)
 
                 updated_video = await Video.from_mongoDB(video_model)
@@ -120,7 +124,9 @@ class MutationResolver:
             video_path = video_model.path
 
             await video_model.delete()
+            get_video_metadata_cache().invalidate(str(videoId))
             await resolver_utils().update_tag_counts(update_tags={tag: (1, False) for tag in old_tags})
+            await resolver_utils().update_directory_aggregates([(video_path, -video_model.size, -1, 0.0)])
 
             os.remove(resolver_utils().to_mounted_path(video_path))
             logger.info(f"Deleted video file at path: {video_path}")
@@ -132,4 +138,21 @@ class MutationResolver:
             raise
         except Exception as e:
             logger.error(f"Database operation error during delete video: {e}")
-            raise DatabaseOperationError("delete_video", f"videoId-{videoId}")
\ No newline at end of file
+            raise DatabaseOperationError("delete_video", f"videoId-{videoId}")
+
+    async def resolve_start_library_scan(self, restart: bool = False) -> LibraryScanStatus:
+        """
+        Resolve function to start the background scan of the whole library, its progress is
+        reported by the `libraryScanProgress` subscription.
+
+        :param restart: Start over instead of resuming an unfinished scan
+        :type restart: bool
+        :return: Status of the scan, already running or just started
+        :rtype: LibraryScanStatus
+        """
+        try:
+            scan = await get_library_scanner().start(restart)
+        except Exception as e:
+            logger.error(f"Database operation error during start library scan: {e}")
+            raise DatabaseOperationError("start_library_scan", f"restart-{restart}")
+        return LibraryScanStatus.from_mongoDB(scan)
@@ -0,0 +1,207 @@
+import asyncio
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import os
+import time
+
+from src.config import get_settings
+from src.logger import get_logger
+
+logger = get_logger("process_limiter")
+
+
+class _LatencyStats:
+    """
+    Fast EWMA of the process latency of one kind of job, against a slow EWMA baseline.
+
+    Jobs of one kind vary a lot (a short clip vs a 4K file on a network mount), so the baseline
+    follows the typical latency rather than the best one ever seen. It starts as the plain mean
+    of the first samples, and the ratio is neutral until `WARMUP` samples were recorded.
+    """
+    WARMUP = 10
+    FAST_WEIGHT = 0.2
+    SLOW_WEIGHT = 0.02  # a permanently slower library (e.g. network mount) becomes the new normal in a few dozen jobs
+
+    def __init__(self):
+        self.ewma: float | None = None
+        self.baseline: float | None = None
+        self.samples = 0
+
+    def record(self, latency: float) -> None:
+        self.samples += 1
+        if self.ewma is None:
+            self.ewma = self.baseline = latency
+            return
+        self.ewma += (latency - self.ewma) * self.FAST_WEIGHT
+        self.baseline += (latency - self.baseline) * (1 / self.samples if self.samples <= self.WARMUP else self.SLOW_WEIGHT)
+
+    @property
+    def ratio(self) -> float:
+        if self.samples < self.WARMUP or not self.ewma or not self.baseline:
+            return 1.0
+        return self.ewma / self.baseline
+
+
+class AdaptiveProcessLimiter:
+    """
+    Concurrency limit for ffmpeg/ffprobe processes that adapts to the machine.
+
+    After each process the limit is re-evaluated (at most once per `adjust_interval` seconds):
+    - it shrinks multiplicatively when latency inflates beyond `latency_ratio` times its baseline,
+      or when the load average per CPU exceeds `max_load_per_cpu`;
+    - it grows by one while jobs are queued and latency stays close to its baseline;
+    - jobs never run beyond `max_limit` minus one slot per `streams_per_slot` active video streams,
+      so playback keeps its share of the disk. This ceiling applies as soon as a stream starts or ends.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        latency_ratio: float,
+        max_load_per_cpu: float,
+        streams_per_slot: int,
+        adjust_interval: float,
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(initial_limit, self.min_limit), self.max_limit)
+        self.latency_ratio = latency_ratio
+        self.max_load_per_cpu = max_load_per_cpu
+        self.streams_per_slot = max(1, streams_per_slot)
+        self.adjust_interval = adjust_interval
+        self.active = 0
+        self.waiting = 0
+        self.active_streams = 0
+        self._latency: dict[str, _LatencyStats] = {}
+        self._loop_condition: tuple[asyncio.AbstractEventLoop, asyncio.Condition] | None = None
+        self._last_adjust = time.monotonic()  # the first change also waits for adjust_interval
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def _condition(self) -> asyncio.Condition:
+        """Condition of the running loop, created on first use: the limiter is a process singleton, loops come and go."""
+        loop = asyncio.get_running_loop()
+        if self._loop_condition is None or self._loop_condition[0] is not loop:
+            self._loop_condition = (loop, asyncio.Condition())
+        return self._loop_condition[1]
+
+    @asynccontextmanager
+    async def slot(self, kind: str):
+        """Hold one process slot while running a job of the given kind (e.g. "probe", "thumbnail")."""
+        async with self._condition:
+            self.waiting += 1
+            try:
+                await self._condition.wait_for(lambda: self.active < self._effective_limit())
+            finally:
+                self.waiting -= 1
+            self.active += 1
+
+        started = time.monotonic()
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            async with self._condition:
+                self.active -= 1
+                # failures and cancellations say nothing about the machine's throughput
+                if not failed:
+                    self._latency.setdefault(kind, _LatencyStats()).record(time.monotonic() - started)
+                    self._adjust(kind)
+                self._condition.notify_all()
+
+    @asynccontextmanager
+    async def stream(self):
+        """
+        Count an active video stream while its body is being sent. Queued jobs see the lower ceiling
+        right away (running ones finish), and are woken up when the stream ends.
+        """
+        self.active_streams += 1
+        try:
+            yield
+        finally:
+            self.active_streams -= 1
+            async with self._condition:
+                self._condition.notify_all()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "ceiling": self._ceiling(),
+            "minLimit": self.min_limit,
+            "maxLimit": self.max_limit,
+            "active": self.active,
+            "queueDepth": self.waiting,
+            "activeStreams": self.active_streams,
+            "loadPerCpu": round(_load_per_cpu(), 3),
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "latency": {
+                kind: {"ewma": stats.ewma, "baseline": stats.baseline, "samples": stats.samples}
+                for kind, stats in self._latency.items()
+            },
+        }
+
+    def _ceiling(self) -> int:
+        return max(self.min_limit, self.max_limit - self.active_streams // self.streams_per_slot)
+
+    def _effective_limit(self) -> int:
+        return min(self.limit, self._ceiling())
+
+    def _adjust(self, kind: str) -> None:
+        """Re-evaluate the limit after a job of `kind` finished. Caller must hold the condition lock."""
+        now = time.monotonic()
+        if now - self._last_adjust < self.adjust_interval:
+            return
+        self._last_adjust = now
+
+        ratio = self._latency[kind].ratio
+        load = _load_per_cpu()
+        # measured against the slots jobs can actually use
+        current = self._effective_limit()
+        if ratio > self.latency_ratio or load > self.max_load_per_cpu:
+            new_limit = min(current - 1, int(current * 0.75))
+        elif self.waiting > 0 and ratio < (1 + self.latency_ratio) / 2:
+            new_limit = current + 1
+        else:
+            new_limit = current
+        new_limit = max(self.min_limit, min(new_limit, self._ceiling()))
+
+        if new_limit != self.limit:
+            if new_limit > self.limit:
+                self.increases += 1
+            else:
+                self.decreases += 1
+            logger.debug(
+                f"ffmpeg limit {self.limit} -> {new_limit} (latency x{ratio:.2f} for {kind}, "
+                f"load {load:.2f}/cpu, {self.active_streams} streams, {self.waiting} queued)"
+            )
+            self.limit = new_limit
+
+
+def _load_per_cpu() -> float:
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except OSError:
+        # not available on this platform
+        return 0.0
+
+
+@lru_cache
+def get_process_limiter() -> AdaptiveProcessLimiter:
+    settings = get_settings()
+    limiter_config = settings.ffmpeg_limiter
+    cpu_count = os.cpu_count() or 1
+    initial_limit = max(settings.ffmpeg_semaphore_limit, cpu_count // 2)
+    return AdaptiveProcessLimiter(
+        initial_limit=initial_limit,
+        min_limit=limiter_config.min_limit,
+        max_limit=limiter_config.max_limit or max(initial_limit, cpu_count),
+        latency_ratio=limiter_config.latency_ratio,
+        max_load_per_cpu=limiter_config.max_load_per_cpu,
+        streams_per_slot=limiter_config.streams_per_slot,
+        adjust_interval=limiter_config.adjust_interval,
+    )
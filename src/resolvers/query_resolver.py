@@ -1,10 +1,13 @@
-from fastapi.concurrency import run_in_threadpool
+from typing import Optional
 import strawberry
 from bson import ObjectId
 from src.config import get_settings
 from src.logger import get_logger
-from src.resolvers.thumbnail_resolver import get_thumbnail_resolver
-from src.schema.types.fileBrowse_type import FileBrowseNode, RelativePathInput
+from src.resolvers.media_worker import MediaPriority, get_media_worker
+from src.resolvers.thumbnail_resolver import needs_probe
+from src.resolvers.video_metadata_cache import get_video_metadata_cache
+from src.schema.types.fileBrowse_type import BrowsePageInput, FileBrowsePage, RelativePathInput
+from src.schema.types.pydantic_types.fileBrowe_type import BrowsePageInputModel
 from src.resolvers.resolver_utils import resolver_utils
 from src.schema.types.search_type import (
     DirectoryMetadataResult,
@@ -51,6 +54,12 @@ class QueryResolver:
             query_filters["tags"] = {"$all": validated_input.tags}
         if validated_input.sortBy == VideoSortOption.Loved.value:
             query_filters["loved"] = True
+        if validated_input.videoCodec:
+            query_filters["videoCodec"] = validated_input.videoCodec
+        if validated_input.audioCodec:
+            query_filters["audioCodec"] = validated_input.audioCodec
+        if validated_input.minHeight:
+            query_filters["height"] = {"$gte": validated_input.minHeight}
 
         sort_mapping = {
             VideoSortOption.Latest.value: [("lastViewTime", -1)],
@@ -73,16 +82,14 @@ class QueryResolver:
             total_count = await query.count()
             video_models = await query.sort(sort_criteria).skip(skip).limit(page_size).to_list()
 
-            async def get_video(video_model: VideoModel):
-                if video_model.duration is None or video_model.duration == 0.0:
-                    video_path = resolver_utils().to_mounted_path(video_model.path)
-                    duration = await get_thumbnail_resolver().get_video_duration(video_path)
-                    video_model.duration = duration
-                    await video_model.save()
-                return await Video.from_mongoDB(video_model)
-            
+            # videos on this page without thumbnail or metadata go to the front of the worker queue
+            get_media_worker().enqueue(
+                [str(vm.id) for vm in video_models if vm.thumbnail is None or needs_probe(vm.duration, vm.container)],
+                MediaPriority.VIEWING
+            )
+
             # build results
-            videos = [await get_video(vm) for vm in video_models]
+            videos = [await Video.from_mongoDB(vm) for vm in video_models]
             pagination = Pagination(
                 size=page_size,
                 totalCount=total_count,
@@ -201,24 +208,44 @@ class QueryResolver:
             raise VideoNotFoundError(str(videoId))
         return await Video.from_mongoDB(video_model)
     
-    async def resolve_browse_directory(self,path: RelativePathInput) -> list[FileBrowseNode]:
+    async def resolve_browse_directory(self,path: RelativePathInput, page: Optional[BrowsePageInput] = None) -> FileBrowsePage:
         """
-        Resolve function to browse videos in a directory specified by a relative path.
+        Resolve function to browse videos in a directory specified by a relative path, one page at a time.
 
         :param path: The relative path to browse.
         :type path: RelativePathInput
-        :return: List of file browse nodes in the specified directory.
-        :rtype: list[FileBrowseNode]
+        :param page: Sort order, page size and the cursor returned with the previous page. Without cursor (or with
+                     `refreshFlag`) the directory is listed from disk and its index synced, later pages are only read from the index.
+        :type page: Optional[BrowsePageInput]
+        :return: One page of file browse nodes, sub directories first, with the cursor of the next page.
+        :rtype: FileBrowsePage
         """
         try:
             relativePathInputModel = path.to_pydantic()
+            browsePageInputModel = page.to_pydantic() if page is not None else BrowsePageInputModel()
         except Exception as e:
             logger.error(f"Input validation error: {e}")
             raise InputValidationError(field="RelativePathInput", issue="Invalid input data for directory browsing")
         
         abs_path = resolver_utils().get_absolute_resource_path(relativePathInputModel)
 
-        return await resolver_utils().get_node_list_in_directory(abs_path, relativePathInputModel.refreshFlag)
+        if abs_path is None:
+            return await resolver_utils().get_root_directory_page(browsePageInputModel, relativePathInputModel.refreshFlag)
+
+        if browsePageInputModel.parsedCursor is None or relativePathInputModel.refreshFlag:
+            stale = await resolver_utils().sync_directory_listing(abs_path, relativePathInputModel.refreshFlag)
+            removed_ids = await resolver_utils().remove_stale_entries(abs_path, stale)
+            get_video_metadata_cache().invalidate(*removed_ids)
+
+        result = await resolver_utils().get_directory_page(abs_path, browsePageInputModel)
+        get_media_worker().enqueue(
+            [
+                str(n.node.id) for n in result.nodes
+                if not n.node.isDir and (n.node.thumbnail is None or needs_probe(n.node.duration, n.node.container))
+            ],
+            MediaPriority.VIEWING
+        )
+        return result
 
     async def resolve_directory_metadata(self,path: RelativePathInput) -> DirectoryMetadataResult:
         """
@@ -226,7 +253,8 @@ class QueryResolver:
 
         :param path: The relative path of the directory.
         :type path: RelativePathInput
-        :return: Directory metadata result containing total size and last modified time.
+        :return: Directory metadata result containing total size, last modified time and video count.
+                 Read from the directory index, the directory is only scanned if it is not indexed yet or `refreshFlag` is set.
         :rtype: DirectoryMetadataResult
         """
         try:
@@ -237,13 +265,11 @@ class QueryResolver:
         
         abs_path = resolver_utils().get_absolute_resource_path(relativePathInputModel)
 
-        size, last_update_time = await run_in_threadpool(
-            resolver_utils().get_total_size_and_last_modified_time, 
-            abs_path,
-            True
-        )
+        aggregates = await resolver_utils().get_directory_aggregates([abs_path], relativePathInputModel.refreshFlag)
+        aggregate = aggregates[abs_path]
 
         return DirectoryMetadataResult(
-            totalSize=size,
-            lastModifiedTime=last_update_time
+            totalSize=aggregate.size,
+            lastModifiedTime=aggregate.lastModifyTime,
+            videoCount=aggregate.videoCount
         )
\ No newline at end of file
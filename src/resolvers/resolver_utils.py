@@ -1,124 +1,361 @@
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 import os
+import re
+import threading
+from typing import AsyncGenerator
 
 from bson import ObjectId
 from cachetools import TTLCache
 from fastapi.concurrency import run_in_threadpool
+import pymongo
 from pymongo import UpdateOne
 from pymongo.errors import BulkWriteError
 import strawberry
 from src.config import get_settings
-from src.db.models.Video_model import VideoModel, VideoTagModel
+from src.db.models.Video_model import NAME_COLLATION, DirectoryModel, VideoModel, VideoTagModel
 from src.errors import FileBrowseError
 from src.resolvers.thumbnail_resolver import get_thumbnail_resolver
-from src.schema.types.fileBrowse_type import FileBrowseNode
+from src.schema.types.fileBrowse_type import FileBrowseNode, FileBrowsePage
 from src.schema.types.pydantic_types.batch_operation_type import TagsOperationMappingInputModel
-from src.schema.types.pydantic_types.fileBrowe_type import RelativePathInputModel
+from src.schema.types.pydantic_types.fileBrowe_type import (
+    BROWSE_SORT_FIELDS,
+    BrowseCursor,
+    BrowsePageInputModel,
+    RelativePathInputModel
+)
 from src.schema.types.video_type import Video
 from src.logger import get_logger
 
 logger = get_logger("resolver_utils")
 
 
-# cache for directory size and last modified time
-_dir_cache: TTLCache[str, tuple[float, float]] = TTLCache(
+# process cache of the directory aggregates, by host path
+_dir_cache: TTLCache[str, DirectoryModel] = TTLCache(
     maxsize=get_settings().cache_config.max_size, 
     ttl=get_settings().cache_config.ttl
 )
 
+class _ScanNode:
+    """
+    A directory of a parallel tree scan, waiting for its own listing and its children (`pending`)
+    before it is merged into its parent. `aggregate` stays None if the directory cannot be read.
+    """
+    __slots__ = ("path", "tree", "parent", "aggregate", "pending")
+
+    def __init__(self, path: str, tree: str, parent: "_ScanNode | None"):
+        self.path = path
+        self.tree = tree
+        self.parent = parent
+        self.aggregate: DirectoryModel | None = None
+        self.pending = 1
+
+
+@lru_cache
+def get_directory_scan_executor() -> ThreadPoolExecutor:
+    """Bounded pool listing directories in parallel, shared by every directory tree scan."""
+    return ThreadPoolExecutor(max_workers=get_settings().directory_scan_workers, thread_name_prefix="directory-scan")
+
+
 class ResolverUtils:
 
     # ============================================================
     # Browse file utils
     # ============================================================
 
-    async def get_node_list_in_directory(self, abs_path: str | None, refreshFlag: bool = False) -> list[FileBrowseNode]:
-        fileBrowse_nodes: list[FileBrowseNode] = []
-        resource_paths = get_settings().resource_paths
+    async def get_root_directory_page(self, page: BrowsePageInputModel, refreshFlag: bool = False) -> FileBrowsePage:
+        """
+        The resource roots with at least one video, under their pseudo names. There are only a handful of them,
+        so they are sorted in memory and always fit in one page.
+        """
+        directories = {self.get_absolute_root_resource_path(name): name for name in get_settings().resource_paths}
         try:
-            if abs_path is None:
-                for name in resource_paths.keys():
-                    abs_root_resource_path = self.get_absolute_root_resource_path(name)
-                    await self._get_directory_node(abs_root_resource_path, name, fileBrowse_nodes, refreshFlag)
-            else:
-                with os.scandir(abs_path) as entries:
-                    while True:
-                        try:
-                            entry = next(entries)
-                            if entry.is_dir():
-                                await self._get_directory_node(entry.path, entry.name, fileBrowse_nodes, refreshFlag)
-                            elif entry.is_file() and self.is_video_file(entry.name):
-                                    stat = entry.stat()
-                                    video_doc = await VideoModel.get_pymongo_collection().find_one_and_update(
-                                        {"path": self.to_host_path(entry.path)},
-                                        {"$setOnInsert": VideoModel(
-                                            path=self.to_host_path(entry.path),
-                                            name=os.path.basename(entry.path),
-                                            isDir=False,
-                                            lastModifyTime=stat.st_mtime,
-                                            size=stat.st_size,
-                                            tags=[]
-                                        ).model_dump()},
-                                        upsert=True, return_document=True
-                                    )
-
-                                    fileBrowse_nodes.append(
-                                        FileBrowseNode(
-                                            node=await Video.from_mongoDB(VideoModel(**video_doc), getTagsCount=False)
-                                        )
-                                    )
-
-                        except StopIteration:
-                            break
-                        except OSError as e:
-                            logger.error(f"Error processing file {entry.path}: {e}")
-                            continue
+            aggregates = await self.get_directory_aggregates(list(directories), refreshFlag)
+        except Exception as e:
+            logger.error(f"Error accessing resource roots: {e}")
+            raise FileBrowseError("Error accessing resource roots")
+
+        field = BROWSE_SORT_FIELDS[page.sortBy]
+        roots = sorted(
+            ((name, aggregates[path]) for path, name in directories.items() if aggregates[path].videoCount != 0),
+            key=lambda root: (root[0].casefold(), root[0]) if field == "path" else (getattr(root[1], field), root[0]),
+            reverse=not page.ascending
+        )
+        return FileBrowsePage(
+            nodes=[self._directory_node(name, aggregate) for name, aggregate in roots],
+            totalCount=len(roots)
+        )
 
+    async def sync_directory_listing(self, abs_path: str, refreshFlag: bool = False) -> list[tuple[str, bool]]:
+        """
+        List a directory once and bring its index in line with the disk before its first page is read:
+        documents are inserted for the new video files, and the sub directories never indexed
+        (or all of them with `refreshFlag`) are aggregated.
+
+        :param abs_path: Absolute (mounted) path of the directory, in standard format
+        :return: Mounted paths of the indexed entries no longer on disk, with whether they are directories
+        :rtype: list[tuple[str, bool]]
+        """
+        host_directory = self.to_host_path(abs_path)
+        try:
+            directories, video_files = await run_in_threadpool(self._scan_directory_listing, abs_path)
+            await self.get_or_create_video_docs(video_files)
+            # one indexed lookup for all sub directories, only unknown ones are scanned
+            await self.get_directory_aggregates(list(directories), refreshFlag)
+
+            listed_directories = {self.to_host_path(path) for path in directories}
+            stale = [
+                (self.to_mounted_path(doc["path"]), False)
+                async for doc in VideoModel.get_pymongo_collection().find(self._directory_video_filter(host_directory), {"path": 1})
+                if doc["path"] not in video_files
+            ]
+            stale += [
+                (self.to_mounted_path(doc["path"]), True)
+                async for doc in DirectoryModel.get_pymongo_collection().find({"parent": host_directory}, {"path": 1})
+                if doc["path"] not in listed_directories
+            ]
         except (OSError, Exception) as e:
             logger.error(f"Error accessing directory {abs_path}: {e}")
             raise FileBrowseError(f"Error accessing directory {abs_path}")
-        
         logger.info(f"Cached size: {_dir_cache.currsize}/{_dir_cache.maxsize}")
-        return fileBrowse_nodes
-
-    async def _get_directory_node(self, path: str, name: str, fileBrowse_nodes: list[FileBrowseNode], refreshFlag: bool = False):
-        """Calculate total size and last modified time of all videos under this directory"""
-        total_size, last_modified_time = await run_in_threadpool(
-            self.get_total_size_and_last_modified_time,
-            self.get_path_standard_format(path),
-            refreshFlag
-        )
-        # Append directory node only when there is at least one video file inside or
-        if total_size != 0.0 and last_modified_time != 0.0:
-            fileBrowse_nodes.append(
-                FileBrowseNode(
-                    node=Video.create_new(
-                        id=strawberry.ID(str(ObjectId())),
-                        name=name,
-                        isDir=True,
-                        lastModifyTime=last_modified_time,
-                        size=total_size
+        return stale
+
+    async def remove_stale_entries(self, abs_path: str, stale: list[tuple[str, bool]]) -> list[str]:
+        """
+        Drop the index entries of a directory that are gone from disk, whether the library watcher runs or not:
+        the videos (with those under a gone sub directory) and their tag counts, then the aggregates of the
+        gone sub directories and of the directory itself.
+
+        :param abs_path: Absolute (mounted) path of the directory, in standard format
+        :param stale: Entries returned by `sync_directory_listing`
+        :return: Ids of the removed videos, for the caller to drop from its caches
+        :rtype: list[str]
+        """
+        if not stale:
+            return []
+        collection = VideoModel.get_pymongo_collection()
+        scope_filters: list[dict] = [{"path": {"$in": [self.to_host_path(path) for path, isDir in stale if not isDir]}}]
+        scope_filters += [
+            {"path": {"$regex": "^" + re.escape(self.to_host_path(path).rstrip("/") + "/")}} for path, isDir in stale if isDir
+        ]
+        removed = [doc async for doc in collection.find({"$or": scope_filters, "isDir": False}, {"_id": 1, "tags": 1})]
+        if removed:
+            await collection.delete_many({"_id": {"$in": [doc["_id"] for doc in removed]}})
+            update_tags: dict[str, tuple[int, bool]] = {}
+            for doc in removed:
+                self.track_tag_change(update_tags, set(doc.get("tags") or []), False)
+            await self.update_tag_counts(update_tags)
+
+        # a directory gone from disk leaves the index with its subtree, deepest first
+        for path in sorted((path for path, isDir in stale if isDir), key=lambda path: path.count("/"), reverse=True):
+            await self.refresh_directory_aggregate(path)
+        await self.refresh_directory_aggregate(abs_path)
+        return [str(doc["_id"]) for doc in removed]
+
+    async def get_directory_page(self, abs_path: str, page: BrowsePageInputModel) -> FileBrowsePage:
+        """
+        Read one page of a directory from the index, without touching the disk: the sub directories with at least
+        one video first, then the videos, each ordered by the sort key with the path breaking ties, and resumed
+        right after the cursor (keyset pagination, so deep pages cost the same as the first one). Names are
+        ordered case-insensitively. The entries are only counted for the first page, the cursor carries the total.
+
+        :param abs_path: Absolute (mounted) path of the directory, synced by `sync_directory_listing`
+        :param page: Sort order, page size and cursor
+        :return: The page, with the cursor of the next one
+        :rtype: FileBrowsePage
+        """
+        host_directory = self.to_host_path(abs_path)
+        field = BROWSE_SORT_FIELDS[page.sortBy]
+        direction = pymongo.ASCENDING if page.ascending else pymongo.DESCENDING
+        sort = [(field, direction)] if field == "path" else [(field, direction), ("path", direction)]
+        collation = NAME_COLLATION if field == "path" else None
+        directory_filter = {"parent": host_directory, "videoCount": {"$ne": 0}}
+        video_filter = self._directory_video_filter(host_directory)
+
+        cursor = page.parsedCursor
+        remaining = page.pageSize
+        nodes: list[FileBrowseNode] = []
+        next_cursor: BrowseCursor | None = None
+        try:
+            if cursor is not None and cursor.total is not None:
+                total_count = cursor.total
+            else:
+                total_count = await DirectoryModel.find(directory_filter).count() \
+                    + await VideoModel.get_pymongo_collection().count_documents(video_filter)
+
+            if cursor is None or cursor.phase == "directories":
+                # one extra document tells whether there is a next page
+                directories = await DirectoryModel.find(
+                    self._after_cursor(directory_filter, field, page.ascending, cursor), collation=collation
+                ).sort(*sort).limit(remaining + 1).to_list()
+                if len(directories) > remaining:
+                    directories = directories[:remaining]
+                    last = directories[-1]
+                    next_cursor = BrowseCursor(
+                        page.sortBy, page.ascending, "directories", None if field == "path" else getattr(last, field), last.path,
+                        total_count
                     )
+                nodes += [self._directory_node(os.path.basename(directory.path), directory) for directory in directories]
+                remaining -= len(directories)
+                cursor = None
+
+            if next_cursor is None:
+                video_docs = await VideoModel.get_pymongo_collection() \
+                    .find(self._after_cursor(video_filter, field, page.ascending, cursor), collation=collation) \
+                    .sort(sort).limit(remaining + 1).to_list(None)
+                if len(video_docs) > remaining:
+                    video_docs = video_docs[:remaining]
+                    # a page filled by directories resumes at the first video
+                    last = video_docs[-1] if video_docs else None
+                    next_cursor = BrowseCursor(
+                        page.sortBy, page.ascending, "videos",
+                        None if last is None or field == "path" else last[field],
+                        None if last is None else last["path"],
+                        total_count
+                    )
+                for doc in video_docs:
+                    nodes.append(FileBrowseNode(node=await Video.from_mongoDB(VideoModel(**doc), getTagsCount=False)))
+        except Exception as e:
+            logger.error(f"Error reading directory page of {abs_path}: {e}")
+            raise FileBrowseError(f"Error accessing directory {abs_path}")
+
+        return FileBrowsePage(
+            nodes=nodes,
+            nextCursor=next_cursor.encode() if next_cursor else None,
+            totalCount=total_count
+        )
+
+    def _directory_video_filter(self, host_directory: str) -> dict:
+        """Videos directly in a directory: an anchored prefix, served by the path index."""
+        return {"path": {"$regex": "^" + re.escape(host_directory.rstrip("/") + "/") + "[^/]+$"}, "isDir": False}
+
+    def _after_cursor(self, query: dict, field: str, ascending: bool, cursor: BrowseCursor | None) -> dict:
+        """Restrict a page query to the entries after the cursor, in (sort key, path) order."""
+        if cursor is None or cursor.path is None:
+            return query
+        operator = "$gt" if ascending else "$lt"
+        if field == "path":
+            after = {"path": {operator: cursor.path}}
+        else:
+            after = {"$or": [{field: {operator: cursor.value}}, {field: cursor.value, "path": {operator: cursor.path}}]}
+        return {"$and": [query, after]}
+
+    def _scan_directory_listing(self, abs_path: str) -> tuple[dict[str, str], dict[str, VideoModel]]:
+        """
+        List one directory, blocking (meant to be run in a worker thread).
+
+        :return: Sub directory names by path, and new video documents by host path in listing order,
+                 only inserted for the files not in the database yet
+        """
+        directories: dict[str, str] = {}
+        video_files: dict[str, VideoModel] = {}
+        with os.scandir(abs_path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        directories[self.get_path_standard_format(entry.path)] = entry.name
+                    elif entry.is_file() and self.is_video_file(entry.name):
+                        stat = entry.stat()
+                        host_path = self.to_host_path(entry.path)
+                        video_files[host_path] = VideoModel(
+                            path=host_path,
+                            name=entry.name,
+                            isDir=False,
+                            lastModifyTime=stat.st_mtime,
+                            size=stat.st_size,
+                            tags=[]
+                        )
+                except OSError as e:
+                    logger.error(f"Error processing file {entry.path}: {e}")
+        return directories, video_files
+
+    async def get_or_create_video_docs(self, video_files: dict[str, VideoModel]) -> dict[str, dict]:
+        """
+        Get the documents of video files, inserting the missing ones, with a constant number of round trips:
+        one lookup, one bulk write of upserts for the missing files, one fetch of the inserted documents.
+
+        :param video_files: New documents by host path, used for the files not in the database
+        :return: Raw documents by host path
+        :rtype: dict[str, dict]
+        """
+        collection = VideoModel.get_pymongo_collection()
+        video_docs = {
+            doc["path"]: doc
+            async for doc in collection.find({"path": {"$in": list(video_files)}})
+        }
+        missing = [host_path for host_path in video_files if host_path not in video_docs]
+        if missing:
+            try:
+                # $setOnInsert keeps a document inserted concurrently (e.g. by a batch or the watcher) untouched
+                await collection.bulk_write(
+                    [
+                        UpdateOne({"path": host_path}, {"$setOnInsert": video_files[host_path].model_dump()}, upsert=True)
+                        for host_path in missing
+                    ],
+                    ordered=False
                 )
+            except BulkWriteError as bwe:
+                logger.error(f"Bulk write error while inserting listed videos: {bwe.details}")
+            async for doc in collection.find({"path": {"$in": missing}}):
+                video_docs[doc["path"]] = doc
+        return video_docs
+
+    def _directory_node(self, name: str, aggregate: DirectoryModel) -> FileBrowseNode:
+        return FileBrowseNode(
+            node=Video.create_new(
+                # an unreadable directory is not indexed
+                id=strawberry.ID(str(aggregate.id or ObjectId())),
+                name=name,
+                isDir=True,
+                lastModifyTime=aggregate.lastModifyTime,
+                size=aggregate.size
             )
+        )
     
     def get_all_video_entries_in_directory(self, directory_path: str) -> list[os.DirEntry[str]]:
         """Get all video file entries under the given directory and its subdirectories."""
+        return self.walk_video_entries([directory_path])
+
+    async def iter_video_entries_in_directory(self, directory_path: str, chunk_size: int) -> AsyncGenerator[list[os.DirEntry[str]], None]:
+        """
+        Walk the video files under a directory and its subdirectories, yielding them in chunks as they are found.
+        Only the directories still to visit and the current chunk are kept in memory.
+
+        :param directory_path: Absolute (mounted) path of the directory
+        :param chunk_size: Maximum number of entries per chunk
+        :return: An asynchronous generator of non-empty chunks of video file entries
+        :rtype: AsyncGenerator[list[os.DirEntry[str]], None]
+        """
+        pending_directories = [directory_path]
+        while pending_directories:
+            # one worker thread hop per chunk, not per directory
+            chunk = await run_in_threadpool(self.walk_video_entries, pending_directories, chunk_size)
+            # a single large directory can overshoot the limit
+            for start in range(0, len(chunk), chunk_size):
+                yield chunk[start:start + chunk_size]
+
+    def walk_video_entries(self, pending_directories: list[str], limit: int | None = None) -> list[os.DirEntry[str]]:
+        """
+        Iterative depth-first walk, blocking: visit the directories of the `pending_directories` stack (updated in place)
+        until at least `limit` video entries are found, or all of them without a limit.
+        Once the returned entries are handled, the stack is where a later walk resumes.
+        A single large directory is returned whole, so the result can exceed `limit`.
+        """
         video_entries: list[os.DirEntry[str]] = []
-        try:
-            with os.scandir(directory_path) as entries:
-                for entry in entries:
-                    if entry.is_file() and self.is_video_file(entry.name):
-                        video_entries.append(entry)
-                    elif entry.is_dir():
-                        video_entries.extend(
-                            self.get_all_video_entries_in_directory(
-                                self.get_path_standard_format(entry.path)
-                            )
-                        )
-        except (OSError, Exception):
-            logger.error(f"Error accessing directory {directory_path} to get video entries.")
-        
+        while pending_directories and (limit is None or len(video_entries) < limit):
+            directory_path = pending_directories.pop()
+            sub_directories: list[str] = []
+            try:
+                with os.scandir(directory_path) as entries:
+                    for entry in entries:
+                        if entry.is_file() and self.is_video_file(entry.name):
+                            video_entries.append(entry)
+                        elif entry.is_dir():
+                            sub_directories.append(self.get_path_standard_format(entry.path))
+            except (OSError, Exception):
+                logger.error(f"Error accessing directory {directory_path} to get video entries.")
+            # reversed so that sub directories are visited in listing order
+            pending_directories.extend(reversed(sub_directories))
         return video_entries
 
     def is_video_file(self, filename: str) -> bool:
@@ -177,7 +414,14 @@ class ResolverUtils:
         except Exception as e:
             logger.error(f"Error during bulk update of tag counts: {e}")
 
-    def _track_tag_change(self, update_tags: dict[str, tuple[int, bool]], tags: set[str], is_increment: bool):
+    def track_tag_change(self, update_tags: dict[str, tuple[int, bool]], tags: set[str], is_increment: bool):
+        """
+        Count a tag change in the pending tag count updates, applied later by `update_tag_counts`.
+
+        :param update_tags: The pending updates, tag -> (count, is_increment)
+        :param tags: The tags added to or removed from one video
+        :param is_increment: True if the tags were added
+        """
         for tag in tags:
             tag_record: tuple[int, bool] | None = update_tags.get(tag)
             update_tags[tag] = (tag_record[0] + 1, is_increment) if tag_record else (1, is_increment)
@@ -190,7 +434,9 @@ class ResolverUtils:
         update_tags: dict[str, tuple[int,bool]]
     ) -> UpdateOne:
         """
-        Process a single new video entry: get duration via ffprobe and build upsert operation.
+        Process a single new video entry: read the duration (from the container header when possible,
+        otherwise via ffprobe) and build upsert operation. Technical metadata missing from a header-only
+        read is probed later, when the video is first opened.
 
         :param entry: Directory entry for the video file
         :param author: Author name to set (if provided)
@@ -201,8 +447,9 @@ class ResolverUtils:
         host_path = self.to_host_path(entry.path)
         filter_query = {"path": host_path}
 
-        # Get video duration with semaphore to limit concurrent ffprobe processes
-        duration = await get_thumbnail_resolver().get_video_duration(entry.path) or 0.0
+        # Container header fast path, ffprobe fallback is limited by the process limiter
+        probe_result = await get_thumbnail_resolver().quick_probe(entry.path)
+        probe_fields = probe_result.to_update_query() if probe_result else {}
 
         stat = entry.stat()
         set_on_insert = VideoModel(
@@ -211,8 +458,8 @@ class ResolverUtils:
             isDir=False,
             lastModifyTime=stat.st_mtime,
             size=stat.st_size,
-            duration=duration,
-            tags=[]
+            tags=[],
+            **probe_fields
         ).model_dump()
 
         if author is not None:
@@ -222,7 +469,7 @@ class ResolverUtils:
             tags_set = set(tagsOperation.tags)
             if tagsOperation.append:
                 set_on_insert["tags"] = list(tags_set)
-                self._track_tag_change(update_tags, tags_set, True)
+                self.track_tag_change(update_tags, tags_set, True)
 
         return UpdateOne(filter_query, {"$setOnInsert": set_on_insert}, upsert=True)
     
@@ -235,57 +482,318 @@ class ResolverUtils:
             raise FileBrowseError("Error removing video files.")
 
     # ============================================================
-    # Calculate directory size and last modified time with caching
+    # Directory aggregates: recursive size, latest modified time and video count,
+    # persisted in the `directories` collection with _dir_cache in front of it
     # ============================================================
 
-    def get_total_size_and_last_modified_time(self, directory_path: str, refreshFlag: bool = False) -> tuple[float, float]:
+    async def get_directory_aggregates(self, directory_paths: list[str], refreshFlag: bool = False) -> dict[str, DirectoryModel]:
+        """
+        Get the aggregates of several directories: from the process cache, then with one indexed query,
+        and only directories never indexed (or all of them with `refreshFlag`) are scanned from disk.
+
+        :param directory_paths: Absolute (mounted) paths of the directories, in standard format
+        :param refreshFlag: Rescan the directories and re-index their whole subtree
+        :return: Aggregates by directory path. An unreadable directory gets size and time -1, and is not indexed.
+        :rtype: dict[str, DirectoryModel]
         """
-        Get total size and last modified time of all video files under the given directory.
-        Uses caching to avoid redundant calculations.
+        host_paths = {path: self.to_host_path(path) for path in directory_paths}
+        aggregates: dict[str, DirectoryModel] = {}
+
+        if not refreshFlag:
+            for path, host_path in host_paths.items():
+                if host_path in _dir_cache:
+                    aggregates[path] = _dir_cache[host_path]
+
+            lookup = [host_paths[path] for path in directory_paths if path not in aggregates]
+            if lookup:
+                docs = await DirectoryModel.find({"path": {"$in": lookup}}).to_list()
+                indexed = {doc.path: doc for doc in docs}
+                for path, host_path in host_paths.items():
+                    if path not in aggregates and host_path in indexed:
+                        aggregates[path] = _dir_cache[host_path] = indexed[host_path]
+
+        missing = [path for path in directory_paths if path not in aggregates]
+        if missing:
+            aggregates.update(await self.rebuild_directory_trees(missing))
+        return aggregates
+
+    async def rebuild_directory_aggregates(self, directory_path: str) -> DirectoryModel:
         """
-        if not refreshFlag and directory_path in _dir_cache:
-            return _dir_cache.get(directory_path)
+        Scan a directory tree and index the aggregates of every directory in it.
 
-        result = self._get_total_size_and_last_modified_time_impl(directory_path, refreshFlag)
-        _dir_cache.update({directory_path: result})
-        
-        return result
+        :param directory_path: Absolute (mounted) path of the directory
+        :return: The aggregates of the directory itself
+        :rtype: DirectoryModel
+        """
+        return (await self.rebuild_directory_trees([directory_path]))[directory_path]
 
-    def _get_total_size_and_last_modified_time_impl(self, directory_path: str, refreshFlag: bool) -> tuple[float, float]:
-        total_size = 0.0
-        last_modified_time = 0.0
-        
-        def calculate_entry():
-            nonlocal total_size, last_modified_time
-            try:
-                with os.scandir(directory_path) as entries:
-                    for entry in entries:
-                        if entry and not refreshFlag:
-                            total_size = -1.0
-                            last_modified_time = -1.0
-                            return
-                        
-                        if entry.is_dir():
-                            dir_size, dir_mtime = self.get_total_size_and_last_modified_time(
-                                self.get_path_standard_format(entry.path),
-                                refreshFlag
-                            )
-                            total_size += dir_size
-                            last_modified_time = max(last_modified_time, dir_mtime)
+    async def rebuild_directory_trees(self, directory_paths: list[str]) -> dict[str, DirectoryModel]:
+        """
+        Scan several directory trees together and index the aggregates of every directory in them with one bulk write.
+        Indexed ancestors receive the difference with the previous aggregates of each directory,
+        or its whole aggregates if it was not indexed yet.
+
+        :param directory_paths: Absolute (mounted) paths of directories, none inside another one
+        :return: The aggregates of each directory by path. An unreadable directory gets size and time -1, and is not indexed.
+        :rtype: dict[str, DirectoryModel]
+        """
+        scanned = await run_in_threadpool(self.scan_directory_trees, directory_paths)
+        roots = {path: tree[-1] for path, tree in scanned.items() if tree}
+        if not roots:
+            return {
+                path: DirectoryModel(path=self.to_host_path(path), size=-1.0, lastModifyTime=-1.0)
+                for path in directory_paths
+            }
+
+        previous = {
+            doc.path: doc
+            for doc in await DirectoryModel.find({"path": {"$in": [root.path for root in roots.values()]}}).to_list()
+        }
+        await DirectoryModel.get_pymongo_collection().bulk_write(
+            [
+                UpdateOne({"path": aggregate.path}, {"$set": aggregate.model_dump(exclude={"id", "revision_id"})}, upsert=True)
+                for tree in scanned.values() for aggregate in tree
+            ],
+            ordered=False
+        )
+        for tree in scanned.values():
+            for aggregate in tree:
+                _dir_cache[aggregate.path] = aggregate
+
+        # a directory indexed for the first time brings its whole aggregate to its ancestors
+        deltas = [
+            (
+                root.parent,
+                root.size - (previous[root.path].size if root.path in previous else 0.0),
+                root.videoCount - (previous[root.path].videoCount if root.path in previous else 0),
+                root.lastModifyTime
+            )
+            for root in roots.values() if root.parent is not None
+        ]
+        if deltas:
+            await self._apply_directory_deltas(deltas)
+        return {
+            path: roots.get(path) or DirectoryModel(path=self.to_host_path(path), size=-1.0, lastModifyTime=-1.0)
+            for path in directory_paths
+        }
+
+    async def refresh_directory_aggregate(self, directory_path: str) -> DirectoryModel | None:
+        """
+        Recompute the aggregates of one indexed directory after a change right inside it: its own files are
+        listed, its sub directories come from the index (only unindexed ones are scanned). Ancestors receive
+        the difference. A directory that no longer exists is removed from the index with its whole subtree.
+
+        :param directory_path: Absolute (mounted) path of the directory
+        :return: The new aggregates, None if the directory is not indexed or no longer exists
+        :rtype: DirectoryModel | None
+        """
+        host_path = self.to_host_path(directory_path)
+        previous = await DirectoryModel.find_one({"path": host_path})
+        if previous is None:
+            return None
+
+        listing = await run_in_threadpool(self._scan_directory_level, directory_path)
+        if listing is None:
+            subtree_prefix = "^" + re.escape(host_path.rstrip("/") + "/")
+            await DirectoryModel.get_pymongo_collection().delete_many(
+                {"$or": [{"path": host_path}, {"path": {"$regex": subtree_prefix}}]}
+            )
+            for cached_path in [path for path in _dir_cache if path == host_path or path.startswith(host_path.rstrip("/") + "/")]:
+                _dir_cache.pop(cached_path, None)
+            if previous.parent is not None:
+                await self._apply_directory_deltas([(previous.parent, -previous.size, -previous.videoCount, 0.0)])
+            return None
+
+        aggregate, sub_directories = listing
+        for child in (await self.get_directory_aggregates(sub_directories)).values():
+            if child.size >= 0:
+                aggregate.size += child.size
+                aggregate.videoCount += child.videoCount
+                aggregate.lastModifyTime = max(aggregate.lastModifyTime, child.lastModifyTime)
+        # sub directories indexed just now already added themselves to this directory and its ancestors
+        previous = await DirectoryModel.find_one({"path": host_path}) or previous
+
+        await DirectoryModel.get_pymongo_collection().update_one(
+            {"path": host_path},
+            {"$set": aggregate.model_dump(exclude={"id", "revision_id"})}
+        )
+        _dir_cache[host_path] = aggregate
+        if aggregate.parent is not None:
+            await self._apply_directory_deltas([
+                (aggregate.parent, aggregate.size - previous.size, aggregate.videoCount - previous.videoCount, aggregate.lastModifyTime)
+            ])
+        return aggregate
+
+    def _scan_directory_level(self, directory_path: str) -> tuple[DirectoryModel, list[str]] | None:
+        """
+        Aggregates of the video files right inside a directory, and the paths of its sub directories
+        (symbolic links to directories excluded). Blocking.
+        """
+        host_path = self.to_host_path(directory_path)
+        aggregate = DirectoryModel.model_construct(
+            path=host_path,
+            parent=self.get_parent_directory(host_path),
+            size=0.0,
+            lastModifyTime=0.0,
+            videoCount=0
+        )
+        sub_directories: list[str] = []
+        try:
+            with os.scandir(directory_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            sub_directories.append(self.get_path_standard_format(entry.path))
                         elif entry.is_file() and self.is_video_file(entry.name):
                             stat = entry.stat()
-                            total_size += stat.st_size
-                            last_modified_time = max(last_modified_time, stat.st_mtime)
+                            aggregate.size += stat.st_size
+                            aggregate.videoCount += 1
+                            aggregate.lastModifyTime = max(aggregate.lastModifyTime, stat.st_mtime)
+                    except OSError as e:
+                        logger.error(f"Error processing entry {entry.path}: {e}")
+        except OSError:
+            return None
+        return aggregate, sub_directories
+
+    def scan_directory_trees(self, directory_paths: list[str]) -> dict[str, list[DirectoryModel]]:
+        """
+        Compute the aggregates of directories and of all their sub directories from the file system.
+        Blocking, meant to be run in a worker thread. Unreadable sub directories count as empty.
+
+        Sibling sub directories are listed in parallel on the bounded directory scan executor, since each
+        `scandir` is a round trip on a network mount. A directory is merged into its parent as soon as its
+        last child is done, bottom-up. The walk has no recursion and keeps no directory handle open per level,
+        so a deep tree only costs the directories waiting for their children. Symbolic links to directories
+        are not followed, a link loop cannot make the walk endless.
+
+        :param directory_paths: Absolute (mounted) paths of the directories
+        :return: Per directory, the aggregates of its tree, children before their parent (the last one is the
+                 directory itself), or an empty list if the directory cannot be read
+        :rtype: dict[str, list[DirectoryModel]]
+        :raises TimeoutError: If the scan takes longer than `directory_scan_timeout`
+        """
+        scanned: dict[str, list[DirectoryModel]] = {path: [] for path in directory_paths}
+        if not directory_paths:
+            return scanned
+        executor = get_directory_scan_executor()
+        lock = threading.Lock()
+        remaining_trees = len(directory_paths)
+        all_done = threading.Event()
+        errors: list[BaseException] = []
+
+        def finish(node: _ScanNode) -> None:
+            """Release one pending unit of `node`, merge every directory it completes into its parent."""
+            nonlocal remaining_trees
+            with lock:
+                node.pending -= 1
+                while not node.pending:
+                    if node.aggregate is not None:
+                        scanned[node.tree].append(node.aggregate)
+                    parent = node.parent
+                    if parent is None:
+                        remaining_trees -= 1
+                        if remaining_trees == 0:
+                            all_done.set()
+                        return
+                    if node.aggregate is not None:
+                        parent.aggregate.size += node.aggregate.size
+                        parent.aggregate.videoCount += node.aggregate.videoCount
+                        parent.aggregate.lastModifyTime = max(parent.aggregate.lastModifyTime, node.aggregate.lastModifyTime)
+                    parent.pending -= 1
+                    node = parent
+
+        def scan(node: _ScanNode) -> None:
+            try:
+                # the node holds one pending unit for its own listing, released last even if submitting fails
+                try:
+                    listing = self._scan_directory_level(node.path)
+                    if listing is None:
+                        logger.error(f"Error accessing directory {node.path} to calculate size and last modified time")
+                        return
+                    node.aggregate, sub_directories = listing
+                    for path in sub_directories:
+                        with lock:
+                            node.pending += 1
+                        executor.submit(scan, _ScanNode(path, node.tree, node))
+                finally:
+                    finish(node)
+            except BaseException as e:
+                # not an unreadable directory (those count as empty) but a shut down executor or a bug:
+                # the tree can no longer complete, fail the whole scan instead of leaving the caller waiting
+                with lock:
+                    errors.append(e)
+                all_done.set()
+
+        for path in directory_paths:
+            executor.submit(scan, _ScanNode(self.get_path_standard_format(path), path, None))
+        if not all_done.wait(get_settings().directory_scan_timeout):
+            raise TimeoutError(f"Scanning directory trees {directory_paths} took longer than "
+                               f"{get_settings().directory_scan_timeout}s")
+        if errors:
+            raise errors[0]
+        return scanned
+
+    async def update_directory_aggregates(self, changes: list[tuple[str, float, int, float]]) -> None:
+        """
+        Apply video file changes to the indexed aggregates of every ancestor directory, up to the resource root.
+        Directories that are not indexed yet are left alone, they are scanned when first needed.
 
-            except (OSError, Exception):
-                # If any error occurs (e.g., permission denied), log and return 0 size and time
-                logger.error(f"Error accessing directory {directory_path} to calculate size and last modified time.")
-                total_size = -1.0
-                last_modified_time = -1.0
+        :param changes: (host path of the video file, size delta, video count delta, modified time) per changed file.
+                        The latest modified time of a directory only moves forward, a removal leaves it as is.
+        """
+        await self._apply_directory_deltas([
+            (os.path.dirname(self.get_path_standard_format(file_path)), size_delta, count_delta, last_modify_time)
+            for file_path, size_delta, count_delta, last_modify_time in changes
+        ])
+
+    async def _apply_directory_deltas(self, changes: list[tuple[str, float, int, float]]) -> None:
+        """Sum the deltas of each (host directory, size, count, time) change over the directory and its ancestors, then write them at once."""
+        deltas: dict[str, list[float]] = {}
+        for directory, size_delta, count_delta, last_modify_time in changes:
+            for ancestor in self.get_directory_chain(directory):
+                delta = deltas.setdefault(ancestor, [0.0, 0, 0.0])
+                delta[0] += size_delta
+                delta[1] += count_delta
+                delta[2] = max(delta[2], last_modify_time)
+        if not deltas:
+            return
 
-        calculate_entry()
-        
-        return total_size, last_modified_time
+        try:
+            await DirectoryModel.get_pymongo_collection().bulk_write(
+                [
+                    UpdateOne(
+                        {"path": directory},
+                        {"$inc": {"size": size_delta, "videoCount": count_delta}, "$max": {"lastModifyTime": last_modify_time}}
+                    )
+                    for directory, (size_delta, count_delta, last_modify_time) in deltas.items()
+                ],
+                ordered=False
+            )
+        except BulkWriteError as bwe:
+            logger.error(f"Bulk write error during directory aggregates update: {bwe.details}")
+        finally:
+            for directory in deltas:
+                _dir_cache.pop(directory, None)
+
+    def get_parent_directory(self, host_path: str) -> str | None:
+        """Parent of an indexed directory, None for a resource root."""
+        if host_path in self._resource_root_host_paths():
+            return None
+        return self.get_path_standard_format(os.path.dirname(host_path))
+
+    def get_directory_chain(self, host_directory: str) -> list[str]:
+        """The directory itself and its ancestors up to its resource root, empty if it is outside of every resource path."""
+        host_directory = self.get_path_standard_format(host_directory)
+        for root in self._resource_root_host_paths():
+            if host_directory == root or host_directory.startswith(root.rstrip("/") + "/"):
+                chain = [host_directory]
+                while chain[-1] != root:
+                    chain.append(self.get_path_standard_format(os.path.dirname(chain[-1])))
+                return chain
+        return []
+
+    def _resource_root_host_paths(self) -> list[str]:
+        return [self.get_path_standard_format(path) for path in get_settings().resource_paths.values()]
 
     # ============================================================
     # Path conversion utils
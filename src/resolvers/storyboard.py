@@ -0,0 +1,87 @@
+import math
+
+from pydantic import BaseModel
+
+from src.config import StoryboardConfig
+from src.resolvers.thumbnail_store import ThumbnailStore
+
+
+class StoryboardLayout(BaseModel):
+    """
+    Geometry of a storyboard sprite sheet: `count` tiles of `tileWidth` x `tileHeight` taken every
+    `interval` seconds, laid out row by row in `columns` columns.
+
+    The layout is fully derived from the duration and the config, so the WebVTT index never needs
+    to be stored next to the sprite sheet.
+    """
+    duration: float
+    interval: float
+    count: int
+    columns: int
+    rows: int
+    tileWidth: int
+    tileHeight: int
+
+    @classmethod
+    def for_duration(cls, duration: float, config: StoryboardConfig) -> "StoryboardLayout":
+        interval = max(duration / config.max_tiles, config.min_interval)
+        count = max(1, min(config.max_tiles, math.ceil(duration / interval)))
+        columns = min(config.columns, count)
+        return cls(
+            duration=duration,
+            interval=interval,
+            count=count,
+            columns=columns,
+            rows=math.ceil(count / columns),
+            tileWidth=config.tile_width,
+            tileHeight=config.tile_height,
+        )
+
+    @staticmethod
+    def store_key(path: str, last_modify_time: float, size: float, config: StoryboardConfig) -> str:
+        """
+        Store key of the sprite sheet of a file. The layout only depends on the duration of the file
+        and on the config, so the key (and the ETag) is known before the duration is probed.
+        """
+        identity = f"storyboard:{config.max_tiles}:{config.min_interval}:{config.columns}:{config.tile_width}x{config.tile_height}"
+        return ThumbnailStore.make_key(f"{path}#{identity}", last_modify_time, size)
+
+    @property
+    def identity(self) -> str:
+        """Identifies the render, so that concurrent requests for the same sprite sheet share one ffmpeg pass."""
+        return f"storyboard:{self.duration:.3f}:{self.count}x{self.interval:.3f}:{self.columns}:{self.tileWidth}x{self.tileHeight}"
+
+    def video_filter(self) -> str:
+        """ffmpeg filter graph sampling one frame per interval into a single tiled image."""
+        w, h = self.tileWidth, self.tileHeight
+        return (
+            f"fps=1/{self.interval:.3f},"
+            f"scale={w}:{h}:force_original_aspect_ratio=decrease,"
+            f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,"
+            f"tile={self.columns}x{self.rows}"
+        )
+
+    def to_webvtt(self, image_url: str) -> str:
+        """WebVTT thumbnail track, each cue points to its tile with a `#xywh=` media fragment."""
+        lines = ["WEBVTT", ""]
+        for index in range(self.count):
+            start = index * self.interval
+            end = min((index + 1) * self.interval, self.duration)
+            if end <= start:
+                break
+            x = (index % self.columns) * self.tileWidth
+            y = (index // self.columns) * self.tileHeight
+            lines += [
+                f"{_vtt_timestamp(start)} --> {_vtt_timestamp(end)}",
+                f"{image_url}#xywh={x},{y},{self.tileWidth},{self.tileHeight}",
+                "",
+            ]
+        return "\n".join(lines)
+
+
+def _vtt_timestamp(seconds: float) -> str:
+    milliseconds = round(seconds * 1000)
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:03d}"
@@ -1,17 +1,23 @@
 import asyncio
 from functools import lru_cache
 import os
-from typing import AsyncGenerator
+from typing import AsyncGenerator, AsyncIterator
 from bson import ObjectId
 from fastapi.concurrency import run_in_threadpool
 from pymongo import UpdateOne
 from pymongo.errors import BulkWriteError
+from pymongo.results import BulkWriteResult
+from src.config import get_settings
 from src.db.models.Video_model import VideoModel
 from src.errors import DatabaseOperationError, FileBrowseError, InputValidationError
 from src.logger import get_logger
+from src.resolvers.library_scanner import get_library_scanner
 from src.resolvers.resolver_utils import resolver_utils
-from src.resolvers.thumbnail_resolver import get_thumbnail_resolver
+from src.resolvers.media_worker import MediaPriority, get_media_worker
+from src.resolvers.thumbnail_resolver import needs_probe
+from src.resolvers.video_metadata_cache import get_video_metadata_cache
 from src.schema.types.fileBrowse_type import BatchOperationStatus, BatchResultType, DirectoryVideosBatchOperationInput, VideosBatchOperationInput, VideosBatchOperationResult
+from src.schema.types.library_scan_type import LibraryScanStatus
 from src.schema.types.pydantic_types.batch_operation_type import TagsOperationMappingInputModel
 
 
@@ -55,7 +61,7 @@ class SubscriptionResolver:
         if update:
             async for status in self._batch_update(
                 videoIDs=validated_input.videoIds,
-                fileEntries=None,
+                fileEntryChunks=None,
                 author=validated_input.author, 
                 tagsOperation=validated_input.tagsOperation,
             ):
@@ -63,7 +69,7 @@ class SubscriptionResolver:
         else:
             async for status in self._batch_delete(
                 videoIds=validated_input.videoIds,
-                fileEntries=None
+                fileEntryChunks=None
             ):
                 yield status
 
@@ -85,41 +91,56 @@ class SubscriptionResolver:
             raise InputValidationError(field="DirectoryVideosBatchOperationInput", issue="Invalid input data for batch updating directory videos")
         
         dir_path = resolver_utils().get_absolute_resource_path(validated_input.relativePath)
-        entries = await run_in_threadpool(resolver_utils().get_all_video_entries_in_directory, dir_path)
+        chunk_size = get_settings().directory_batch_chunk_size
+        # the walk runs along the batch: each chunk is written before the next one is read
+        entry_chunks = resolver_utils().iter_video_entries_in_directory(dir_path, chunk_size)
 
         yield self.constructBatchOperationStatus(
-            status=f"Found {len(entries)} video entries in directory '{validated_input.relativePath.relativePath}' for batch update"
+            status=f"Scanning directory '{validated_input.relativePath.relativePath}' for batch update, {chunk_size} video entries at a time"
         )
         
         if update:
             async for status in self._batch_update(
                 None,
-                entries,
+                entry_chunks,
                 validated_input.author,
                 validated_input.tagsOperation
             ):
                 yield status
         else:
-            async for status in self._batch_delete(None, entries):
+            async for status in self._batch_delete(None, entry_chunks):
                 yield status
 
-    async def _batch_delete(self, videoIds: list[str],
-                            fileEntries: list[os.DirEntry[str]] | None) -> AsyncGenerator[BatchOperationStatus, None]:
+    async def resolve_library_scan_progress(self) -> AsyncGenerator[LibraryScanStatus, None]:
+        """
+        Resolve function to follow the background library scan.
+
+        :return: An asynchronous generator yielding the status of the scan now, then after every batch until it ends.
+        :rtype: AsyncGenerator[LibraryScanStatus, None]
+        """
+        async for scan in get_library_scanner().watch():
+            yield LibraryScanStatus.from_mongoDB(scan)
+
+    async def _batch_delete(self, videoIds: list[str] | None,
+                            fileEntryChunks: AsyncIterator[list[os.DirEntry[str]]] | None) -> AsyncGenerator[BatchOperationStatus, None]:
         """
         Batch delete videos based on provided video IDs or paths.
 
         :param videoIds: List of video IDs to delete.
-        :param fileEntries: List of file entries to delete.
+        :param fileEntryChunks: Chunks of file entries to delete, each chunk is deleted before the next one is read.
         :return: Number of documents deleted.
         """
-        if not videoIds and not fileEntries:
+        if not videoIds and fileEntryChunks is None:
             yield self.constructBatchOperationStatus(
                 resultType=BatchResultType.Failure,
                 message="No video IDs or file entries provided for batch delete"
             )
         
+        deleted_count = 0
+        requested_count = 0
         try:
             if videoIds is not None:
+                requested_count = len(videoIds)
                 videos = await VideoModel.find_many(
                     {"_id": {"$in": [ObjectId(str(vid)) for vid in videoIds]}}
                 ).to_list()
@@ -127,6 +148,7 @@ class SubscriptionResolver:
                 result = await VideoModel.get_pymongo_collection().delete_many(
                     {"_id": {"$in": [ObjectId(str(vid)) for vid in videoIds]}}
                 )
+                deleted_count = result.deleted_count
                 yield self.constructBatchOperationStatus(
                     status=f"Deleted {result.deleted_count} videos based on IDs"
                 )
@@ -138,29 +160,39 @@ class SubscriptionResolver:
                 await self._remove_videos_and_update_tags(actually_deleted)
 
             else:
-                # delete by paths
-                paths = [resolver_utils().to_host_path(fe.path) for fe in fileEntries]
-                videos_before_delete = await VideoModel.find_many(
-                    {"path": {"$in": paths}}
-                ).to_list()
-                result = await VideoModel.get_pymongo_collection().delete_many(
-                    {"path": {"$in": paths}}
-                )
-                yield self.constructBatchOperationStatus(
-                    status=f"Deleted {result.deleted_count} videos based on paths"
-                )
-                videos_not_deleted = await VideoModel.find_many(
-                    {"path": {"$in": paths}}
-                ).to_list()
-                not_deleted_paths = {v.path for v in videos_not_deleted}
-                actually_deleted = [v for v in videos_before_delete if v.path not in not_deleted_paths]
-                await self._remove_videos_and_update_tags(actually_deleted)
+                async for fileEntries in fileEntryChunks:
+                    requested_count += len(fileEntries)
+                    # delete by paths
+                    paths = [resolver_utils().to_host_path(fe.path) for fe in fileEntries]
+                    videos_before_delete = await VideoModel.find_many(
+                        {"path": {"$in": paths}}
+                    ).to_list()
+                    result = await VideoModel.get_pymongo_collection().delete_many(
+                        {"path": {"$in": paths}}
+                    )
+                    deleted_count += result.deleted_count
+                    yield self.constructBatchOperationStatus(
+                        status=f"Deleted {result.deleted_count} videos based on paths ({requested_count} video entries found so far)"
+                    )
+                    videos_not_deleted = await VideoModel.find_many(
+                        {"path": {"$in": paths}}
+                    ).to_list()
+                    not_deleted_paths = {v.path for v in videos_not_deleted}
+                    actually_deleted = [v for v in videos_before_delete if v.path not in not_deleted_paths]
+                    await self._remove_videos_and_update_tags(actually_deleted)
+
+                if requested_count == 0:
+                    yield self.constructBatchOperationStatus(
+                        resultType=BatchResultType.Failure,
+                        message="No video entries found for batch delete"
+                    )
+                    return
             
             yield self.constructBatchOperationStatus(
-                resultType=BatchResultType.Success if (result.deleted_count == len(videoIds) if videoIds else result.deleted_count == len(fileEntries)) else \
-                        BatchResultType.PartialSuccess if result.deleted_count > 0 
+                resultType=BatchResultType.Success if deleted_count == requested_count else \
+                        BatchResultType.PartialSuccess if deleted_count > 0 
                         else BatchResultType.Failure,
-                message=f"Deleted {result.deleted_count} out of {(len(videoIds) if videoIds else len(fileEntries))} videos" if result.deleted_count > 0 else None
+                message=f"Deleted {deleted_count} out of {requested_count} videos" if deleted_count > 0 else None
             )
 
         except FileBrowseError:
@@ -170,34 +202,36 @@ class SubscriptionResolver:
             raise DatabaseOperationError("batch_delete", "general_failure")
 
     async def _batch_update(self, videoIDs: list[str] | None,
-                            fileEntries: list[os.DirEntry[str]] | None,
+                            fileEntryChunks: AsyncIterator[list[os.DirEntry[str]]] | None,
                             author: str | None,
                             tagsOperation: TagsOperationMappingInputModel) -> AsyncGenerator[BatchOperationStatus, None]:
         """
         Batch update videos' metadata based on provided video IDs or paths.
         Uses upsert for path-based queries to create new documents if they don't exist.
+        File entries are processed chunk by chunk, each chunk is written before the next one is read,
+        and a single result is yielded at the end.
 
         :param videoIDs: List of video IDs to update.
-        :param fileEntries: List of file entries to update.
+        :param fileEntryChunks: Chunks of file entries to update.
         :param author: New author name to set (if provided).
         :param tagsOperation: Tags operation to append or remove.
-        :param findById: If True, treat videos as IDs; if False, treat as paths (with upsert).
         :return: Number of documents modified or upserted.
         """
-        if not videoIDs and not fileEntries:
+        if not videoIDs and fileEntryChunks is None:
             yield self.constructBatchOperationStatus(
                 resultType=BatchResultType.Failure,
                 message="No video IDs or file entries provided for batch update"
             )
 
         successful_updates = 0
-        operations = []
-        update_tags: dict[str, tuple[int, bool]] = {}
+        total_operations = 0
         no_need_update_flag = False
 
         try:
             if videoIDs is not None:
                 # find by IDs
+                operations: list[UpdateOne] = []
+                update_tags: dict[str, tuple[int, bool]] = {}
                 video_models = await VideoModel.find_many(
                     {"_id": {"$in": [ObjectId(str(vid)) for vid in videoIDs]}}
                 ).to_list()
@@ -214,61 +248,82 @@ class SubscriptionResolver:
                     status=f"Prepared update operations for {len(video_models)} existing videos based on IDs"
                 )
 
-            else:
-                # find by paths with upsert
-                paths = [resolver_utils().to_host_path(fe.path) for fe in fileEntries]
-                video_models = await VideoModel.find_many(
-                    {"path": {"$in": paths}}
-                ).to_list()
-                existing_paths = {vm.path for vm in video_models}
-
-                # process existing documents
-                no_need_update_flag = await self._update_existing_videos_operations(
-                    video_models, 
-                    findById=False, 
-                    author=author, 
-                    tagsOperation=tagsOperation, 
-                    update_tags=update_tags, 
-                    operations=operations, 
-                    no_need_update_flag=no_need_update_flag
-                )
-
-                # process new documents in parallel with ffprobe duration extraction
-                new_entries = [
-                    entry for entry in fileEntries
-                    if resolver_utils().to_host_path(entry.path) not in existing_paths
-                ]
-
-                if new_entries:
-                    new_operations = await asyncio.gather(*[
-                        resolver_utils().process_new_video_entry(
-                            entry=entry, 
-                            author=author, 
-                            tagsOperation=tagsOperation, 
-                            update_tags=update_tags,
-                        )
-                        for entry in new_entries
-                    ])
-                    operations.extend(new_operations)
+                result = await self._execute_update_operations(video_models, operations, update_tags)
+                if result is not None:
+                    successful_updates += result.modified_count + result.upserted_count
+                    total_operations += len(operations)
                     yield self.constructBatchOperationStatus(
-                        status=f"Prepared update operations for {len(video_models)} existing videos and {len(new_entries)} new videos based on paths"
+                        status=f"Executed batch update operations: {result.modified_count} modified, {result.upserted_count} upserted"
                     )
 
-            if operations:
-                result = await VideoModel.get_pymongo_collection().bulk_write(operations)
-                successful_updates = result.modified_count + result.upserted_count
+            else:
+                found_entries = 0
+                async for fileEntries in fileEntryChunks:
+                    found_entries += len(fileEntries)
+                    operations: list[UpdateOne] = []
+                    update_tags: dict[str, tuple[int, bool]] = {}
+
+                    # find by paths with upsert
+                    paths = [resolver_utils().to_host_path(fe.path) for fe in fileEntries]
+                    video_models = await VideoModel.find_many(
+                        {"path": {"$in": paths}}
+                    ).to_list()
+                    existing_paths = {vm.path for vm in video_models}
+
+                    # process existing documents
+                    chunk_up_to_date = await self._update_existing_videos_operations(
+                        video_models, 
+                        findById=False, 
+                        author=author, 
+                        tagsOperation=tagsOperation, 
+                        update_tags=update_tags, 
+                        operations=operations, 
+                        no_need_update_flag=False
+                    )
+                    no_need_update_flag = no_need_update_flag or chunk_up_to_date
+
+                    # process new documents in parallel with duration extraction
+                    new_entries = [
+                        entry for entry in fileEntries
+                        if resolver_utils().to_host_path(entry.path) not in existing_paths
+                    ]
+
+                    if new_entries:
+                        new_operations = await asyncio.gather(*[
+                            resolver_utils().process_new_video_entry(
+                                entry=entry, 
+                                author=author, 
+                                tagsOperation=tagsOperation, 
+                                update_tags=update_tags,
+                            )
+                            for entry in new_entries
+                        ])
+                        operations.extend(new_operations)
+                    yield self.constructBatchOperationStatus(
+                        status=f"Prepared update operations for {len(video_models)} existing videos and {len(new_entries)} new videos based on paths ({found_entries} video entries found so far)"
+                    )
 
-                yield self.constructBatchOperationStatus(
-                    status=f"Executed batch update operations: {result.modified_count} modified, {result.upserted_count} upserted"
-                )
+                    result = await self._execute_update_operations(video_models, operations, update_tags)
+                    if result is not None:
+                        successful_updates += result.modified_count + result.upserted_count
+                        total_operations += len(operations)
+                        yield self.constructBatchOperationStatus(
+                            status=f"Executed batch update operations: {result.modified_count} modified, {result.upserted_count} upserted"
+                        )
 
-                await resolver_utils().update_tag_counts(update_tags=update_tags)
+                if found_entries == 0:
+                    yield self.constructBatchOperationStatus(
+                        resultType=BatchResultType.Failure,
+                        message="No video entries found for batch update"
+                    )
+                    return
 
+            if total_operations:
                 yield self.constructBatchOperationStatus(
-                    resultType=BatchResultType.Success if successful_updates == len(operations) else \
+                    resultType=BatchResultType.Success if successful_updates == total_operations else \
                             BatchResultType.PartialSuccess if successful_updates > 0 else \
                             BatchResultType.Failure,
-                    message=f"{successful_updates} out of {len(operations)} updates succeeded" if successful_updates > 0 else None
+                    message=f"{successful_updates} out of {total_operations} updates succeeded" if successful_updates > 0 else None
                 )
             elif no_need_update_flag:
                 yield self.constructBatchOperationStatus(
@@ -283,6 +338,34 @@ class SubscriptionResolver:
             logger.error(f"Error during batch update: {e}")
             raise DatabaseOperationError("batch_update", "general_failure")
 
+    async def _execute_update_operations(self, video_models: list[VideoModel],
+                                         operations: list[UpdateOne],
+                                         update_tags: dict[str, tuple[int, bool]]) -> BulkWriteResult | None:
+        """
+        Write the prepared operations of a batch (or of one chunk of it) and update the tag counts.
+
+        :return: The bulk write result, None if there was nothing to write.
+        """
+        # missing thumbnails and technical metadata are filled by the media worker, not inline
+        get_media_worker().enqueue(
+            [
+                str(vm.id) for vm in video_models
+                if vm.thumbnail is None or needs_probe(vm.duration, vm.container)
+            ],
+            MediaPriority.IMPORTED
+        )
+        if not operations:
+            return None
+
+        result = await VideoModel.get_pymongo_collection().bulk_write(operations)
+        get_video_metadata_cache().invalidate(*[str(vm.id) for vm in video_models])
+        get_media_worker().enqueue(
+            [str(upserted_id) for upserted_id in result.upserted_ids.values()],
+            MediaPriority.IMPORTED
+        )
+        await resolver_utils().update_tag_counts(update_tags=update_tags)
+        return result
+
     async def _update_existing_videos_operations(self, video_models: list[VideoModel], 
                                                 findById: bool,
                                                 author: str | None,
@@ -302,20 +385,13 @@ class SubscriptionResolver:
                 tags_set = set(tagsOperation.tags)
                 if tagsOperation.append:
                     new_tags = old_tags.union(tags_set)
-                    resolver_utils()._track_tag_change(update_tags, new_tags - old_tags, True)
+                    resolver_utils().track_tag_change(update_tags, new_tags - old_tags, True)
                 else:
                     new_tags = old_tags - tags_set
-                    resolver_utils()._track_tag_change(update_tags, old_tags.intersection(tags_set), False)
+                    resolver_utils().track_tag_change(update_tags, old_tags.intersection(tags_set), False)
                 if new_tags != old_tags:
                     update_query["tags"] = list(new_tags)
 
-            if video_model.duration is None or video_model.duration == 0.0:
-                duration = await get_thumbnail_resolver().get_video_duration(
-                    resolver_utils().to_mounted_path(video_model.path)
-                )     
-                if duration is not None and duration > 0.0:
-                    update_query["duration"] = duration
-
             if update_query:
                 operations.append(UpdateOne(filter_query, {"$set": update_query}))
         
@@ -325,12 +401,16 @@ class SubscriptionResolver:
         return no_need_update_flag
     
     async def _remove_videos_and_update_tags(self, actually_deleted: list[VideoModel]):
+        get_video_metadata_cache().invalidate(*[str(v.id) for v in actually_deleted])
         paths_to_delete = [resolver_utils().to_mounted_path(v.path) for v in actually_deleted]
         await run_in_threadpool(resolver_utils().remove_videos_by_paths, paths_to_delete)
+        await resolver_utils().update_directory_aggregates(
+            [(video.path, -video.size, -1, 0.0) for video in actually_deleted]
+        )
 
         update_tags: dict[str, tuple[int, bool]] = {}
         for video in actually_deleted:
-            resolver_utils()._track_tag_change(update_tags, set(video.tags or []), False)
+            resolver_utils().track_tag_change(update_tags, set(video.tags or []), False)
         if update_tags:
             await resolver_utils().update_tag_counts(update_tags=update_tags)
 
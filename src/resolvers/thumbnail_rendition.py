@@ -0,0 +1,81 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+from src.config import ThumbnailCacheConfig, get_settings
+from src.resolvers.http_utils import accepts_media_type
+from src.resolvers.thumbnail_store import ThumbnailStore
+
+
+class ThumbnailRendition(BaseModel):
+    """One stored thumbnail file: a named size variant encoded in one image format."""
+    variant: str
+    width: int
+    quality: int
+    format: Literal["jpeg", "webp"] = "jpeg"
+
+    @property
+    def tag(self) -> str:
+        # the encoding settings are part of the tag: a config change renders new files instead of serving old bytes
+        return f"{self.variant}-{self.width}w-q{self.quality}.{self.format}"
+
+    @property
+    def media_type(self) -> str:
+        return f"image/{self.format}"
+
+    @property
+    def extension(self) -> str:
+        return "jpg" if self.format == "jpeg" else self.format
+
+    def encoder_args(self) -> list[str]:
+        """ffmpeg output options for this rendition."""
+        if self.format == "webp":
+            return ["-c:v", "libwebp", "-quality", str(self.quality), "-f", "webp"]
+        # mjpeg qscale goes from 2 (best) to 31 (worst)
+        qscale = round(2 + (100 - self.quality) * 29 / 99)
+        return ["-c:v", "mjpeg", "-q:v", str(qscale), "-f", "image2"]
+
+    def scale_filter(self) -> str:
+        # never upscale, keep an even height for the encoders
+        return f"scale=w='min({self.width},iw)':h=-2"
+
+
+def list_renditions() -> list[ThumbnailRendition]:
+    """Every configured variant, in JPEG and, if enabled, WebP. All of them are rendered from one frame."""
+    thumbnail_cache = get_settings().thumbnail_cache
+    formats = ["jpeg", "webp"] if thumbnail_cache.webp else ["jpeg"]
+    return [
+        ThumbnailRendition(variant=name, width=variant.width, quality=variant.quality, format=image_format)
+        for name, variant in thumbnail_cache.variants.items()
+        for image_format in formats
+    ]
+
+
+def negotiate_rendition(variant: str | None, accept: str | None) -> ThumbnailRendition | None:
+    """
+    Pick the rendition for a request: the named variant (the default one if omitted), in WebP only
+    when the client explicitly accepts `image/webp`.
+
+    :return: None if the variant is unknown
+    """
+    thumbnail_cache = get_settings().thumbnail_cache
+    variant = variant or thumbnail_cache.default_variant
+    accepts_webp = thumbnail_cache.webp and accepts_media_type(accept, "image/webp")
+    image_format = "webp" if accepts_webp else "jpeg"
+    return next(
+        (r for r in list_renditions() if r.variant == variant and r.format == image_format),
+        None
+    )
+
+
+def rendition_key(path: str, last_modify_time: float, size: float, rendition: ThumbnailRendition) -> str:
+    """
+    Store key of a rendition. The default variant in JPEG keeps the plain file identity key, which is
+    also the key persisted on `VideoModel.thumbnail`, as long as it is rendered with the shipped width
+    and quality: those are the settings the files stored under that key were always rendered with.
+    """
+    shipped = ThumbnailCacheConfig().variants.get(rendition.variant)
+    if rendition.variant == get_settings().thumbnail_cache.default_variant and rendition.format == "jpeg" \
+            and shipped is not None and (rendition.width, rendition.quality) == (shipped.width, shipped.quality):
+        return ThumbnailStore.make_key(path, last_modify_time, size)
+    return ThumbnailStore.make_key(f"{path}#{rendition.tag}", last_modify_time, size)
@@ -1,111 +1,449 @@
 import asyncio
+from contextlib import asynccontextmanager
 from functools import lru_cache
+import json
 import os
-import subprocess
-from fastapi import HTTPException
+import shutil
+import signal
+import tempfile
+from typing import Awaitable, Callable, Hashable, TypeVar
 from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
 
 from src.config import get_settings
+from src.errors import MediaProcessError
 from src.logger import get_logger
-
-# Limit concurrent ffmpeg/ffprobe processes to avoid resource exhaustion
-_process_semaphore = asyncio.Semaphore(
-    max(
-        get_settings().ffmpeg_semaphore_limit, 
-        os.cpu_count() // 2
-    )
-)
+from src.resolvers.container_header import read_header_duration
+from src.resolvers.frame_selection import build_frame_sampling_command, pick_representative, sample_timestamps
+from src.resolvers.hover_preview import HoverPreviewSpec
+from src.resolvers.process_limiter import get_process_limiter
+from src.resolvers.storyboard import StoryboardLayout
+from src.resolvers.thumbnail_rendition import ThumbnailRendition
 
 logger = get_logger("thumbnail_resolver")
 
+T = TypeVar("T")
+
+# Length of the packet window read by ffprobe to measure the keyframe interval
+KEYFRAME_PROBE_SECONDS = 30
+
+# Thumbnail timestamp when the duration of the video is not known yet
+DEFAULT_THUMBNAIL_SEEK_SECONDS = 10
+
+
+class VideoProbeResult(BaseModel):
+    """Technical metadata of a video file, persisted on VideoModel so files are probed only once."""
+    duration: float = 0.0
+    container: str | None = None
+    videoCodec: str | None = None
+    audioCodec: str | None = None
+    width: int | None = None
+    height: int | None = None
+    bitrate: int | None = None  # bits per second
+    keyframeInterval: float | None = None  # seconds
+
+    @classmethod
+    def from_ffprobe(cls, probe_output: dict) -> "VideoProbeResult":
+        format_info = probe_output.get("format") or {}
+        streams = probe_output.get("streams") or []
+        video_stream = next((st for st in streams if st.get("codec_type") == "video"), {})
+        audio_stream = next((st for st in streams if st.get("codec_type") == "audio"), {})
+
+        keyframe_times = sorted(
+            float(packet["pts_time"])
+            for packet in probe_output.get("packets") or []
+            if packet.get("stream_index") == video_stream.get("index")
+            and "K" in packet.get("flags", "")
+            and packet.get("pts_time") not in (None, "N/A")
+        )
+        intervals = [b - a for a, b in zip(keyframe_times, keyframe_times[1:]) if b > a]
+
+        return cls(
+            duration=_to_number(format_info.get("duration"), float) or 0.0,
+            container=format_info.get("format_name"),
+            videoCodec=video_stream.get("codec_name"),
+            audioCodec=audio_stream.get("codec_name"),
+            width=video_stream.get("width"),
+            height=video_stream.get("height"),
+            bitrate=_to_number(format_info.get("bit_rate"), int),
+            keyframeInterval=round(sorted(intervals)[len(intervals) // 2], 3) if intervals else None,
+        )
+
+    def to_update_query(self) -> dict:
+        """Fields to $set on the VideoModel document."""
+        return self.model_dump()
+
+
+def _to_number(value, number_type):
+    try:
+        return number_type(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def needs_probe(duration: float | None, container: str | None) -> bool:
+    """A video needs probing until both its duration and its technical metadata are known."""
+    return duration is None or duration == 0.0 or container is None
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls sharing the same key into a single in-flight task.
+
+    Every caller awaits the same task and gets its result or exception. The task is only
+    cancelled once all of its callers have been cancelled.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        flight = self._in_flight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()))
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done() and flight.waiters == 1:
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key: Hashable, flight: "_Flight") -> None:
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        if not flight.task.cancelled():
+            # avoid "exception was never retrieved" when every waiter has gone
+            flight.task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "spawnsSaved": self.coalesced,
+            "inFlight": len(self._in_flight),
+        }
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
 class ThumbnailResolver:
 
-    async def generate_thumbnail(self, video_path: str, with_duration: bool = True):
-        async with _process_semaphore:
-            return await run_in_threadpool(
-                self._generate_thumbnail,
-                video_path,
-                with_duration
-            )
-    
-    async def get_video_duration(self, video_path: str) -> float:
-        async with _process_semaphore:
-            try:
-                return await run_in_threadpool(
-                    self._get_video_duration,
-                    video_path
-                )
-            except Exception as e:
-                logger.warning(f"Failed to get duration for {video_path}: {e}")
-                return 0.0
+    def __init__(self):
+        # concurrent requests for the same file share one ffmpeg/ffprobe process
+        self._single_flight = SingleFlight()
+        self.header_duration_hits = 0
+        self.header_duration_misses = 0
 
+    async def generate_thumbnail(
+        self,
+        video_path: str,
+        renditions: list[ThumbnailRendition],
+        duration: float | None = None,
+        timestamp: float | None = None
+    ) -> dict[str, bytes]:
+        """
+        Generate thumbnails from video using ffmpeg, every rendition (size variant and format)
+        from the same frame, in a single ffmpeg pass. The frame is taken at `timestamp` if given
+        (see `select_representative_frame`), otherwise at a fraction of the known duration,
+        or 10 seconds into the video when the duration is unknown.
+
+        Only called from the background media worker, so a failure raises `MediaProcessError` rather than an HTTP error.
 
-    def _generate_thumbnail(self, video_path: str, with_duration: bool = True):
+        :return: The encoded images by rendition tag
         """
-        Generate a thumbnail from video using ffmpeg sync API.
-        Captures a frame at 10 seconds into the video.
+        ss = timestamp if timestamp is not None else thumbnail_seek_target(duration)
+        return await self._single_flight.do(
+            ("thumbnail", video_path, tuple(r.tag for r in renditions)),
+            lambda: self._generate_thumbnail(video_path, renditions, ss)
+        )
+
+    async def select_representative_frame(self, video_path: str, duration: float) -> float | None:
         """
-        try:
-            return self._generate_thumbnail_process(video_path, ss=10)
-        except Exception as e:
-            logger.error(f"Error generating thumbnail at 10s for {video_path}: {e}")
-            # If seeking to 10s fails (video too short), try at 0s
-            try:
-                return self._generate_thumbnail_process(video_path, ss=0)
-            except Exception as e2:
-                logger.error(f"Error generating thumbnail at 0s for {video_path}: {e2}")
-                raise HTTPException(status_code=500, detail="Failed to generate thumbnail")
+        Sample a few keyframes spread over the video in one ffmpeg pass and return the timestamp of the
+        most informative one, so thumbnails skip black intros, fades and logo cards.
 
+        :return: None if the video cannot be sampled, the caller then falls back to the fixed position
+        """
+        return await self._single_flight.do(
+            ("frame_selection", video_path),
+            lambda: self._select_representative_frame(video_path, duration)
+        )
 
-    def _generate_thumbnail_process(self, video_path: str, ss: float) -> bytes:
+    async def generate_storyboard(self, video_path: str, layout: StoryboardLayout) -> bytes:
         """
-        Construct an FFmpeg command to generate a thumbnail from the video at the specified timestamp.
+        Render a storyboard sprite sheet (one tile per `layout.interval` seconds) in a single ffmpeg pass.
+        Only keyframes are decoded, so the pass costs a fraction of a full decode.
+        Only called from the background media worker, so a failure raises `MediaProcessError` rather than an HTTP error.
         """
+        return await self._single_flight.do(
+            ("storyboard", video_path, layout.identity),
+            lambda: self._generate_storyboard(video_path, layout)
+        )
+
+    async def generate_preview(self, video_path: str, spec: HoverPreviewSpec) -> bytes:
+        """
+        Render a hover preview clip. Only called from the background media worker, so a failure
+        raises `MediaProcessError` rather than an HTTP error.
+        """
+        return await self._single_flight.do(
+            ("preview", video_path, spec.identity),
+            lambda: self._generate_preview(video_path, spec)
+        )
+
+    async def get_video_duration(self, video_path: str) -> float:
+        probe_result = await self.quick_probe(video_path)
+        return probe_result.duration if probe_result else 0.0
+
+    async def quick_probe(self, video_path: str) -> VideoProbeResult | None:
+        """
+        Read the duration from the container header (MP4/MOV/M4V, MKV/WebM) without spawning a process,
+        falling back to a full `probe_video` for other formats or unusable headers.
+        A header-only result leaves the technical fields empty, so `needs_probe` still reports the video.
+        """
+        duration = await run_in_threadpool(read_header_duration, video_path)
+        if duration is not None:
+            self.header_duration_hits += 1
+            return VideoProbeResult(duration=duration)
+        self.header_duration_misses += 1
+        return await self.probe_video(video_path)
+
+    async def probe_video(self, video_path: str) -> VideoProbeResult | None:
+        """
+        Probe duration, container, codecs, resolution, bitrate and keyframe interval with a single ffprobe call.
+        Returns None if the file cannot be probed.
+        """
+        return await self._single_flight.do(
+            ("probe", video_path),
+            lambda: self._probe_video_with_limit(video_path)
+        )
+
+    def stats(self) -> dict:
+        return {
+            "singleFlight": self._single_flight.stats(),
+            "headerDurationHits": self.header_duration_hits,
+            "headerDurationMisses": self.header_duration_misses,
+        }
+
+    async def _generate_thumbnail(
+        self, video_path: str, renditions: list[ThumbnailRendition], ss: float
+    ) -> dict[str, bytes]:
+        async with get_process_limiter().slot("thumbnail"):
+            try:
+                return await self._generate_thumbnail_process(video_path, ss, renditions)
+            except MediaProcessError as e:
+                logger.error(f"Error generating thumbnail at {ss}s for {video_path}: {e}")
+                if ss == 0:
+                    raise
+                # If seeking fails (unknown duration and video too short), try at 0s
+                try:
+                    return await self._generate_thumbnail_process(video_path, 0, renditions)
+                except MediaProcessError as e2:
+                    logger.error(f"Error generating thumbnail at 0s for {video_path}: {e2}")
+                    raise
+
+    async def _generate_storyboard(self, video_path: str, layout: StoryboardLayout) -> bytes:
         command = [
             "ffmpeg",
             "-loglevel", "error",
-            "-ss", str(ss),
+            "-skip_frame", "nokey",
             "-i", video_path,
+            "-an",
+            "-vf", layout.video_filter(),
             "-frames:v", "1",
             "-f", "image2",
             "-vcodec", "mjpeg",
-            "-vf", "scale=320:-1",
             "pipe:1"
         ]
+        async with get_process_limiter().slot("storyboard"):
+            image_data = await run_process(command, timeout=get_settings().storyboard.timeout)
+        if not image_data:
+            raise MediaProcessError(command[0], "no storyboard produced")
+        return image_data
 
-        process = subprocess.run(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            check=True
-        )
-        image_data = process.stdout
+    async def _select_representative_frame(self, video_path: str, duration: float) -> float | None:
+        timestamps = sample_timestamps(duration, get_settings().thumbnail_cache.representative_samples)
+        if not timestamps:
+            return None
+        command = build_frame_sampling_command(video_path, timestamps)
+        # one slot for all samples: the inputs are decoded one after the other by the concat filter
+        async with get_process_limiter().slot("frame_selection"):
+            try:
+                frames = await run_process(command, timeout=get_settings().ffmpeg_timeout)
+            except MediaProcessError as e:
+                logger.warning(f"Representative frame selection failed for {video_path}: {e}")
+                return None
+        return pick_representative(frames, timestamps)
 
-        if not image_data:
-            raise HTTPException(status_code=500, detail="Failed to generate thumbnail")
+    async def _generate_preview(self, video_path: str, spec: HoverPreviewSpec) -> bytes:
+        async with get_process_limiter().slot("preview"):
+            async with _temporary_directory("preview-") as output_dir:
+                output_path = os.path.join(output_dir, f"preview.{spec.extension}")
+                command = spec.build_command(video_path, output_path)
+                await run_process(command, timeout=get_settings().preview.timeout)
+                clip_data = await run_in_threadpool(_read_output, output_path)
+        if not clip_data:
+            raise MediaProcessError(command[0], "no preview clip produced")
+        return clip_data
 
-        return image_data
+    async def _probe_video_with_limit(self, video_path: str) -> VideoProbeResult | None:
+        async with get_process_limiter().slot("probe"):
+            try:
+                probe_output = await self._probe_video(video_path)
+                return VideoProbeResult.from_ffprobe(probe_output)
+            except Exception as e:
+                logger.warning(f"Failed to probe {video_path}: {e}")
+                return None
 
-    def _get_video_duration(self, video_path: str) -> float:
+    async def _generate_thumbnail_process(
+        self, video_path: str, ss: float, renditions: list[ThumbnailRendition]
+    ) -> dict[str, bytes]:
         """
-        Get the duration of the video in seconds using ffprobe.
+        Run the FFmpeg command built by `build_thumbnail_command` and read back one image per rendition.
+        """
+        async with _temporary_directory("thumbnail-") as output_dir:
+            output_paths = [os.path.join(output_dir, f"{i}.{r.extension}") for i, r in enumerate(renditions)]
+            command = build_thumbnail_command(
+                video_path, ss, renditions, output_paths, fast_seek=get_settings().thumbnail_cache.fast_seek
+            )
+
+            await run_process(command, timeout=get_settings().ffmpeg_timeout)
+
+            outputs = await run_in_threadpool(lambda: [_read_output(path) for path in output_paths])
+
+        images = {}
+        for rendition, image in zip(renditions, outputs):
+            if not image:
+                # e.g. seeking past the end of a short video
+                raise MediaProcessError(command[0], f"no frame produced for {rendition.tag}")
+            images[rendition.tag] = image
+        return images
+
+    async def _probe_video(self, video_path: str) -> dict:
+        """
+        Run ffprobe once with JSON output: format and stream information, plus the packets of the
+        first seconds of the file (read without decoding) to measure the keyframe interval.
         """
         cmd = [
             "ffprobe",
             "-v", "error",
-            "-select_streams", "v:0",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
+            "-print_format", "json",
+            "-show_entries",
+            "format=duration,bit_rate,format_name"
+            ":stream=index,codec_type,codec_name,width,height"
+            ":packet=stream_index,pts_time,flags",
+            "-read_intervals", f"%+{KEYFRAME_PROBE_SECONDS}",
             video_path
         ]
 
-        result = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            check=True
+        return json.loads(await run_process(cmd, timeout=get_settings().ffmpeg_timeout))
+
+
+@asynccontextmanager
+async def _temporary_directory(prefix: str):
+    """`tempfile.TemporaryDirectory` for ffmpeg outputs, created and removed off the event loop."""
+    path = await run_in_threadpool(tempfile.mkdtemp, prefix=prefix)
+    try:
+        yield path
+    finally:
+        await run_in_threadpool(shutil.rmtree, path, ignore_errors=True)
+
+
+def _read_output(path: str) -> bytes:
+    """Blocking, the bytes ffmpeg wrote to `path`, empty if it wrote nothing."""
+    try:
+        with open(path, "rb") as output_file:
+            return output_file.read()
+    except OSError:
+        return b""
+
+
+def thumbnail_seek_target(duration: float | None) -> float:
+    """Timestamp of the thumbnail frame: a fraction of the known duration, 10 s into the video otherwise."""
+    if duration is not None and duration > 0:
+        return round(duration * get_settings().thumbnail_cache.seek_fraction, 3)
+    return DEFAULT_THUMBNAIL_SEEK_SECONDS
+
+
+def build_thumbnail_command(
+    video_path: str, ss: float, renditions: list[ThumbnailRendition], output_paths: list[str], fast_seek: bool
+) -> list[str]:
+    """
+    FFmpeg command decoding one frame at `ss` and encoding it once per rendition:
+    the frame is split, scaled and written to one output file per rendition.
+
+    With `fast_seek`, ffmpeg jumps to the keyframe at or before `ss` and decodes nothing else
+    (`-noaccurate_seek`, `-skip_frame nokey`), instead of decoding every frame from that keyframe up to `ss`.
+    """
+    filter_graph = f"[0:v]split={len(renditions)}" + "".join(f"[s{i}]" for i in range(len(renditions)))
+    for i, rendition in enumerate(renditions):
+        filter_graph += f";[s{i}]{rendition.scale_filter()}[o{i}]"
+
+    command = ["ffmpeg", "-loglevel", "error"]
+    if fast_seek:
+        command += ["-skip_frame", "nokey", "-noaccurate_seek"]
+    command += ["-ss", str(ss), "-i", video_path, "-filter_complex", filter_graph]
+    for i, (rendition, output_path) in enumerate(zip(renditions, output_paths)):
+        command += ["-map", f"[o{i}]", "-frames:v", "1", *rendition.encoder_args(), output_path]
+    return command
+
+
+async def run_process(command: list[str], timeout: float) -> bytes:
+    """
+    Run an ffmpeg/ffprobe command as a native asyncio subprocess and return its stdout.
+
+    The process runs in its own process group, which is killed when the timeout expires or
+    when the awaiting task is cancelled (e.g. the client went away), so a hung ffmpeg on a
+    damaged file never keeps a process slot. stderr is captured for the error message.
+
+    Raises:
+        MediaProcessError: non-zero exit status or timeout
+    """
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        _kill_process_group(process)
+        await process.wait()
+        raise MediaProcessError(command[0], f"timed out after {timeout}s")
+    except asyncio.CancelledError:
+        _kill_process_group(process)
+        await process.wait()
+        raise
+
+    if process.returncode != 0:
+        raise MediaProcessError(
+            command[0],
+            f"exit status {process.returncode}: {stderr.decode('utf-8', errors='replace').strip()[-500:]}"
         )
-        return float(result.stdout)
+    return stdout
+
+
+def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
 
 @lru_cache()
 def get_thumbnail_resolver():
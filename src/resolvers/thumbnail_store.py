@@ -0,0 +1,190 @@
+from collections import OrderedDict
+from functools import lru_cache
+import hashlib
+import os
+import re
+import threading
+
+from src.config import get_settings
+from src.logger import get_logger
+
+logger = get_logger("thumbnail_store")
+
+_KEY_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+# file extension of every kind of entry: thumbnails and storyboards (jpg, webp), hover preview clips (webm, webp)
+_EXTENSIONS = {"jpg", "webp", "webm"}
+
+
+class ThumbnailStore:
+    """
+    Content-addressed thumbnail store on local disk.
+
+    A key is derived from the identity of the video file (host path, mtime, size), so a modified
+    file gets a new key and the old thumbnail simply ages out. Every entry is stored with the file
+    extension of its format, which the callers pass along with the key. The total size of the store
+    is kept under `max_size_bytes` by evicting the least recently used entries; the access order
+    survives restarts through the files' mtime.
+
+    All methods do blocking file IO and are meant to be called through `run_in_threadpool`.
+    """
+
+    def __init__(self, root_dir: str, max_size_bytes: int):
+        self.root_dir = root_dir
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        self._index: OrderedDict[str, int] | None = None  # file name -> size, least recently used first
+        self._total_size = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(path: str, last_modify_time: float, size: float) -> str:
+        identity = f"{path}:{last_modify_time}:{size}".encode("utf-8")
+        return hashlib.sha1(identity, usedforsecurity=False).hexdigest()
+
+    @staticmethod
+    def is_valid_key(key: str | None) -> bool:
+        return key is not None and _KEY_PATTERN.match(key) is not None
+
+    def read(self, key: str, extension: str = "jpg") -> bytes | None:
+        """Return the stored thumbnail, or None if the key is unknown."""
+        if not self.is_valid_key(key):
+            return None
+        file_name = self._file_name(key, extension)
+        file_path = self._file_path(file_name)
+        try:
+            with open(file_path, "rb") as thumbnail_file:
+                data = thumbnail_file.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+                self._load_index().pop(file_name, None)
+            return None
+
+        with self._lock:
+            self.hits += 1
+            index = self._load_index()
+            if file_name in index:
+                index.move_to_end(file_name)
+        try:
+            os.utime(file_path)
+        except OSError:
+            pass
+        return data
+
+    def locate(self, key: str, extension: str = "jpg") -> str | None:
+        """
+        Path of a stored entry, for callers that serve the file themselves (e.g. with range requests).
+        Counts as a read for the hit statistics and the LRU order.
+        """
+        if not self.is_valid_key(key):
+            return None
+        file_name = self._file_name(key, extension)
+        file_path = self._file_path(file_name)
+        try:
+            os.utime(file_path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+                self._load_index().pop(file_name, None)
+            return None
+
+        with self._lock:
+            self.hits += 1
+            index = self._load_index()
+            if file_name in index:
+                index.move_to_end(file_name)
+        return file_path
+
+    def contains(self, key: str, extension: str = "jpg") -> bool:
+        """Whether a thumbnail is stored under the key, without reading it or touching its LRU position."""
+        return self.is_valid_key(key) and os.path.isfile(self._file_path(self._file_name(key, extension)))
+
+    def write(self, key: str, data: bytes, extension: str = "jpg") -> None:
+        """Store a thumbnail atomically, then evict least recently used entries if over budget."""
+        if not self.is_valid_key(key):
+            raise ValueError(f"Invalid thumbnail key: {key}")
+        file_name = self._file_name(key, extension)
+        file_path = self._file_path(file_name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, file_path)
+
+        with self._lock:
+            index = self._load_index()
+            self._total_size += len(data) - index.pop(file_name, 0)
+            index[file_name] = len(data)
+            self._evict()
+
+    def stats(self) -> dict:
+        with self._lock:
+            index = self._load_index()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": self.hits / lookups if lookups else 0.0,
+                "entries": len(index),
+                "bytes": self._total_size,
+                "maxBytes": self.max_size_bytes,
+            }
+
+    @staticmethod
+    def _file_name(key: str, extension: str) -> str:
+        if extension not in _EXTENSIONS:
+            raise ValueError(f"Unsupported thumbnail store extension: {extension}")
+        return f"{key}.{extension}"
+
+    def _file_path(self, file_name: str) -> str:
+        return os.path.join(self.root_dir, file_name[:2], file_name)
+
+    def _load_index(self) -> OrderedDict[str, int]:
+        """Build the LRU index from the files on disk on first use. Caller must hold the lock."""
+        if self._index is None:
+            entries: list[tuple[float, str, int]] = []
+            if os.path.isdir(self.root_dir):
+                for sub_dir in os.scandir(self.root_dir):
+                    if not sub_dir.is_dir():
+                        continue
+                    for entry in os.scandir(sub_dir.path):
+                        key, ext = os.path.splitext(entry.name)
+                        if ext[1:] in _EXTENSIONS and self.is_valid_key(key):
+                            stat = entry.stat()
+                            entries.append((stat.st_mtime, entry.name, stat.st_size))
+            entries.sort()
+            self._index = OrderedDict((file_name, size) for _, file_name, size in entries)
+            self._total_size = sum(size for _, _, size in entries)
+            logger.info(f"Thumbnail store loaded: {len(entries)} entries, {self._total_size} bytes")
+        return self._index
+
+    def _evict(self) -> None:
+        """Remove least recently used thumbnails until the store fits its budget. Caller must hold the lock."""
+        index = self._index
+        while index and self._total_size > self.max_size_bytes:
+            file_name, size = index.popitem(last=False)
+            self._total_size -= size
+            try:
+                os.remove(self._file_path(file_name))
+            except OSError as e:
+                logger.warning(f"Failed to evict thumbnail {file_name}: {e}")
+
+
+@lru_cache
+def get_thumbnail_store() -> ThumbnailStore:
+    thumbnail_cache = get_settings().thumbnail_cache
+    return ThumbnailStore(
+        root_dir=thumbnail_cache.cache_dir,
+        max_size_bytes=thumbnail_cache.max_size_mb * 1024 * 1024
+    )
+
+
+@lru_cache
+def get_preview_store() -> ThumbnailStore:
+    """Hover preview clips, with their own directory and budget so that they never evict thumbnails."""
+    preview = get_settings().preview
+    return ThumbnailStore(
+        root_dir=preview.cache_dir,
+        max_size_bytes=preview.max_size_mb * 1024 * 1024
+    )
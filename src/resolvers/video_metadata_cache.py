@@ -0,0 +1,137 @@
+from functools import lru_cache
+import os
+
+from bson import ObjectId
+from cachetools import TTLCache
+from pydantic import BaseModel
+
+from src.config import get_settings
+from src.db.models.Video_model import VideoModel
+from src.logger import get_logger
+from src.resolvers.resolver_utils import resolver_utils
+
+logger = get_logger("video_metadata_cache")
+
+
+class VideoFileMetadata(BaseModel):
+    """Everything the stream and thumbnail routes need to serve a video without touching MongoDB."""
+    videoId: str
+    path: str  # host path stored on VideoModel, part of the ETag
+    mountedPath: str
+    lastModifyTime: float
+    size: float  # size stored on VideoModel, part of the ETag
+    fileSize: int  # actual size of the file on disk
+    mimeType: str
+    duration: float = 0.0
+    container: str | None = None
+    thumbnail: str | None = None
+    thumbnailTimestamp: float | None = None
+    mediaFailures: int = 0
+
+
+class VideoMetadataCache:
+    """
+    TTL + LRU cache mapping a video id to its resolved file metadata.
+
+    A seek-heavy playback session issues hundreds of range requests for the same video,
+    each of which would otherwise cost a MongoDB lookup plus `os.path.exists` and `os.path.getsize`.
+    Entries must be invalidated whenever the video is updated or deleted.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self._cache: TTLCache[str, VideoFileMetadata] = TTLCache(maxsize=max_size, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, video_id: str) -> VideoFileMetadata | None:
+        """
+        Get the metadata of a video, loading it from MongoDB and the file system on a miss.
+
+        :param video_id: The MongoDB ID of the video
+        :return: The metadata, or None if the video doesn't exist in the database.
+                 A video whose file is missing is returned with `fileSize == -1` and not cached.
+        :rtype: VideoFileMetadata | None
+        """
+        metadata = self._cache.get(video_id)
+        if metadata is not None:
+            self.hits += 1
+            return metadata
+
+        self.misses += 1
+        video = await VideoModel.get(video_id)
+        if not video:
+            return None
+        return self._load(video)
+
+    async def get_many(self, video_ids: list[str]) -> dict[str, VideoFileMetadata]:
+        """
+        Get the metadata of several videos, loading all the misses with a single `$in` query.
+
+        :param video_ids: The MongoDB IDs of the videos
+        :return: The metadata by video id, videos missing from the database are left out
+        :rtype: dict[str, VideoFileMetadata]
+        """
+        result: dict[str, VideoFileMetadata] = {}
+        missing: list[ObjectId] = []
+        for video_id in dict.fromkeys(video_ids):
+            metadata = self._cache.get(video_id)
+            if metadata is not None:
+                self.hits += 1
+                result[video_id] = metadata
+            elif ObjectId.is_valid(video_id):
+                self.misses += 1
+                missing.append(ObjectId(video_id))
+
+        if missing:
+            for video in await VideoModel.find_many({"_id": {"$in": missing}}).to_list():
+                result[str(video.id)] = self._load(video)
+        return result
+
+    def _load(self, video: VideoModel) -> VideoFileMetadata:
+        """Resolve the file of a video document, caching the result if the file exists."""
+        mounted_path = resolver_utils().to_mounted_path(video.path)
+        try:
+            file_size = os.path.getsize(mounted_path)
+        except OSError:
+            file_size = -1
+
+        metadata = VideoFileMetadata(
+            videoId=str(video.id),
+            path=video.path,
+            mountedPath=mounted_path,
+            lastModifyTime=video.lastModifyTime,
+            size=video.size,
+            fileSize=file_size,
+            mimeType=resolver_utils().get_video_mime_type(mounted_path),
+            duration=video.duration or 0.0,
+            container=video.container,
+            thumbnail=video.thumbnail,
+            thumbnailTimestamp=video.thumbnailTimestamp,
+            mediaFailures=video.mediaFailures or 0,
+        )
+        if file_size >= 0:
+            self._cache[metadata.videoId] = metadata
+        return metadata
+
+    def invalidate(self, *video_ids: str) -> None:
+        for video_id in video_ids:
+            self._cache.pop(str(video_id), None)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": self.hits / lookups if lookups else 0.0,
+            "size": self._cache.currsize,
+            "maxSize": self._cache.maxsize,
+        }
+
+
+@lru_cache
+def get_video_metadata_cache() -> VideoMetadataCache:
+    cache_config = get_settings().metadata_cache_config
+    return VideoMetadataCache(max_size=cache_config.max_size, ttl=cache_config.ttl)
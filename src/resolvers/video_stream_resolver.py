@@ -1,141 +1,504 @@
-import io
+import asyncio
 import os
+import secrets
 from typing import Annotated
-import aiofiles
 from fastapi import Depends, HTTPException, Request
-from fastapi.responses import StreamingResponse
-from src.db.models.Video_model import VideoModel
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from src.config import get_settings
 from src.logger import get_logger
-from src.resolvers.resolver_utils import resolver_utils
-from src.resolvers.thumbnail_resolver import get_thumbnail_resolver
+from src.resolvers.file_response import FileRangeResponse, MultipartByteRangesResponse
+from src.resolvers.hot_thumbnail_cache import get_hot_thumbnail_cache
+from src.resolvers.hover_preview import HoverPreviewSpec
+from src.resolvers.http_utils import (
+    http_date,
+    if_range_matches,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    parse_range_header
+)
+from src.resolvers.media_worker import MediaPriority, get_media_worker
+from src.resolvers.storyboard import StoryboardLayout
+from src.resolvers.thumbnail_rendition import negotiate_rendition, rendition_key
+from src.resolvers.thumbnail_resolver import needs_probe, thumbnail_seek_target
+from src.resolvers.thumbnail_store import get_preview_store, get_thumbnail_store
+from src.resolvers.video_metadata_cache import VideoFileMetadata, get_video_metadata_cache
 
 logger = get_logger("video_stream_resolver")
 
+# Upper bound on the ids of a batch thumbnail request, a few grid pages
+MAX_BATCH_THUMBNAILS = 100
+
 class VideoResolver:
     def __init__(
         self,
     ):
-        self.thumbnailResolver = get_thumbnail_resolver()
+        self.mediaWorker = get_media_worker()
+        self.metadataCache = get_video_metadata_cache()
+        self.thumbnailStore = get_thumbnail_store()
+        self.previewStore = get_preview_store()
+        self.hotThumbnailCache = get_hot_thumbnail_cache()
 
-    async def video_stream_resolver(self,video_id: str, request: Request) -> StreamingResponse:
+    async def video_stream_resolver(self,video_id: str, request: Request) -> Response:
         """
         Handles video streaming requests and supports Range requests (for drag-and-drop playback in Video.js).
+        Suffix, open-ended and multiple ranges are answered as specified by RFC 7233, with If-Range honored.
+        Conditional requests (If-None-Match / If-Modified-Since) are answered with 304 before touching the file.
 
         Args:
             video_id: The MongoDB ID of the video
             request: A FastAPI Request object used to retrieve the range header
 
         Returns: 
-            StreamingResponse: The video stream response
+            FileRangeResponse: The video stream response, sent with kernel sendfile when the server supports it
+            MultipartByteRangesResponse: When several ranges are requested at once
+            Response: 304 Not Modified when the client copy is still valid
         """
-        video = await VideoModel.get(video_id)
+        video = await self.metadataCache.get(video_id)
         if not video:
             raise HTTPException(status_code=404, detail="video metadata doesn't exist")
 
-        video_path = resolver_utils().to_mounted_path(video.path)
-        if not os.path.exists(video_path):
+        # validators come from the stored metadata, so a revalidation costs no file system work
+        etag = make_etag(video.path, video.lastModifyTime, video.size)
+        last_modified = http_date(video.lastModifyTime)
+        base_headers = {
+            "Accept-Ranges": "bytes",
+            "ETag": etag,
+            "Last-Modified": last_modified,
+        }
+        if is_not_modified(request.headers, etag, video.lastModifyTime):
+            return not_modified_response(base_headers)
+
+        if video.fileSize < 0:
             raise HTTPException(status_code=404, detail="video file doesn't exist")
 
-        file_size = os.path.getsize(video_path)
+        try:
+            return self._ranged_file_response(
+                request, video.mountedPath, video.fileSize, video.mimeType, base_headers, etag, last_modified
+            )
+        except HTTPException:
+            # e.g. 416 for an unsatisfiable range
+            raise
+        except Exception as e:
+            logger.error(f"Error while processing video stream request: {e}")
+            raise HTTPException(status_code=500, detail="Internal server error")
+
+    @staticmethod
+    def _ranged_file_response(
+        request: Request,
+        file_path: str,
+        file_size: int,
+        mime_type: str,
+        base_headers: dict[str, str],
+        etag: str,
+        last_modified: str,
+        count_stream: bool = True
+    ) -> Response:
+        """
+        Send a file whole, as a single range, or as a multipart/byteranges body depending on the Range header.
+
+        Args:
+            request: FastAPI request object, for the Range and If-Range headers
+            file_path: Path of the file on this host
+            file_size: Size of the file in bytes
+            mime_type: Content type of the file
+            base_headers: Validators and Accept-Ranges sent with every response
+            etag: ETag of the file, checked against If-Range
+            last_modified: HTTP date of the file, checked against If-Range
+            count_stream: Whether the body counts as a video stream for the process limiter
 
+        Returns:
+            FileRangeResponse or MultipartByteRangesResponse
+        """
+        stream_config = get_settings().stream_config
+
+        # bytes=start-end, bytes=start-, bytes=-suffix, or a comma separated list of them.
+        # A stale If-Range validator turns the request into a full download.
+        ranges = None
         range_header = request.headers.get("Range")
+        if range_header and if_range_matches(request.headers.get("If-Range"), etag, last_modified):
+            ranges = parse_range_header(range_header, file_size)
 
-        try:
-            if range_header:
-                # bytes=start-end
-                byte_range = range_header.replace("bytes=", "").split("-")
-                start = int(byte_range[0]) if byte_range[0] else 0
-                end = int(byte_range[1]) if byte_range[1] else file_size - 1
-
-                # Ensure the scope is valid
-                if start >= file_size or end >= file_size:
-                    raise HTTPException(
-                        status_code=416,
-                        detail="The requested scope is invalid.",
-                        headers={"Content-Range": f"bytes */{file_size}"}
-                    )
+        if not ranges:
+            return FileRangeResponse(
+                file_path,
+                start=0,
+                length=file_size,
+                headers={
+                    **base_headers,
+                    "Content-Length": str(file_size),
+                    "Content-Type": mime_type,
+                },
+                media_type=mime_type,
+                chunk_size=stream_config.chunk_size,
+                use_sendfile=stream_config.use_sendfile,
+                count_stream=count_stream
+            )
 
-                content_length = end - start + 1
-
-                return StreamingResponse(
-                    self.iter_file(video_path, 1024*1024, start, content_length),
-                    status_code=206,
-                    headers={
-                        "Content-Range": f"bytes {start}-{end}/{file_size}",
-                        "Accept-Ranges": "bytes",
-                        "Content-Length": str(content_length),
-                        "Content-Type": resolver_utils().get_video_mime_type(video_path),
-                    },
-                    media_type=resolver_utils().get_video_mime_type(video_path)
-                )
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            content_length = end - start + 1
 
-            else:
-                return StreamingResponse(
-                    self.iter_file(video_path, chunk_size=1024*1024, with_range=False),
-                    headers={
-                        "Accept-Ranges": "bytes",
-                        "Content-Length": str(file_size),
-                        "Content-Type": resolver_utils().get_video_mime_type(video_path),
-                    },
-                    media_type=resolver_utils().get_video_mime_type(video_path)
-                )
-        except Exception as e:
-            logger.error(f"Error while processing video stream request: {e}")
-            raise HTTPException(status_code=500, detail="Internal server error")
-        
-    async def iter_file(self, video_path: str, chunk_size: int = 1024*1024, start: int = 0, content_length: int | None = None, with_range: bool = True):
-        async with aiofiles.open(video_path, "rb") as video_file:
-            if with_range:
-                await video_file.seek(start)
-                remaining = content_length
-                while remaining > 0:
-                    chunk = await video_file.read(min(chunk_size, remaining))
-                    if not chunk:
-                        break
-                    remaining -= len(chunk)
-                    yield chunk
-            else:
-                while chunk := await video_file.read(chunk_size):
-                    yield chunk          
-    
-    async def get_thumbnail(self, video_id: str, thumbnail_id: str | None = None) -> StreamingResponse:
+            return FileRangeResponse(
+                file_path,
+                start=start,
+                length=content_length,
+                status_code=206,
+                headers={
+                    **base_headers,
+                    "Content-Range": f"bytes {start}-{end}/{file_size}",
+                    "Content-Length": str(content_length),
+                    "Content-Type": mime_type,
+                },
+                media_type=mime_type,
+                chunk_size=stream_config.chunk_size,
+                use_sendfile=stream_config.use_sendfile,
+                count_stream=count_stream
+            )
+
+        # several ranges in one round trip, e.g. the moov atom at the tail plus the head
+        return MultipartByteRangesResponse(
+            file_path,
+            ranges=ranges,
+            file_size=file_size,
+            content_type=mime_type,
+            headers=base_headers,
+            chunk_size=stream_config.chunk_size,
+            use_sendfile=stream_config.use_sendfile,
+            count_stream=count_stream
+        )
+
+    async def get_thumbnail(
+        self, video_id: str, request: Request, thumbnail_id: str | None = None, size: str | None = None
+    ) -> Response:
         if not video_id:
             raise HTTPException(status_code=400, detail="Cannot find thumbnail without video-id")
         else:
-            # 1- fetch video metadata from database
-            video = await VideoModel.get(video_id) 
+            # 0- size variant and image format negotiated from the Accept header
+            rendition = negotiate_rendition(size, request.headers.get("Accept"))
+            if rendition is None:
+                raise HTTPException(status_code=400, detail=f"Unknown thumbnail size: {size}")
+
+            # 1- fetch video metadata from cache or database
+            video = await self.metadataCache.get(video_id)
             if not video:
                 logger.warning(f"Video metadata not found for video_id: {video_id}")
                 raise HTTPException(status_code=404, detail="Video not found")
 
-            video_path = resolver_utils().to_mounted_path(video.path)
-            if not os.path.exists(video_path):
+            # the browser already holds this thumbnail: answer before any file or ffmpeg work
+            key = rendition_key(video.path, video.lastModifyTime, video.size, rendition)
+            etag = f'"{key}"'
+            cache_headers = {
+                "Cache-Control": "public, max-age=3600",
+                "ETag": etag,
+                "Last-Modified": http_date(video.lastModifyTime),
+                "Vary": "Accept",
+            }
+            if is_not_modified(request.headers, etag, video.lastModifyTime):
+                return not_modified_response(cache_headers)
+
+            video_path = video.mountedPath
+            if video.fileSize < 0:
                 logger.warning(f"Video file not found at path: {video_path}")
                 raise HTTPException(status_code=404, detail="Video file doesn't exist")
-            
-            no_duration_in_model = video.duration == 0.0 or video.duration is None
-                    
-            # 2- TODO: find jpeg thumbnail from object storage using thumbnail-id
-            if thumbnail_id:
-                # get thumbnail data from object storage
-                pass
-                # get duration if not exists in model
-                if no_duration_in_model:
-                    video.duration = await self.thumbnailResolver.get_video_duration(video_path)
-                    await video.save()
-
-            # 3- video_id exists but thumbnail_id is null/empty - generate thumbnail with ffmpeg
-            else:
-                thumbnail_bytes = await self.thumbnailResolver.generate_thumbnail(video_path)
-                
-            return StreamingResponse(
-                content=io.BytesIO(thumbnail_bytes),
-                media_type="image/jpeg",
-                headers={
-                    "Cache-Control": "public, max-age=3600"
-                }
+
+            # 2- read the thumbnail from the store, the key is recomputed from the file identity
+            #    so a stale thumbnail-id left on a modified file is never served
+            base_key = self.thumbnailStore.make_key(video.path, video.lastModifyTime, video.size)
+            if thumbnail_id and thumbnail_id != base_key:
+                logger.info(f"Stale thumbnail id {thumbnail_id} for video {video_id}, regenerating")
+
+            # the most requested thumbnails are served from memory, the others from the disk store
+            thumbnail_bytes = self.hotThumbnailCache.get(key)
+            if thumbnail_bytes is None:
+                thumbnail_bytes = await run_in_threadpool(self.thumbnailStore.read, key, rendition.extension)
+
+            # 3- not stored yet - the worker pool renders it ahead of the backlog, the request never runs ffmpeg itself
+            if thumbnail_bytes is None:
+                media_worker_config = get_settings().media_worker
+                # a file the worker keeps failing on is not retried on every request
+                if video.mediaFailures >= media_worker_config.max_attempts:
+                    raise HTTPException(status_code=500, detail="Failed to generate thumbnail")
+                await self.mediaWorker.wait_for(video.videoId, timeout=media_worker_config.request_wait)
+                thumbnail_bytes = await run_in_threadpool(self.thumbnailStore.read, key, rendition.extension)
+                if thumbnail_bytes is None:
+                    # the job ended with a failure: retrying after a delay would not help
+                    processed = await self.metadataCache.get(video_id)
+                    if processed is not None and processed.mediaFailures > video.mediaFailures:
+                        raise HTTPException(status_code=500, detail="Failed to generate thumbnail")
+                    raise HTTPException(
+                        status_code=503,
+                        detail="Thumbnail is being generated",
+                        headers={"Retry-After": "2"}
+                    )
+
+            # 4- stored, but the store key or the probed metadata is not persisted yet: let the worker pool catch up
+            elif video.thumbnail != base_key or needs_probe(video.duration, video.container):
+                self.mediaWorker.enqueue([video.videoId], MediaPriority.VIEWING)
+
+            self.hotThumbnailCache.put(key, thumbnail_bytes)
+            # the cached bytes object is sent as is, without copy
+            return Response(
+                content=thumbnail_bytes,
+                media_type=rendition.media_type,
+                headers=cache_headers
             )
 
+    async def get_thumbnails(self, video_ids: list[str], request: Request, size: str | None = None) -> Response:
+        """
+        Thumbnails of a whole grid page in one `multipart/form-data` response, one part per video
+        named after its id (browsers parse it with `Response.formData()`).
+
+        All videos are resolved with a single `$in` query. Stored thumbnails are streamed first, the
+        missing ones are rendered in parallel under the ffmpeg limiter and streamed as they complete.
+        Ids still rendering after `media_worker.request_wait` seconds are listed in a final `pending`
+        part, unknown ids or missing files in the `X-Thumbnails-Missing` header.
+
+        Args:
+            video_ids: The MongoDB IDs of the videos
+            request: FastAPI request object, for content negotiation
+            size: Name of the size variant, the default one if omitted
+
+        Returns:
+            A streamed multipart response
+        """
+        video_ids = list(dict.fromkeys(video_ids))
+        if not video_ids:
+            raise HTTPException(status_code=400, detail="Cannot find thumbnails without video-ids")
+        if len(video_ids) > MAX_BATCH_THUMBNAILS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_THUMBNAILS} thumbnails per request")
+        rendition = negotiate_rendition(size, request.headers.get("Accept"))
+        if rendition is None:
+            raise HTTPException(status_code=400, detail=f"Unknown thumbnail size: {size}")
+
+        videos = await self.metadataCache.get_many(video_ids)
+        missing_ids = [vid for vid in video_ids if vid not in videos or videos[vid].fileSize < 0]
+        keys = {
+            vid: rendition_key(videos[vid].path, videos[vid].lastModifyTime, videos[vid].size, rendition)
+            for vid in video_ids if vid not in missing_ids
+        }
+        stored = {vid: self.hotThumbnailCache.get(key) for vid, key in keys.items()}
+        from_disk = await run_in_threadpool(
+            lambda: {
+                vid: self.thumbnailStore.read(keys[vid], rendition.extension) for vid, data in stored.items() if data is None
+            }
+        )
+        for vid, data in from_disk.items():
+            stored[vid] = data
+            if data is not None:
+                self.hotThumbnailCache.put(keys[vid], data)
+
+        # stored, but the store key or the probed metadata is not persisted yet: let the worker pool catch up
+        outdated = []
+        for vid, data in stored.items():
+            video = videos[vid]
+            base_key = self.thumbnailStore.make_key(video.path, video.lastModifyTime, video.size)
+            if data is not None and (video.thumbnail != base_key or needs_probe(video.duration, video.container)):
+                outdated.append(vid)
+        self.mediaWorker.enqueue(outdated, MediaPriority.VIEWING)
+
+        boundary = secrets.token_hex(13)
+
+        def part(name: str, content_type: str, data: bytes, filename: str | None = None) -> bytes:
+            disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+            header = f"--{boundary}\r\nContent-Disposition: {disposition}\r\nContent-Type: {content_type}\r\n\r\n"
+            return header.encode("latin-1") + data + b"\r\n"
+
+        def image_part(video_id: str, data: bytes) -> bytes:
+            return part(video_id, rendition.media_type, data, filename=f"{video_id}.{rendition.extension}")
+
+        async def body():
+            # 1- cache hits go out before any rendering starts
+            for vid, data in stored.items():
+                if data is not None:
+                    yield image_part(vid, data)
+
+            # 2- misses rendered in parallel, each part sent as soon as its thumbnail is stored
+            to_render = {
+                asyncio.ensure_future(self.mediaWorker.run_now(vid)): vid
+                for vid, data in stored.items() if data is None
+            }
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + get_settings().media_worker.request_wait
+            remaining = set(to_render)
+            pending_ids = []
+            while remaining and loop.time() < deadline:
+                done, remaining = await asyncio.wait(
+                    remaining, timeout=deadline - loop.time(), return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    vid = to_render[task]
+                    data = await run_in_threadpool(self.thumbnailStore.read, keys[vid], rendition.extension)
+                    if data is not None:
+                        yield image_part(vid, data)
+                    else:
+                        pending_ids.append(vid)
+            # unfinished renders keep running in the background and fill the store
+            pending_ids += [to_render[task] for task in remaining]
+            if pending_ids:
+                yield part("pending", "text/plain", ",".join(pending_ids).encode("latin-1"))
+            yield f"--{boundary}--\r\n".encode("latin-1")
+
+        headers = {"Cache-Control": "no-store", "Vary": "Accept"}
+        if missing_ids:
+            headers["X-Thumbnails-Missing"] = ",".join(missing_ids)
+        return StreamingResponse(
+            content=body(),
+            media_type=f"multipart/form-data; boundary={boundary}",
+            headers=headers
+        )
+
+    async def get_storyboard(self, video_id: str, request: Request) -> Response:
+        """
+        Seek preview sprite sheet: one tile per interval, rendered by a single ffmpeg pass and kept in the thumbnail store.
+        Sheets are rendered by the background media worker only: a missing sheet is queued ahead of the backlog
+        and answered with 503, a sheet that failed to render with 500.
+
+        Args:
+            video_id: The MongoDB ID of the video
+            request: FastAPI request object, for conditional request headers
+
+        Returns:
+            The JPEG sprite sheet, whose geometry is described by `get_storyboard_vtt`
+        """
+        video, key = await self._get_storyboard_video(video_id)
+        cache_headers = self._storyboard_cache_headers(video.lastModifyTime, key)
+        if is_not_modified(request.headers, cache_headers["ETag"], video.lastModifyTime):
+            return not_modified_response(cache_headers)
+
+        sprite_bytes = await run_in_threadpool(self.thumbnailStore.read, key)
+        if sprite_bytes is None:
+            if self.mediaWorker.storyboard_failed(key):
+                raise HTTPException(status_code=500, detail="Failed to generate storyboard")
+            self._require_duration(video)
+            self.mediaWorker.enqueue_storyboards([video.videoId])
+            raise HTTPException(status_code=503, detail="Storyboard is being generated", headers={"Retry-After": "5"})
+
+        return Response(content=sprite_bytes, media_type="image/jpeg", headers=cache_headers)
+
+    async def get_storyboard_vtt(self, video_id: str, request: Request) -> Response:
+        """
+        WebVTT thumbnail track mapping each time range to its tile of the sprite sheet (`#xywh=` fragments).
+        Computed from the layout alone, no ffmpeg run is needed to answer it.
+
+        Args:
+            video_id: The MongoDB ID of the video
+            request: FastAPI request object, for conditional request headers
+
+        Returns:
+            The `text/vtt` index of the storyboard
+        """
+        video, key = await self._get_storyboard_video(video_id)
+        cache_headers = self._storyboard_cache_headers(video.lastModifyTime, key)
+        if is_not_modified(request.headers, cache_headers["ETag"], video.lastModifyTime):
+            return not_modified_response(cache_headers)
+
+        self._require_duration(video)
+        layout = StoryboardLayout.for_duration(video.duration, get_settings().storyboard)
+        # relative to /video/storyboard.vtt, so it also resolves behind a reverse proxy prefix
+        return Response(
+            content=layout.to_webvtt(f"storyboard?video_id={video.videoId}"),
+            media_type="text/vtt",
+            headers=cache_headers
+        )
+
+    async def get_preview(self, video_id: str, request: Request) -> Response:
+        """
+        Hover preview clip of a video card, served from the thumbnail store with range support.
+        Clips are rendered by the background media worker only: a missing clip is queued and
+        answered with 503, the card keeps showing its thumbnail meanwhile.
+
+        Args:
+            video_id: The MongoDB ID of the video
+            request: FastAPI request object, for conditional and range request headers
+
+        Returns:
+            The WebM (or animated WebP) clip, whole or partial
+        """
+        preview_config = get_settings().preview
+        if not preview_config.enabled:
+            raise HTTPException(status_code=404, detail="Hover previews are disabled")
+        if not video_id:
+            raise HTTPException(status_code=400, detail="Cannot find preview without video-id")
+        video = await self.metadataCache.get(video_id)
+        if not video:
+            logger.warning(f"Video metadata not found for video_id: {video_id}")
+            raise HTTPException(status_code=404, detail="Video not found")
+        if video.fileSize < 0:
+            raise HTTPException(status_code=404, detail="Video file doesn't exist")
+
+        retry_headers = {"Retry-After": "5"}
+        if video.duration <= 0:
+            # the clip position needs the probed duration, the worker queues the clip right after probing
+            self.mediaWorker.enqueue([video.videoId], MediaPriority.VIEWING)
+            raise HTTPException(status_code=503, detail="Preview is being generated", headers=retry_headers)
+
+        start = video.thumbnailTimestamp if video.thumbnailTimestamp is not None else thumbnail_seek_target(video.duration)
+        spec = HoverPreviewSpec.for_video(video.duration, start, preview_config)
+        key = spec.store_key(video.path, video.lastModifyTime, video.size)
+        etag = f'"{key}"'
+        last_modified = http_date(video.lastModifyTime)
+        base_headers = {
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "public, max-age=3600",
+            "ETag": etag,
+            "Last-Modified": last_modified,
+        }
+        if is_not_modified(request.headers, etag, video.lastModifyTime):
+            return not_modified_response(base_headers)
+
+        def locate_clip() -> tuple[str, int] | None:
+            clip_path = self.previewStore.locate(key, spec.extension)
+            try:
+                return (clip_path, os.path.getsize(clip_path)) if clip_path else None
+            except OSError:
+                return None
+
+        clip = await run_in_threadpool(locate_clip)
+        if clip is None:
+            self.mediaWorker.enqueue_previews([video.videoId])
+            raise HTTPException(status_code=503, detail="Preview is being generated", headers=retry_headers)
+
+        clip_path, clip_size = clip
+        return self._ranged_file_response(
+            request, clip_path, clip_size, spec.media_type, base_headers, etag, last_modified,
+            # a few hundred KB read once, not a playback competing with ffmpeg for the disk
+            count_stream=False
+        )
+
+    async def _get_storyboard_video(self, video_id: str) -> tuple[VideoFileMetadata, str]:
+        """The metadata of a video and the store key of its sprite sheet, known without probing the file."""
+        if not video_id:
+            raise HTTPException(status_code=400, detail="Cannot find storyboard without video-id")
+        video = await self.metadataCache.get(video_id)
+        if not video:
+            logger.warning(f"Video metadata not found for video_id: {video_id}")
+            raise HTTPException(status_code=404, detail="Video not found")
+        if video.fileSize < 0:
+            logger.warning(f"Video file not found at path: {video.mountedPath}")
+            raise HTTPException(status_code=404, detail="Video file doesn't exist")
+
+        key = StoryboardLayout.store_key(video.path, video.lastModifyTime, video.size, get_settings().storyboard)
+        return video, key
+
+    def _require_duration(self, video: VideoFileMetadata) -> None:
+        """The storyboard layout needs the probed duration, probing is left to the media worker like for thumbnails."""
+        if video.duration > 0:
+            return
+        if video.mediaFailures >= get_settings().media_worker.max_attempts:
+            raise HTTPException(status_code=500, detail="Failed to read video duration")
+        self.mediaWorker.enqueue([video.videoId], MediaPriority.VIEWING)
+        raise HTTPException(status_code=503, detail="Video duration is being probed", headers={"Retry-After": "2"})
+
+    @staticmethod
+    def _storyboard_cache_headers(last_modify_time: float, key: str) -> dict[str, str]:
+        return {
+            "Cache-Control": "public, max-age=3600",
+            "ETag": f'"{key}"',
+            "Last-Modified": http_date(last_modify_time),
+        }
+
 def get_video_resolver():
     return VideoResolver()
 
@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+
+from src.resolvers.hot_thumbnail_cache import get_hot_thumbnail_cache
+from src.resolvers.library_scanner import get_library_scanner
+from src.resolvers.library_watcher import get_library_watcher
+from src.resolvers.media_worker import get_media_worker
+from src.resolvers.process_limiter import get_process_limiter
+from src.resolvers.thumbnail_resolver import get_thumbnail_resolver
+from src.resolvers.thumbnail_store import get_preview_store, get_thumbnail_store
+from src.resolvers.video_metadata_cache import get_video_metadata_cache
+
+router = APIRouter(prefix="/metrics")
+
+@router.get("")
+async def get_metrics():
+    """runtime metrics of the in-process caches"""
+    return {
+        "videoMetadataCache": get_video_metadata_cache().stats(),
+        "hotThumbnailCache": get_hot_thumbnail_cache().stats(),
+        "thumbnailStore": await run_in_threadpool(get_thumbnail_store().stats),
+        "previewStore": await run_in_threadpool(get_preview_store().stats),
+        "thumbnailResolver": get_thumbnail_resolver().stats(),
+        "mediaWorker": get_media_worker().stats(),
+        "libraryWatcher": get_library_watcher().stats(),
+        "libraryScanner": get_library_scanner().stats(),
+        "ffmpegLimiter": get_process_limiter().stats(),
+    }
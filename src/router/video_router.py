@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Request
+from typing import Annotated
+
+from fastapi import APIRouter, Query, Request
 
 from src.resolvers.video_stream_resolver import VideoResolverDep
 
@@ -10,5 +12,28 @@ async def stream_video(video_id: str, request: Request, videoResolverDep: VideoR
     return await videoResolverDep.video_stream_resolver(video_id, request)
 
 @router.get("/thumbnail")
-async def get_thumbnail(videoResolverDep: VideoResolverDep, video_id: str, thumbnail_id: str | None = None):
-    return await videoResolverDep.get_thumbnail(video_id, thumbnail_id)
\ No newline at end of file
+async def get_thumbnail(request: Request, videoResolverDep: VideoResolverDep, video_id: str,
+                        thumbnail_id: str | None = None, size: str | None = None):
+    """thumbnail in a named size variant (card by default), WebP when the Accept header allows it"""
+    return await videoResolverDep.get_thumbnail(video_id, request, thumbnail_id, size)
+
+@router.get("/thumbnails")
+async def get_thumbnails(request: Request, videoResolverDep: VideoResolverDep,
+                         video_id: Annotated[list[str], Query()], size: str | None = None):
+    """thumbnails of a grid page in one multipart/form-data response, one part per video id"""
+    return await videoResolverDep.get_thumbnails(video_id, request, size)
+
+@router.get("/storyboard")
+async def get_storyboard(request: Request, videoResolverDep: VideoResolverDep, video_id: str):
+    """seek preview sprite sheet"""
+    return await videoResolverDep.get_storyboard(video_id, request)
+
+@router.get("/storyboard.vtt")
+async def get_storyboard_vtt(request: Request, videoResolverDep: VideoResolverDep, video_id: str):
+    """WebVTT thumbnail track indexing the sprite sheet"""
+    return await videoResolverDep.get_storyboard_vtt(video_id, request)
+
+@router.get("/preview")
+async def get_preview(request: Request, videoResolverDep: VideoResolverDep, video_id: str):
+    """hover preview clip of a video card, with range support"""
+    return await videoResolverDep.get_preview(video_id, request)
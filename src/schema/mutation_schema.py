@@ -1,6 +1,7 @@
 import strawberry
 
 from src.schema.types.fileBrowse_type import VideoMutationResult
+from src.schema.types.library_scan_type import LibraryScanStatus
 from src.resolvers.mutation_resolver import MutationResolver
 
 
@@ -10,4 +11,6 @@ class Mutation:
 
     recordVideoView: VideoMutationResult = strawberry.mutation(MutationResolver.resolve_record_video_view)
 
-    deleteVideo: VideoMutationResult = strawberry.mutation(MutationResolver.resolve_delete_video)
\ No newline at end of file
+    deleteVideo: VideoMutationResult = strawberry.mutation(MutationResolver.resolve_delete_video)
+
+    startLibraryScan: LibraryScanStatus = strawberry.mutation(MutationResolver.resolve_start_library_scan)
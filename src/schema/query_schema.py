@@ -1,5 +1,5 @@
 import strawberry
-from src.schema.types.fileBrowse_type import FileBrowseNode
+from src.schema.types.fileBrowse_type import FileBrowsePage
 from src.schema.types.search_type import DirectoryMetadataResult, VideoSearchResult
 from src.schema.types.video_type import Video, VideoTag
 from src.resolvers.query_resolver import QueryResolver
@@ -14,6 +14,6 @@ class Query:
 
     getVideoById: Video = strawberry.field(resolver=QueryResolver.resolve_get_video_by_id)
 
-    browseDirectory: list[FileBrowseNode] = strawberry.field(resolver=QueryResolver.resolve_browse_directory)
+    browseDirectory: FileBrowsePage = strawberry.field(resolver=QueryResolver.resolve_browse_directory)
 
     getDirectoryMetadata: DirectoryMetadataResult = strawberry.field(resolver=QueryResolver.resolve_directory_metadata)
\ No newline at end of file
@@ -4,6 +4,7 @@ import strawberry
 
 from src.resolvers.subscription_resolver import get_subscription_resolver
 from src.schema.types.fileBrowse_type import BatchOperationStatus, DirectoryVideosBatchOperationInput, VideosBatchOperationInput
+from src.schema.types.library_scan_type import LibraryScanStatus
 
 
 @strawberry.type
@@ -34,4 +35,9 @@ class Subscription:
         self, input: DirectoryVideosBatchOperationInput
     ) -> AsyncGenerator[BatchOperationStatus, None]:
         async for status in get_subscription_resolver().resolve_directory_batch_operations(input, update=False):
-            yield status
\ No newline at end of file
+            yield status
+
+    @strawberry.subscription
+    async def libraryScanProgress(self) -> AsyncGenerator[LibraryScanStatus, None]:
+        async for status in get_subscription_resolver().resolve_library_scan_progress():
+            yield status
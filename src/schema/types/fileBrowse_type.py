@@ -2,7 +2,7 @@ from enum import Enum
 from typing import Optional
 import strawberry
 
-from src.schema.types.pydantic_types.fileBrowe_type import RelativePathInputModel
+from src.schema.types.pydantic_types.fileBrowe_type import BrowsePageInputModel, RelativePathInputModel
 from src.schema.types.pydantic_types.batch_operation_type import (
     DirectoryVideosBatchOperationInputModel,
     TagsOperationMappingInputModel,
@@ -17,16 +17,34 @@ class BatchResultType(Enum):
     Failure = "Failure"
     AlreadyUpToDate = "AlreadyUpToDate"
 
+@strawberry.enum
+class BrowseSortOption(Enum):
+    Name = "Name"
+    Size = "Size"
+    LastModifyTime = "LastModifyTime"
+
 @strawberry.type
 class FileBrowseNode:
     node: Video
 
+@strawberry.type
+class FileBrowsePage:
+    nodes: list[FileBrowseNode]
+    nextCursor: Optional[str] = None  # None on the last page
+    totalCount: int = 0
+
 @strawberry.experimental.pydantic.input(model=RelativePathInputModel)
 class RelativePathInput:
     refreshFlag: strawberry.auto  # If True, bypass any caching and get the latest info from disk
     relativePath: strawberry.auto
     parsedPath: strawberry.auto
 
+@strawberry.experimental.pydantic.input(model=BrowsePageInputModel)
+class BrowsePageInput:
+    sortBy: BrowseSortOption = BrowseSortOption.Name
+    ascending: strawberry.auto = True
+    pageSize: strawberry.auto = None
+    cursor: strawberry.auto = None
 
 @strawberry.experimental.pydantic.input(model=TagsOperationMappingInputModel)
 class TagsOperationMappingInput:
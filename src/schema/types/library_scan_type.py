@@ -0,0 +1,36 @@
+from enum import Enum
+from typing import Optional
+import strawberry
+
+from src.db.models.Video_model import LibraryScanModel
+
+
+@strawberry.enum
+class LibraryScanState(Enum):
+    Idle = "Idle"
+    Running = "Running"
+    Done = "Done"
+    Failed = "Failed"
+
+
+@strawberry.type
+class LibraryScanStatus:
+    state: LibraryScanState
+    pendingDirectories: int  # directories known but not listed yet, the total grows as the walk goes deeper
+    videosSeen: int
+    videosAdded: int
+    startedAt: Optional[float] = None
+    finishedAt: Optional[float] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def from_mongoDB(cls, scan: LibraryScanModel) -> "LibraryScanStatus":
+        return cls(
+            state=LibraryScanState(scan.status),
+            pendingDirectories=len(scan.pendingDirectories),
+            videosSeen=scan.videosSeen,
+            videosAdded=scan.videosAdded,
+            startedAt=scan.startedAt,
+            finishedAt=scan.finishedAt,
+            error=scan.error
+        )
@@ -1,4 +1,13 @@
-from pydantic import BaseModel, ValidationInfo, field_validator
+import base64
+import json
+from typing import NamedTuple, Optional
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
+
+from src.config import get_settings
+
+# browse sort key -> field shared by VideoModel and DirectoryModel.
+# The entries of one directory share its path as prefix, so ordering them by path orders them by name.
+BROWSE_SORT_FIELDS = {"Name": "path", "Size": "size", "LastModifyTime": "lastModifyTime"}
 
 
 class RelativePathInputModel(BaseModel):
@@ -31,4 +40,61 @@ class RelativePathInputModel(BaseModel):
         parts = relativePath.split("/", 1)
         result = (parts[0], "/"+parts[1] if len(parts) > 1 else None)
         return result
-            
\ No newline at end of file
+
+
+class BrowseCursor(NamedTuple):
+    """Position after the last entry of a browse page: sub directories are listed first, then videos."""
+    sortBy: str
+    ascending: bool
+    phase: str  # "directories" or "videos"
+    value: float | None  # sort key of the last entry, None when sorted by name
+    path: str | None  # host path of the last entry, None to start the phase from its beginning
+    total: int | None = None  # entry count of the directory, counted once for the first page
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(json.dumps(list(self)).encode()).rstrip(b"=").decode()
+
+
+class BrowsePageInputModel(BaseModel):
+    sortBy: str = "Name"
+    ascending: bool = True
+    pageSize: Optional[int] = Field(default=None, validate_default=True)  # page_size_default.browse if not provided
+    cursor: Optional[str] = None  # `nextCursor` of the previous page, None for the first page
+
+    parsedCursor: BrowseCursor | None = Field(default=None, validate_default=True)  # decoded cursor, not provided by user
+
+    @field_validator("sortBy", mode="after")
+    @classmethod
+    def validate_sort_by(cls, v: str) -> str:
+        if v not in BROWSE_SORT_FIELDS:
+            raise ValueError(f"sortBy must be one of {', '.join(BROWSE_SORT_FIELDS)}")
+        return v
+
+    @field_validator("pageSize", mode="after")
+    @classmethod
+    def validate_page_size(cls, v: Optional[int]) -> int:
+        settings = get_settings()
+        if v is None:
+            return settings.page_size_default.browse
+        if v < 1 or v > settings.validation.browse_page_size_max:
+            raise ValueError(f"Page size must be between 1 and {settings.validation.browse_page_size_max}")
+        return v
+
+    @field_validator("parsedCursor", mode="after")
+    @classmethod
+    def parse_cursor(cls, v: BrowseCursor | None, info: ValidationInfo) -> BrowseCursor | None:
+        """
+        decode the opaque cursor, which is only valid for the sort order it was issued for
+        """
+        cursor: str | None = info.data.get("cursor")
+        if cursor is None:
+            return None
+        try:
+            parsed = BrowseCursor(*json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))))
+        except (ValueError, TypeError) as e:
+            raise ValueError("Invalid cursor") from e
+        if parsed.phase not in ("directories", "videos"):
+            raise ValueError("Invalid cursor")
+        if (parsed.sortBy, parsed.ascending) != (info.data.get("sortBy"), info.data.get("ascending")):
+            raise ValueError("cursor was issued for another sort order")
+        return parsed
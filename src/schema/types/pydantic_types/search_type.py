@@ -39,6 +39,9 @@ class VideoSearchInputModel(BaseModel):
     sortBy: str  
     fromPage: str  
     currentPageNumber: Optional[int] = 1
+    videoCodec: Optional[str] = None
+    audioCodec: Optional[str] = None
+    minHeight: Optional[int] = None
 
     @field_validator("tags", mode="after")
     @classmethod
@@ -55,6 +58,23 @@ class VideoSearchInputModel(BaseModel):
 
         return v
 
+    @field_validator("videoCodec", "audioCodec", mode="after")
+    @classmethod
+    def validate_codec(cls, v: Optional[str]) -> Optional[str]:
+        if v is None:
+            return None
+        # codec names as reported by ffprobe, e.g. h264, hevc, aac
+        if not re.fullmatch(r"[A-Za-z0-9_\-]{1,32}", v):
+            raise ValueError(f"Invalid codec name '{v}'")
+        return v.lower()
+
+    @field_validator("minHeight", mode="after")
+    @classmethod
+    def validate_min_height(cls, v: Optional[int]) -> Optional[int]:
+        if v is not None and v < 0:
+            raise ValueError("minHeight must be positive")
+        return v
+
     @field_validator("currentPageNumber", mode="after")
     @classmethod
     def validate_page_number(cls, v: Optional[int]) -> Optional[int]:
@@ -55,6 +55,9 @@ class VideoSearchInput:
     sortBy: VideoSortOption = VideoSortOption.Latest
     fromPage: SearchFrom
     currentPageNumber: strawberry.auto
+    videoCodec: strawberry.auto = None
+    audioCodec: strawberry.auto = None
+    minHeight: strawberry.auto = None
 
 
 @strawberry.type
@@ -65,4 +68,5 @@ class VideoSearchResult:
 @strawberry.type
 class DirectoryMetadataResult:
     totalSize: float
-    lastModifiedTime: float
\ No newline at end of file
+    lastModifiedTime: float
+    videoCount: int = 0
\ No newline at end of file
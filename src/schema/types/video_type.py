@@ -24,8 +24,16 @@ class Video:
     tags: list[VideoTag]
     duration: float
 
-    # if None use default thumbnail in public/static/default_thumbnail.jpg
-    # TODO: determine how to handle video thumbnails
+    container: Optional[str] = None
+    videoCodec: Optional[str] = None
+    audioCodec: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    bitrate: Optional[int] = None
+    keyframeInterval: Optional[float] = None
+
+    # key of the generated thumbnail in the thumbnail store, None until the media worker or the first thumbnail request renders it
+    # (the front-end then shows the default thumbnail in public/static/default_thumbnail.jpg)
     thumbnail: Optional[str] = None 
 
     @classmethod
@@ -57,7 +65,14 @@ class Video:
                 for tag_name in tag_names
             ],
             thumbnail=videoModel.thumbnail,
-            duration=videoModel.duration or 0.0
+            duration=videoModel.duration or 0.0,
+            container=videoModel.container,
+            videoCodec=videoModel.videoCodec,
+            audioCodec=videoModel.audioCodec,
+            width=videoModel.width,
+            height=videoModel.height,
+            bitrate=videoModel.bitrate,
+            keyframeInterval=videoModel.keyframeInterval
         )
     
     @classmethod
@@ -0,0 +1,85 @@
+import asyncio
+import os
+from typing import Any
+
+import h11
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from uvicorn.protocols.http.h11_impl import H11Protocol, RequestResponseCycle
+
+from src.resolvers.file_response import ZEROCOPY_SEND_EXTENSION
+
+
+class _FileBody:
+    """Placeholder body handed to h11: it only needs the length to frame the bytes the kernel sends."""
+
+    def __init__(self, count: int) -> None:
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class SendfileH11Protocol(H11Protocol):
+    """
+    uvicorn's h11 protocol with the `http.response.zerocopysend` ASGI extension.
+
+    The file range of a zerocopysend message is pushed with `loop.sendfile` straight on the
+    connection's transport, which is kernel sendfile on plain sockets (asyncio falls back to
+    buffered reads on its own for TLS). h11 still frames the response: the body is passed
+    through as a placeholder of the right length, so Content-Length and chunked encoding
+    stay correct. Select it with `uvicorn --http src.server:SendfileH11Protocol`.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # uvloop has no loop.sendfile, only advertise the extension on the asyncio loop
+        if isinstance(self.loop, asyncio.BaseEventLoop):
+            self.app = self._with_zerocopysend(self.app)
+
+    def _with_zerocopysend(self, app: ASGIApp) -> ASGIApp:
+        async def wrapped_app(scope: Scope, receive: Receive, send: Send) -> None:
+            if scope["type"] != "http":
+                await app(scope, receive, send)
+                return
+            cycle = self.cycle
+            scope["extensions"] = {**(scope.get("extensions") or {}), ZEROCOPY_SEND_EXTENSION: {}}
+
+            async def zerocopy_send(message: Message) -> None:
+                if message["type"] == ZEROCOPY_SEND_EXTENSION:
+                    await self._send_file(cycle, message)
+                else:
+                    await send(message)
+
+            await app(scope, receive, zerocopy_send)
+
+        return wrapped_app
+
+    async def _send_file(self, cycle: RequestResponseCycle, message: Message) -> None:
+        if not cycle.response_started or cycle.response_complete:
+            raise RuntimeError(f"Unexpected ASGI message '{ZEROCOPY_SEND_EXTENSION}' outside of a response body.")
+        if cycle.flow.write_paused and not cycle.disconnected:
+            await cycle.flow.drain()
+        if cycle.disconnected:
+            return
+
+        file = message["file"]
+        offset = message.get("offset") or 0
+        count = message.get("count")
+        if count is None:
+            count = os.fstat(file.fileno()).st_size - offset
+
+        if count > 0 and cycle.scope["method"] != "HEAD":
+            for data in self.conn.send_with_data_passthrough(h11.Data(data=_FileBody(count))):
+                if isinstance(data, _FileBody):
+                    try:
+                        await self.loop.sendfile(cycle.transport, file, offset, count)
+                    except (ConnectionError, RuntimeError):
+                        # the client went away mid-transfer (RuntimeError: transport already closing)
+                        cycle.disconnected = True
+                        cycle.transport.close()
+                        return
+                else:
+                    cycle.transport.write(data)
+
+        if not message.get("more_body", False):
+            await cycle.send({"type": "http.response.body", "body": b"", "more_body": False})
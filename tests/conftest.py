@@ -11,7 +11,7 @@ from strawberry.fastapi import GraphQLRouter
 
 from src.app import schema
 from src.config import Settings
-from src.db.models.Video_model import VideoModel, VideoTagModel
+from src.db.models.Video_model import DirectoryModel, LibraryScanModel, VideoModel, VideoTagModel
 
 # ============================================================================
 # Test Config Fixtures
@@ -80,13 +80,15 @@ async def init_test_db(mock_db: AsyncMongoMockClient):
 
     await init_beanie(
         database=database,
-        document_models=[VideoModel, VideoTagModel]
+        document_models=[VideoModel, VideoTagModel, DirectoryModel, LibraryScanModel]
     )
 
     yield
 
     await VideoModel.delete_all()
     await VideoTagModel.delete_all()
+    await DirectoryModel.delete_all()
+    await LibraryScanModel.delete_all()
     
 
 # ============================================================================
@@ -0,0 +1,70 @@
+import struct
+
+import pytest
+
+from src.resolvers.container_header import read_header_duration
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def _mvhd(timescale: int, duration: int, version: int = 0) -> bytes:
+    if version == 1:
+        body = struct.pack(">QQIQ", 0, 0, timescale, duration)
+    else:
+        body = struct.pack(">IIII", 0, 0, timescale, duration)
+    return _box(b"mvhd", bytes([version, 0, 0, 0]) + body + b"\x00" * 80)
+
+
+def _ebml(element_id: int, payload: bytes) -> bytes:
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    # 8 byte size vint
+    return id_bytes + (0x01 << 56 | len(payload)).to_bytes(8, "big") + payload
+
+
+def _matroska(duration_ticks: float, timecode_scale: int = 1_000_000, doc_type: bytes = b"matroska") -> bytes:
+    header = _ebml(0x1A45DFA3, _ebml(0x4282, doc_type))
+    info = _ebml(0x1549A966, _ebml(0x2AD7B1, timecode_scale.to_bytes(3, "big")) + _ebml(0x4489, struct.pack(">d", duration_ticks)))
+    return header + _ebml(0x18538067, _ebml(0x114D9B74, b"\x00" * 32) + info + _ebml(0x1F43B675, b"\x00" * 64))
+
+
+@pytest.mark.unit
+class TestReadHeaderDuration:
+
+    def test_mp4_faststart(self, tmp_path):
+        video_file = tmp_path / "a.mp4"
+        video_file.write_bytes(_box(b"ftyp", b"isom" * 4) + _box(b"moov", _mvhd(1000, 90_500)) + _box(b"mdat", b"\x00" * 1024))
+        assert read_header_duration(str(video_file)) == pytest.approx(90.5)
+
+    def test_mov_with_moov_after_mdat_and_64bit_mvhd(self, tmp_path):
+        video_file = tmp_path / "a.mov"
+        video_file.write_bytes(_box(b"ftyp", b"qt  ") + _box(b"mdat", b"\x00" * 4096) + _box(b"moov", _mvhd(600, 600 * 3600, version=1)))
+        assert read_header_duration(str(video_file)) == pytest.approx(3600)
+
+    def test_fragmented_mp4_without_duration(self, tmp_path):
+        video_file = tmp_path / "a.m4v"
+        video_file.write_bytes(_box(b"ftyp", b"isom") + _box(b"moov", _mvhd(1000, 0)))
+        assert read_header_duration(str(video_file)) is None
+
+    def test_matroska_and_webm(self, tmp_path):
+        mkv_file = tmp_path / "a.mkv"
+        mkv_file.write_bytes(_matroska(12_345.0))
+        webm_file = tmp_path / "a.webm"
+        webm_file.write_bytes(_matroska(2_000.0, timecode_scale=500_000, doc_type=b"webm"))
+
+        assert read_header_duration(str(mkv_file)) == pytest.approx(12.345)
+        assert read_header_duration(str(webm_file)) == pytest.approx(1.0)
+
+    def test_unsupported_truncated_and_empty_files(self, tmp_path):
+        avi_file = tmp_path / "a.avi"
+        avi_file.write_bytes(b"RIFF\x00\x00\x00\x00AVI LIST")
+        truncated_file = tmp_path / "b.mp4"
+        truncated_file.write_bytes(_box(b"ftyp", b"isom") + struct.pack(">I4s", 200, b"moov") + b"\x00" * 10)
+        empty_file = tmp_path / "c.mkv"
+        empty_file.write_bytes(b"")
+
+        assert read_header_duration(str(avi_file)) is None
+        assert read_header_duration(str(truncated_file)) is None
+        assert read_header_duration(str(empty_file)) is None
+        assert read_header_duration(str(tmp_path / "missing.mp4")) is None
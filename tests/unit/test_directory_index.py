@@ -0,0 +1,342 @@
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+from pymongo import DeleteOne
+
+from src.config import get_settings
+from src.db.models.Video_model import NAME_COLLATION, DirectoryModel, VideoModel
+from src.resolvers import resolver_utils as resolver_utils_module
+from src.resolvers.media_worker import get_media_worker
+from src.resolvers.query_resolver import QueryResolver
+from src.resolvers.resolver_utils import resolver_utils
+from src.schema.types.fileBrowse_type import BrowsePageInput, BrowseSortOption, RelativePathInput
+from src.schema.types.pydantic_types.fileBrowe_type import BrowsePageInputModel
+
+
+@pytest.fixture
+def sequential_bulk_write(init_test_db, monkeypatch):
+    """mongomock does not accept the `sort` argument pymongo passes for UpdateOne in bulk_write: apply them one by one"""
+    for model in (DirectoryModel, VideoModel):
+        collection = model.get_pymongo_collection()
+
+        async def bulk_write(requests, ordered=True, collection=collection):
+            upserted_ids = {}
+            for index, request in enumerate(requests):
+                if isinstance(request, DeleteOne):
+                    await collection.delete_one(request._filter)
+                    continue
+                result = await collection.update_one(request._filter, request._doc, upsert=request._upsert)
+                if result.upserted_id is not None:
+                    upserted_ids[index] = result.upserted_id
+            return SimpleNamespace(upserted_ids=upserted_ids)
+
+        monkeypatch.setattr(collection, "bulk_write", bulk_write)
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch, sequential_bulk_write):
+    """lib/a/x.mp4 (10 B), lib/a/b/y.mkv (20 B), lib/c/readme.txt"""
+    root = tmp_path / "lib"
+    (root / "a" / "b").mkdir(parents=True)
+    (root / "c").mkdir()
+    (root / "a" / "x.mp4").write_bytes(b"x" * 10)
+    (root / "a" / "b" / "y.mkv").write_bytes(b"y" * 20)
+    (root / "c" / "readme.txt").write_text("not a video")
+
+    monkeypatch.setattr(get_settings(), "resource_paths", {"lib": str(root)})
+    monkeypatch.setattr(get_settings(), "ROOT_PATH", None)
+    monkeypatch.setattr(get_settings(), "video_extensions", [".mp4", ".mkv"])
+    monkeypatch.setattr(get_media_worker(), "enqueue", lambda video_ids, priority: None)
+    resolver_utils_module._dir_cache.clear()
+    yield resolver_utils().get_path_standard_format(str(root))
+    resolver_utils_module._dir_cache.clear()
+
+
+async def browse(abs_path: str, **page):
+    """First page of a directory, synced from disk like the resolver does"""
+    await resolver_utils().sync_directory_listing(abs_path)
+    return await resolver_utils().get_directory_page(abs_path, BrowsePageInputModel(**page))
+
+
+@pytest.mark.unit
+class TestDirectoryIndex:
+
+    @pytest.mark.asyncio
+    async def test_scan_indexes_the_whole_subtree(self, library):
+        aggregates = await resolver_utils().get_directory_aggregates([library])
+
+        assert aggregates[library].size == 30
+        assert aggregates[library].videoCount == 2
+        indexed = {doc.path: doc for doc in await DirectoryModel.find_all().to_list()}
+        assert set(indexed) == {library, f"{library}/a", f"{library}/a/b", f"{library}/c"}
+        assert indexed[f"{library}/a/b"].parent == f"{library}/a"
+        assert indexed[library].parent is None
+        assert indexed[f"{library}/c"].videoCount == 0
+
+    @pytest.mark.asyncio
+    async def test_indexed_directories_are_not_rescanned(self, library, monkeypatch):
+        await resolver_utils().get_directory_aggregates([library])
+        resolver_utils_module._dir_cache.clear()
+
+        def fail_scan(paths):
+            raise AssertionError("an indexed directory must not be scanned")
+
+        monkeypatch.setattr(resolver_utils(), "scan_directory_trees", fail_scan)
+
+        aggregates = await resolver_utils().get_directory_aggregates([f"{library}/a", f"{library}/a/b"])
+        assert aggregates[f"{library}/a"].size == 30
+        assert aggregates[f"{library}/a/b"].videoCount == 1
+
+    @pytest.mark.asyncio
+    async def test_removal_updates_the_ancestor_chain(self, library):
+        await resolver_utils().get_directory_aggregates([library])
+
+        await resolver_utils().update_directory_aggregates([(f"{library}/a/b/y.mkv", -20, -1, 0.0)])
+
+        indexed = {doc.path: doc for doc in await DirectoryModel.find_all().to_list()}
+        assert (indexed[f"{library}/a/b"].size, indexed[f"{library}/a/b"].videoCount) == (0, 0)
+        assert (indexed[f"{library}/a"].size, indexed[f"{library}/a"].videoCount) == (10, 1)
+        assert (indexed[library].size, indexed[library].videoCount) == (10, 1)
+
+    @pytest.mark.asyncio
+    async def test_refresh_propagates_the_difference_to_ancestors(self, library, tmp_path):
+        await resolver_utils().get_directory_aggregates([library])
+        (tmp_path / "lib" / "a" / "b" / "z.mp4").write_bytes(b"z" * 5)
+
+        await resolver_utils().get_directory_aggregates([f"{library}/a/b"], refreshFlag=True)
+
+        root = await DirectoryModel.find_one({"path": library})
+        assert (root.size, root.videoCount) == (35, 3)
+
+    @pytest.mark.asyncio
+    async def test_first_index_of_a_sub_directory_adds_its_whole_tree_to_ancestors(self, library, tmp_path):
+        await resolver_utils().get_directory_aggregates([library])
+        (tmp_path / "lib" / "a" / "n" / "m").mkdir(parents=True)
+        (tmp_path / "lib" / "a" / "n" / "m" / "w.mp4").write_bytes(b"w" * 5)
+        os.utime(tmp_path / "lib" / "a" / "n" / "m" / "w.mp4", (4_000_000_000, 4_000_000_000))
+
+        await resolver_utils().get_directory_aggregates([f"{library}/a/n"])
+
+        for path in (f"{library}/a", library):
+            indexed = await DirectoryModel.find_one({"path": path})
+            assert (indexed.size, indexed.videoCount, indexed.lastModifyTime) == (35, 3, 4_000_000_000)
+
+    @pytest.mark.asyncio
+    async def test_parent_refresh_counts_a_new_sub_directory_once(self, library, tmp_path):
+        await resolver_utils().get_directory_aggregates([library])
+        (tmp_path / "lib" / "a" / "n").mkdir()
+        (tmp_path / "lib" / "a" / "n" / "w.mp4").write_bytes(b"w" * 5)
+
+        await resolver_utils().refresh_directory_aggregate(f"{library}/a")
+
+        for path in (f"{library}/a", library):
+            indexed = await DirectoryModel.find_one({"path": path})
+            assert (indexed.size, indexed.videoCount) == (35, 3)
+
+    @pytest.mark.asyncio
+    async def test_browse_lists_only_directories_with_videos(self, library):
+        nodes = (await browse(library)).nodes
+
+        directories = [n.node for n in nodes if n.node.isDir]
+        assert [d.name for d in directories] == ["a"]
+        assert directories[0].size == 30
+
+    @pytest.mark.asyncio
+    async def test_browse_inserts_missing_videos_in_one_bulk_write(self, library, tmp_path, monkeypatch):
+        (tmp_path / "lib" / "a" / "w.mp4").write_bytes(b"w" * 5)
+        await VideoModel(
+            path=f"{library}/a/x.mp4", name="x.mp4", isDir=False, lastModifyTime=0.0, size=10, tags=["kept"]
+        ).insert()
+        collection = VideoModel.get_pymongo_collection()
+        bulk_write = collection.bulk_write
+        bulk_writes = []
+
+        async def counting_bulk_write(requests, ordered=True):
+            bulk_writes.append([request._filter["path"] for request in requests])
+            await bulk_write(requests, ordered)
+
+        monkeypatch.setattr(collection, "bulk_write", counting_bulk_write)
+
+        nodes = (await browse(f"{library}/a")).nodes
+
+        videos = {n.node.name: n.node for n in nodes if not n.node.isDir}
+        assert set(videos) == {"x.mp4", "w.mp4"}
+        assert [tag.name for tag in videos["x.mp4"].tags] == ["kept"]
+        assert bulk_writes == [[f"{library}/a/w.mp4"]]
+        assert await VideoModel.find_one({"path": f"{library}/a/w.mp4"}) is not None
+
+    @pytest.mark.asyncio
+    async def test_pages_list_directories_then_videos_in_sort_order(self, library, tmp_path):
+        (tmp_path / "lib" / "a" / "e").mkdir()
+        (tmp_path / "lib" / "a" / "e" / "u.mp4").write_bytes(b"u" * 50)
+        (tmp_path / "lib" / "a" / "w.mp4").write_bytes(b"w" * 5)
+        (tmp_path / "lib" / "a" / "v.mp4").write_bytes(b"v" * 30)
+
+        page = await browse(f"{library}/a", sortBy="Size", ascending=False, pageSize=2)
+        names = [n.node.name for n in page.nodes]
+        while page.nextCursor is not None:
+            page = await resolver_utils().get_directory_page(
+                f"{library}/a", BrowsePageInputModel(sortBy="Size", ascending=False, pageSize=2, cursor=page.nextCursor)
+            )
+            names += [n.node.name for n in page.nodes]
+
+        assert names == ["e", "b", "v.mp4", "x.mp4", "w.mp4"]
+        assert page.totalCount == 5
+
+    @pytest.mark.asyncio
+    async def test_cursor_pages_are_read_from_the_index_only(self, library, tmp_path, monkeypatch):
+        for name in ("p.mp4", "q.mp4", "r.mp4"):
+            (tmp_path / "lib" / "a" / name).write_bytes(b"p")
+        path = RelativePathInput(relativePath="lib/a")
+        first = await QueryResolver().resolve_browse_directory(path, BrowsePageInput(pageSize=3))
+
+        def fail_scan(abs_path):
+            raise AssertionError("the directory was listed again")
+
+        monkeypatch.setattr(resolver_utils(), "_scan_directory_listing", fail_scan)
+        second = await QueryResolver().resolve_browse_directory(path, BrowsePageInput(pageSize=3, cursor=first.nextCursor))
+
+        assert [n.node.name for n in first.nodes] == ["b", "p.mp4", "q.mp4"]
+        assert [n.node.name for n in second.nodes] == ["r.mp4", "x.mp4"]
+        assert second.nextCursor is None
+
+    @pytest.mark.asyncio
+    async def test_first_page_removes_videos_gone_from_disk(self, library):
+        await VideoModel(
+            path=f"{library}/a/gone.mp4", name="gone.mp4", isDir=False, lastModifyTime=0.0, size=1, tags=[]
+        ).insert()
+
+        page = await QueryResolver().resolve_browse_directory(
+            RelativePathInput(relativePath="lib/a"), BrowsePageInput(sortBy=BrowseSortOption.LastModifyTime)
+        )
+
+        assert "gone.mp4" not in [n.node.name for n in page.nodes]
+        assert await VideoModel.find_one({"path": f"{library}/a/gone.mp4"}) is None
+
+    @pytest.mark.asyncio
+    async def test_stale_directories_are_removed_with_their_videos(self, library, tmp_path, monkeypatch):
+        monkeypatch.setattr(get_settings().watcher, "enabled", False)
+        await resolver_utils().get_directory_aggregates([library])
+        await VideoModel(
+            path=f"{library}/a/b/y.mkv", name="y.mkv", isDir=False, lastModifyTime=0.0, size=20, tags=[]
+        ).insert()
+        (tmp_path / "lib" / "a" / "b" / "y.mkv").unlink()
+        (tmp_path / "lib" / "a" / "b").rmdir()
+
+        await QueryResolver().resolve_browse_directory(RelativePathInput(relativePath="lib/a"))
+
+        assert await VideoModel.find_one({"path": f"{library}/a/b/y.mkv"}) is None
+        assert await DirectoryModel.find_one({"path": f"{library}/a/b"}) is None
+        for path in (f"{library}/a", library):
+            indexed = await DirectoryModel.find_one({"path": path})
+            assert (indexed.size, indexed.videoCount) == (10, 1)
+
+    @pytest.mark.asyncio
+    async def test_entries_are_counted_for_the_first_page_only(self, library, tmp_path, monkeypatch):
+        for name in ("p.mp4", "q.mp4", "r.mp4"):
+            (tmp_path / "lib" / "a" / name).write_bytes(b"p")
+        first = await browse(f"{library}/a", pageSize=2)
+        collection = VideoModel.get_pymongo_collection()
+
+        async def fail_count(query):
+            raise AssertionError("the entries were counted again")
+
+        monkeypatch.setattr(collection, "count_documents", fail_count)
+        second = await resolver_utils().get_directory_page(
+            f"{library}/a", BrowsePageInputModel(pageSize=2, cursor=first.nextCursor)
+        )
+
+        assert first.totalCount == second.totalCount == 5
+
+    @pytest.mark.asyncio
+    async def test_name_sort_uses_the_case_insensitive_collation(self, library, monkeypatch):
+        collection = VideoModel.get_pymongo_collection()
+        find = collection.find
+        collations = []
+
+        def recording_find(query, *args, **kwargs):
+            collations.append(kwargs.get("collation"))
+            return find(query, *args, **kwargs)
+
+        monkeypatch.setattr(collection, "find", recording_find)
+        await resolver_utils().get_directory_page(f"{library}/a", BrowsePageInputModel(sortBy="Name"))
+        await resolver_utils().get_directory_page(f"{library}/a", BrowsePageInputModel(sortBy="Size"))
+
+        assert collations[0] == NAME_COLLATION and collations[0].document["strength"] == 3
+        assert collations[1] is None
+
+    def test_trees_deeper_than_the_recursion_limit_are_scanned(self, library, tmp_path):
+        deep = tmp_path / "lib" / "c"
+        for _ in range(1100):
+            deep = deep / "d"
+            deep.mkdir()
+        (deep / "z.mp4").write_bytes(b"z" * 5)
+
+        try:
+            scanned = resolver_utils().scan_directory_trees([f"{library}/a", f"{library}/c"])
+        finally:
+            # pytest removes its temporary directories recursively, it would hit the recursion limit too
+            (deep / "z.mp4").unlink()
+            while deep.name == "d":
+                deep.rmdir()
+                deep = deep.parent
+
+        assert [(d.path, d.size, d.videoCount) for d in scanned[f"{library}/a"]] == [
+            (f"{library}/a/b", 20, 1), (f"{library}/a", 30, 2)
+        ]
+        assert len(scanned[f"{library}/c"]) == 1101
+        assert all((d.size, d.videoCount) == (5, 1) for d in scanned[f"{library}/c"])
+
+    def test_symlinked_directories_are_not_followed(self, library, tmp_path):
+        (tmp_path / "lib" / "a" / "b" / "loop").symlink_to(tmp_path / "lib" / "a")
+
+        scanned = resolver_utils().scan_directory_trees([f"{library}/a"])
+
+        assert [(d.path, d.size, d.videoCount) for d in scanned[f"{library}/a"]] == [
+            (f"{library}/a/b", 20, 1), (f"{library}/a", 30, 2)
+        ]
+
+    def test_scan_errors_are_raised_instead_of_hanging(self, library, monkeypatch):
+        scan_level = resolver_utils().__class__._scan_directory_level
+
+        def failing_scan_level(self, directory_path):
+            if directory_path.endswith("/b"):
+                raise ValueError("boom")
+            return scan_level(self, directory_path)
+
+        monkeypatch.setattr(resolver_utils().__class__, "_scan_directory_level", failing_scan_level)
+
+        with pytest.raises(ValueError, match="boom"):
+            resolver_utils().scan_directory_trees([f"{library}/a"])
+
+    def test_scan_fails_when_the_executor_rejects_sub_directories(self, library, monkeypatch):
+        executor = resolver_utils_module.get_directory_scan_executor()
+
+        class ShuttingDownExecutor:
+            def __init__(self):
+                self.submitted = 0
+
+            def submit(self, fn, *args):
+                self.submitted += 1
+                if self.submitted > 1:
+                    raise RuntimeError("cannot schedule new futures after shutdown")
+                return executor.submit(fn, *args)
+
+        rejecting = ShuttingDownExecutor()
+        monkeypatch.setattr(resolver_utils_module, "get_directory_scan_executor", lambda: rejecting)
+
+        with pytest.raises(RuntimeError, match="shutdown"):
+            resolver_utils().scan_directory_trees([f"{library}/a"])
+
+    def test_stuck_scan_times_out(self, library, monkeypatch):
+        release = threading.Event()
+        monkeypatch.setattr(get_settings(), "directory_scan_timeout", 0.05)
+        monkeypatch.setattr(resolver_utils().__class__, "_scan_directory_level", lambda self, path: release.wait(5))
+
+        try:
+            with pytest.raises(TimeoutError):
+                resolver_utils().scan_directory_trees([f"{library}/a"])
+        finally:
+            release.set()
@@ -0,0 +1,203 @@
+import asyncio
+import socket
+
+import pytest
+import uvicorn
+
+from src.resolvers.file_response import (
+    PATH_SEND_EXTENSION, ZEROCOPY_SEND_EXTENSION, FileRangeResponse, MultipartByteRangesResponse,
+)
+from src.resolvers.process_limiter import get_process_limiter
+from src.server import SendfileH11Protocol
+
+
+async def _collect(response: FileRangeResponse, extensions: dict | None) -> list[dict]:
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    async def receive():
+        return {"type": "http.request"}
+
+    scope = {"type": "http", "method": "GET"}
+    if extensions is not None:
+        scope["extensions"] = extensions
+    await response(scope, receive, send)
+    return messages
+
+
+@pytest.mark.unit
+class TestFileRangeResponse:
+
+    @pytest.mark.asyncio
+    async def test_chunked_fallback_serves_requested_range(self, tmp_path):
+        video_file = tmp_path / "video.mp4"
+        video_file.write_bytes(bytes(range(256)) * 4)
+
+        response = FileRangeResponse(str(video_file), start=10, length=100, status_code=206, chunk_size=32)
+        messages = await _collect(response, extensions={})
+
+        assert messages[0]["status"] == 206
+        body = b"".join(m.get("body", b"") for m in messages[1:])
+        assert body == (bytes(range(256)) * 4)[10:110]
+        assert messages[-1]["more_body"] is False
+
+    @pytest.mark.asyncio
+    async def test_zerocopy_extension_receives_offset_and_count(self, tmp_path):
+        video_file = tmp_path / "video.mp4"
+        video_file.write_bytes(b"x" * 1000)
+
+        response = FileRangeResponse(str(video_file), start=200, length=300, status_code=206)
+        messages = await _collect(response, extensions={ZEROCOPY_SEND_EXTENSION: {}})
+
+        assert messages[1]["type"] == ZEROCOPY_SEND_EXTENSION
+        assert messages[1]["offset"] == 200
+        assert messages[1]["count"] == 300
+
+    @pytest.mark.asyncio
+    async def test_sendfile_disabled_ignores_extension(self, tmp_path):
+        video_file = tmp_path / "video.mp4"
+        video_file.write_bytes(b"x" * 1000)
+
+        response = FileRangeResponse(str(video_file), start=0, length=1000, use_sendfile=False)
+        messages = await _collect(response, extensions={ZEROCOPY_SEND_EXTENSION: {}})
+
+        assert all(m["type"] != ZEROCOPY_SEND_EXTENSION for m in messages)
+
+    @pytest.mark.asyncio
+    async def test_multipart_byteranges_body_matches_content_length(self, tmp_path):
+        content = bytes(range(256)) * 4
+        video_file = tmp_path / "video.mp4"
+        video_file.write_bytes(content)
+
+        response = MultipartByteRangesResponse(
+            str(video_file), ranges=[(0, 9), (1000, 1023)], file_size=len(content), content_type="video/mp4"
+        )
+        messages = await _collect(response, extensions={})
+
+        headers = dict(messages[0]["headers"])
+        body = b"".join(m.get("body", b"") for m in messages[1:])
+        assert messages[0]["status"] == 206
+        assert headers[b"content-type"].startswith(b"multipart/byteranges; boundary=")
+        assert int(headers[b"content-length"]) == len(body)
+        assert b"Content-Range: bytes 0-9/1024\r\n\r\n" + content[:10] + b"\r\n" in body
+        assert b"Content-Range: bytes 1000-1023/1024\r\n\r\n" + content[1000:] + b"\r\n" in body
+
+    @pytest.mark.asyncio
+    async def test_pathsend_extension_serves_the_whole_file(self, tmp_path):
+        video_file = tmp_path / "video.mp4"
+        video_file.write_bytes(b"x" * 1000)
+
+        whole = await _collect(FileRangeResponse(str(video_file), start=0, length=1000), {PATH_SEND_EXTENSION: {}})
+        partial = await _collect(
+            FileRangeResponse(str(video_file), start=10, length=100, status_code=206), {PATH_SEND_EXTENSION: {}}
+        )
+
+        assert whole[1:] == [{"type": PATH_SEND_EXTENSION, "path": str(video_file)}]
+        # a byte range cannot be expressed with pathsend
+        assert all(m["type"] == "http.response.body" for m in partial[1:])
+
+    @pytest.mark.asyncio
+    async def test_uvicorn_scope_uses_chunked_reads(self, tmp_path):
+        video_file = tmp_path / "video.mp4"
+        video_file.write_bytes(b"x" * 1000)
+
+        # stock uvicorn sets no `extensions` in the HTTP scope
+        messages = await _collect(FileRangeResponse(str(video_file), start=0, length=1000, chunk_size=256), None)
+
+        assert [m["type"] for m in messages[1:]] == ["http.response.body"] * 5
+        assert b"".join(m["body"] for m in messages[1:]) == b"x" * 1000
+
+    @pytest.mark.asyncio
+    async def test_only_counted_get_bodies_are_active_streams(self, tmp_path):
+        video_file = tmp_path / "video.mp4"
+        video_file.write_bytes(b"x" * 1000)
+        limiter = get_process_limiter()
+        seen = []
+
+        async def send(message):
+            seen.append(limiter.active_streams)
+
+        async def receive():
+            return {"type": "http.request"}
+
+        for method, count_stream in (("GET", True), ("HEAD", True), ("GET", False)):
+            response = FileRangeResponse(str(video_file), start=0, length=1000, count_stream=count_stream)
+            await response({"type": "http", "method": method}, receive, send)
+
+        assert seen == [1, 1, 1] + [0] * 2 + [0] * 3
+        assert limiter.active_streams == 0
+
+
+async def _fetch_with_sendfile_protocol(response: FileRangeResponse, method: str = "GET") -> tuple[bytes, bytes, dict]:
+    """Serve `response` once through uvicorn with `SendfileH11Protocol`, return (head, body, scope)."""
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen.update(scope)
+        await response(scope, receive, send)
+
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, http=SendfileH11Protocol, lifespan="off", log_level="warning"))
+    serve_task = asyncio.create_task(server.serve(sockets=[listener]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        reader, writer = await asyncio.open_connection(*listener.getsockname())
+        writer.write(f"{method} /video HTTP/1.1\r\nHost: test\r\nConnection: close\r\n\r\n".encode())
+        raw = await reader.read(-1)
+        writer.close()
+    finally:
+        server.should_exit = True
+        await serve_task
+        listener.close()
+    head, _, body = raw.partition(b"\r\n\r\n")
+    return head, body, seen
+
+
+@pytest.mark.unit
+class TestSendfileH11Protocol:
+
+    @pytest.mark.asyncio
+    async def test_range_is_sent_with_sendfile(self, tmp_path):
+        video_file = tmp_path / "video.mp4"
+        content = bytes(range(256)) * 64
+        video_file.write_bytes(content)
+
+        head, body, scope = await _fetch_with_sendfile_protocol(FileRangeResponse(
+            str(video_file), start=1000, length=5000, status_code=206, headers={"Content-Length": "5000"}
+        ))
+
+        assert ZEROCOPY_SEND_EXTENSION in scope["extensions"]
+        assert head.startswith(b"HTTP/1.1 206")
+        assert body == content[1000:6000]
+
+    @pytest.mark.asyncio
+    async def test_multipart_parts_are_framed_around_sendfile(self, tmp_path):
+        video_file = tmp_path / "video.mp4"
+        content = bytes(range(256)) * 4
+        video_file.write_bytes(content)
+        response = MultipartByteRangesResponse(
+            str(video_file), ranges=[(0, 9), (500, 599)], file_size=1024, content_type="video/mp4"
+        )
+
+        head, body, _ = await _fetch_with_sendfile_protocol(response)
+
+        assert f"content-length: {response.length}".encode() in head.lower()
+        assert len(body) == response.length
+        assert content[0:10] in body and content[500:600] in body
+        assert body.endswith(response.closing)
+
+    @pytest.mark.asyncio
+    async def test_head_sends_no_body(self, tmp_path):
+        video_file = tmp_path / "video.mp4"
+        video_file.write_bytes(b"x" * 1000)
+
+        head, body, _ = await _fetch_with_sendfile_protocol(
+            FileRangeResponse(str(video_file), start=0, length=1000, headers={"Content-Length": "1000"}), "HEAD"
+        )
+
+        assert head.startswith(b"HTTP/1.1 200")
+        assert body == b""
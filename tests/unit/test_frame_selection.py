@@ -0,0 +1,47 @@
+import pytest
+
+from src.resolvers.frame_selection import (
+    SAMPLE_BYTES,
+    build_frame_sampling_command,
+    pick_representative,
+    sample_timestamps,
+    score_frame,
+)
+
+
+def _frame(values: bytes) -> bytes:
+    return (values * (SAMPLE_BYTES // len(values) + 1))[:SAMPLE_BYTES]
+
+
+@pytest.mark.unit
+class TestFrameSelection:
+
+    def test_samples_skip_intro_and_credits(self):
+        timestamps = sample_timestamps(1000.0, 5)
+
+        assert timestamps == [50.0, 250.0, 450.0, 650.0, 850.0]
+        assert sample_timestamps(0.0, 5) == []
+
+    def test_black_and_flat_frames_score_low(self):
+        textured = score_frame(_frame(bytes(range(256))))
+
+        assert score_frame(_frame(b"\x00")) < 0.1 * textured
+        assert score_frame(_frame(b"\xff")) < 0.1 * textured
+        # a mid-gray title card: exposed correctly but without any information
+        assert score_frame(_frame(b"\x80")) == 0.0
+
+    def test_pick_representative(self):
+        frames = _frame(b"\x00") + _frame(bytes(range(64, 128))) + _frame(bytes(range(256)))
+
+        assert pick_representative(frames, [1.0, 2.0, 3.0]) == 3.0
+        # a sample without frame makes the output ambiguous
+        assert pick_representative(frames[:-1], [1.0, 2.0, 3.0]) is None
+
+    def test_one_fast_seek_input_per_sample(self):
+        command = build_frame_sampling_command("/v/a.mkv", [10.0, 20.0])
+
+        assert command.count("-i") == 2
+        assert command.count("-noaccurate_seek") == 2
+        assert command.index("-ss") < command.index("-i")
+        assert "concat=n=2:v=1:a=0[out]" in command[command.index("-filter_complex") + 1]
+        assert command[-3:] == ["-f", "rawvideo", "pipe:1"]
@@ -0,0 +1,46 @@
+import pytest
+
+from src.resolvers.hot_thumbnail_cache import HotThumbnailCache
+
+
+@pytest.mark.unit
+class TestHotThumbnailCache:
+
+    def test_hit_returns_same_object(self):
+        cache = HotThumbnailCache(max_size_bytes=100, max_item_bytes=100)
+        data = b"jpeg-bytes"
+
+        assert cache.get("a") is None
+        cache.put("a", data)
+
+        assert cache.get("a") is data
+        assert cache.stats()["hitRatio"] == 0.5
+
+    def test_budget_is_in_bytes(self):
+        cache = HotThumbnailCache(max_size_bytes=25, max_item_bytes=25)
+        cache.put("a", b"a" * 10)
+        cache.put("b", b"b" * 10)
+        cache.get("a")
+        cache.put("c", b"c" * 10)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        stats = cache.stats()
+        assert stats["bytes"] == 20
+        assert stats["evictions"] == 1
+
+    def test_oversized_item_is_not_cached(self):
+        cache = HotThumbnailCache(max_size_bytes=100, max_item_bytes=10)
+        cache.put("small", b"s" * 10)
+        cache.put("poster", b"p" * 11)
+
+        assert cache.get("poster") is None
+        assert cache.get("small") is not None
+
+    def test_replacing_an_entry_updates_its_size(self):
+        cache = HotThumbnailCache(max_size_bytes=100, max_item_bytes=100)
+        cache.put("a", b"a" * 10)
+        cache.put("a", b"a" * 30)
+
+        assert cache.stats()["bytes"] == 30
+        assert cache.stats()["entries"] == 1
@@ -0,0 +1,37 @@
+import pytest
+
+from src.config import PreviewConfig
+from src.resolvers.hover_preview import HoverPreviewSpec
+
+
+@pytest.mark.unit
+class TestHoverPreviewSpec:
+
+    def test_clip_starts_at_thumbnail_position(self):
+        spec = HoverPreviewSpec.for_video(600.0, 60.0, PreviewConfig())
+
+        assert spec.start == 60.0
+        assert spec.duration == 3
+        assert spec.media_type == "video/webm"
+
+    def test_clip_is_moved_back_to_fit_in_the_video(self):
+        spec = HoverPreviewSpec.for_video(10.0, 9.0, PreviewConfig())
+        assert spec.start + spec.duration == 10.0
+
+        short = HoverPreviewSpec.for_video(2.0, 0.2, PreviewConfig())
+        assert (short.start, short.duration) == (0.0, 2.0)
+
+    def test_store_key_depends_on_encoding(self):
+        webm = HoverPreviewSpec.for_video(600.0, 60.0, PreviewConfig())
+        webp = HoverPreviewSpec.for_video(600.0, 60.0, PreviewConfig(format="webp"))
+
+        assert webm.store_key("/v.mp4", 1.0, 1) != webp.store_key("/v.mp4", 1.0, 1)
+        assert webp.media_type == "image/webp"
+
+    def test_command_seeks_before_input_and_drops_audio(self):
+        command = HoverPreviewSpec.for_video(600.0, 60.0, PreviewConfig()).build_command("/v.mp4", "/tmp/out.webm")
+
+        assert command.index("-ss") < command.index("-i")
+        assert "-an" in command
+        assert command[command.index("-c:v") + 1] == "libvpx-vp9"
+        assert command[-1] == "/tmp/out.webm"
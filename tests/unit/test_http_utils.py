@@ -0,0 +1,103 @@
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+
+from src.resolvers.http_utils import (
+    accepts_media_type, http_date, if_range_matches, is_not_modified, make_etag, parse_range_header,
+)
+
+
+@pytest.mark.unit
+class TestParseRangeHeader:
+
+    def test_single_closed_range(self):
+        assert parse_range_header("bytes=0-99", 1000) == [(0, 99)]
+
+    def test_open_ended_range(self):
+        assert parse_range_header("bytes=900-", 1000) == [(900, 999)]
+
+    def test_suffix_range(self):
+        assert parse_range_header("bytes=-100", 1000) == [(900, 999)]
+
+    def test_suffix_longer_than_file(self):
+        assert parse_range_header("bytes=-5000", 1000) == [(0, 999)]
+
+    def test_end_is_clamped_to_file_size(self):
+        assert parse_range_header("bytes=500-5000", 1000) == [(500, 999)]
+
+    def test_multiple_ranges_are_sorted_and_coalesced(self):
+        assert parse_range_header("bytes=-100, 0-9, 5-20, 21-30", 1000) == [(0, 30), (900, 999)]
+
+    def test_unsatisfiable_ranges_are_dropped(self):
+        assert parse_range_header("bytes=2000-, 0-1", 1000) == [(0, 1)]
+
+    def test_all_unsatisfiable_raises_416(self):
+        with pytest.raises(HTTPException) as exc_info:
+            parse_range_header("bytes=1000-1100", 1000)
+        assert exc_info.value.status_code == 416
+        assert exc_info.value.headers["Content-Range"] == "bytes */1000"
+
+    @pytest.mark.parametrize("header", ["items=0-1", "bytes=", "bytes=abc", "bytes=5-1", "bytes=1-2-3", "bytes=-"])
+    def test_malformed_header_is_ignored(self, header):
+        assert parse_range_header(header, 1000) is None
+
+
+@pytest.mark.unit
+class TestIfRangeMatches:
+
+    def test_missing_if_range_matches(self):
+        assert if_range_matches(None, None, None) is True
+
+    def test_date_must_equal_last_modified(self):
+        last_modified = http_date(1640000000.0)
+        assert if_range_matches(last_modified, None, last_modified) is True
+        assert if_range_matches(http_date(1640000001.0), None, last_modified) is False
+
+    def test_etag_requires_strong_match(self):
+        assert if_range_matches('"abc"', '"abc"', None) is True
+        assert if_range_matches('W/"abc"', '"abc"', None) is False
+        assert if_range_matches('"abc"', None, http_date(0)) is False
+
+
+@pytest.mark.unit
+class TestConditionalRequests:
+
+    def test_etag_changes_with_file_identity(self):
+        etag = make_etag("/test/video.mp4", 1640000000.0, 1024)
+        assert etag.startswith('"') and etag.endswith('"')
+        assert etag == make_etag("/test/video.mp4", 1640000000.0, 1024)
+        assert etag != make_etag("/test/video.mp4", 1640000001.0, 1024)
+        assert etag != make_etag("/test/video.mp4", 1640000000.0, 2048)
+
+    def test_if_none_match(self):
+        etag = make_etag("/test/video.mp4", 1640000000.0, 1024)
+        assert is_not_modified(Headers({"If-None-Match": f'"other", W/{etag}'}), etag, 1640000000.0)
+        assert is_not_modified(Headers({"If-None-Match": "*"}), etag, 1640000000.0)
+        assert not is_not_modified(Headers({"If-None-Match": '"other"'}), etag, 1640000000.0)
+
+    def test_if_none_match_takes_precedence_over_if_modified_since(self):
+        headers = Headers({"If-None-Match": '"other"', "If-Modified-Since": http_date(1640000000.0)})
+        assert not is_not_modified(headers, make_etag("/p", 1640000000.0, 1), 1640000000.0)
+
+    def test_if_modified_since(self):
+        etag = make_etag("/p", 1640000000.5, 1)
+        assert is_not_modified(Headers({"If-Modified-Since": http_date(1640000000.5)}), etag, 1640000000.5)
+        assert not is_not_modified(Headers({"If-Modified-Since": http_date(1630000000.0)}), etag, 1640000000.5)
+        assert not is_not_modified(Headers({"If-Modified-Since": "not a date"}), etag, 1640000000.5)
+
+
+@pytest.mark.unit
+class TestAcceptsMediaType:
+
+    @pytest.mark.parametrize("accept, expected", [
+        ("image/webp", True),
+        ("image/avif,IMAGE/WEBP,*/*", True),
+        ("image/webp;q=0.1", True),
+        ("image/webp;q=0", False),
+        ("image/webp; q=0.000", False),
+        ("image/webp;q=oops", False),
+        ("image/*,*/*;q=0.8", False),
+        (None, False),
+    ])
+    def test_explicit_media_range_with_non_zero_quality(self, accept, expected):
+        assert accepts_media_type(accept, "image/webp") is expected
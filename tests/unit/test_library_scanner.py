@@ -0,0 +1,120 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.config import get_settings
+from src.db.models.Video_model import LibraryScanModel, VideoModel
+from src.resolvers.library_scanner import LibraryScanner
+from src.resolvers.media_worker import get_media_worker
+from src.resolvers.resolver_utils import resolver_utils
+from src.resolvers.thumbnail_resolver import VideoProbeResult, get_thumbnail_resolver
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch, init_test_db):
+    """lib/v0.mp4, lib/a/v1.mp4, lib/a/b/v2.mp4 and lib/a/b/v3.mp4, plus a text file"""
+    root = tmp_path / "lib"
+    (root / "a" / "b").mkdir(parents=True)
+    for index, directory in enumerate(["", "a", "a/b", "a/b"]):
+        (root / directory / f"v{index}.mp4").write_bytes(b"v" * (index + 1))
+    (root / "a" / "notes.txt").write_text("not a video")
+
+    monkeypatch.setattr(get_settings(), "resource_paths", {"lib": str(root)})
+    monkeypatch.setattr(get_settings(), "ROOT_PATH", None)
+    monkeypatch.setattr(get_settings(), "video_extensions", [".mp4"])
+    enqueued = []
+    monkeypatch.setattr(get_media_worker(), "enqueue", lambda video_ids, priority: enqueued.extend(video_ids))
+
+    async def probe(path):
+        return VideoProbeResult(duration=12.0)
+
+    monkeypatch.setattr(get_thumbnail_resolver(), "quick_probe", probe)
+
+    # mongomock does not accept the `sort` argument pymongo passes for UpdateOne in bulk_write
+    collection = VideoModel.get_pymongo_collection()
+
+    async def bulk_write(requests, ordered=True):
+        upserted_ids = {}
+        for index, request in enumerate(requests):
+            result = await collection.update_one(request._filter, request._doc, upsert=request._upsert)
+            if result.upserted_id is not None:
+                upserted_ids[index] = result.upserted_id
+        return SimpleNamespace(upserted_ids=upserted_ids)
+
+    monkeypatch.setattr(collection, "bulk_write", bulk_write)
+    return SimpleNamespace(path=resolver_utils().get_path_standard_format(str(root)), enqueued=enqueued)
+
+
+async def run_scan(scanner: LibraryScanner, restart: bool = False) -> LibraryScanModel:
+    await scanner.start(restart)
+    await scanner._task
+    return await LibraryScanModel.find_one()
+
+
+@pytest.mark.unit
+class TestLibraryScanner:
+
+    @pytest.mark.asyncio
+    async def test_scan_inserts_missing_videos_with_probed_duration(self, library):
+        await VideoModel(
+            path=f"{library.path}/a/v1.mp4", name="v1.mp4", isDir=False, lastModifyTime=0.0, size=2, tags=["kept"]
+        ).insert()
+
+        scan = await run_scan(LibraryScanner(batch_size=2))
+
+        videos = {video.name: video for video in await VideoModel.find_all().to_list()}
+        assert set(videos) == {"v0.mp4", "v1.mp4", "v2.mp4", "v3.mp4"}
+        assert videos["v1.mp4"].tags == ["kept"]
+        assert videos["v3.mp4"].duration == 12.0
+        assert (scan.status, scan.pendingDirectories, scan.videosSeen, scan.videosAdded) == ("Done", [], 4, 3)
+        assert len(library.enqueued) == 3
+
+    @pytest.mark.asyncio
+    async def test_interrupted_scan_resumes_from_its_checkpoint(self, library):
+        await LibraryScanModel(status="Running", pendingDirectories=[f"{library.path}/a/b"], videosSeen=2).insert()
+
+        scanner = LibraryScanner(batch_size=1)
+        await scanner.resume()
+        await scanner._task
+
+        assert sorted(video.name for video in await VideoModel.find_all().to_list()) == ["v2.mp4", "v3.mp4"]
+        scan = await LibraryScanModel.find_one()
+        assert (scan.status, scan.videosSeen) == ("Done", 4)
+
+    @pytest.mark.asyncio
+    async def test_restart_walks_the_whole_library_again(self, library):
+        await LibraryScanModel(status="Failed", pendingDirectories=[f"{library.path}/a/b"], videosSeen=2).insert()
+
+        scan = await run_scan(LibraryScanner(batch_size=10), restart=True)
+
+        assert scan.videosSeen == 4
+        assert await LibraryScanModel.count() == 1
+
+    @pytest.mark.asyncio
+    async def test_progress_is_reported_until_the_scan_ends(self, library):
+        scanner = LibraryScanner(batch_size=1)
+        await scanner.start()
+
+        states = [(scan.status, scan.videosSeen) async for scan in scanner.watch()]
+
+        assert states[0][0] == "Running"
+        assert states[-1] == ("Done", 4)
+        assert [seen for _, seen in states] == sorted(seen for _, seen in states)
+
+    @pytest.mark.asyncio
+    async def test_large_directory_is_written_batch_by_batch(self, library, tmp_path):
+        for index in range(5):
+            (tmp_path / "lib" / f"w{index}.mp4").write_bytes(b"w")
+        scanner = LibraryScanner(batch_size=2)
+        batch_sizes = []
+        insert_missing_videos = scanner._insert_missing_videos
+
+        async def record_batch(scan, entries):
+            batch_sizes.append(len(entries))
+            await insert_missing_videos(scan, entries)
+
+        scanner._insert_missing_videos = record_batch
+        scan = await run_scan(scanner)
+
+        assert max(batch_sizes) == 2
+        assert (scan.videosSeen, scan.videosAdded) == (9, 9)
@@ -0,0 +1,176 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+from pymongo import DeleteOne
+
+from src.config import get_settings
+from src.db.models.Video_model import DirectoryModel, VideoModel, VideoTagModel
+from src.resolvers import resolver_utils as resolver_utils_module
+from src.resolvers.inotify import inotify_available
+from src.resolvers.library_watcher import FileChange, LibraryWatcher, _PollingWatch
+from src.resolvers.media_worker import get_media_worker
+from src.resolvers.resolver_utils import resolver_utils
+
+
+@pytest.fixture
+def sequential_bulk_write(init_test_db, monkeypatch):
+    """mongomock does not accept the `sort` argument pymongo passes for UpdateOne in bulk_write: apply them one by one"""
+    for model in (VideoModel, VideoTagModel, DirectoryModel):
+        collection = model.get_pymongo_collection()
+
+        async def bulk_write(requests, ordered=True, collection=collection):
+            upserted_ids = {}
+            for index, request in enumerate(requests):
+                if isinstance(request, DeleteOne):
+                    await collection.delete_one(request._filter)
+                    continue
+                result = await collection.update_one(request._filter, request._doc, upsert=request._upsert)
+                if result.upserted_id is not None:
+                    upserted_ids[index] = result.upserted_id
+            return SimpleNamespace(upserted_ids=upserted_ids)
+
+        monkeypatch.setattr(collection, "bulk_write", bulk_write)
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch, sequential_bulk_write):
+    """lib/a/x.mp4 (10 B), lib/a/b/y.mkv (20 B)"""
+    root = tmp_path / "lib"
+    (root / "a" / "b").mkdir(parents=True)
+    (root / "a" / "x.mp4").write_bytes(b"x" * 10)
+    (root / "a" / "b" / "y.mkv").write_bytes(b"y" * 20)
+
+    monkeypatch.setattr(get_settings(), "resource_paths", {"lib": str(root)})
+    monkeypatch.setattr(get_settings(), "ROOT_PATH", None)
+    monkeypatch.setattr(get_settings(), "video_extensions", [".mp4", ".mkv"])
+    monkeypatch.setattr(get_media_worker(), "enqueue", lambda video_ids, priority: None)
+    resolver_utils_module._dir_cache.clear()
+    yield resolver_utils().get_path_standard_format(str(root))
+    resolver_utils_module._dir_cache.clear()
+
+
+async def add_video(path: str, tags: list[str]) -> VideoModel:
+    stat = os.stat(path)
+    video = VideoModel(
+        path=path, name=os.path.basename(path), isDir=False,
+        lastModifyTime=stat.st_mtime, size=stat.st_size, tags=tags
+    )
+    await video.insert()
+    for tag in tags:
+        await VideoTagModel.get_pymongo_collection().update_one({"name": tag}, {"$inc": {"count": 1}}, upsert=True)
+    return video
+
+
+def make_watcher() -> LibraryWatcher:
+    return LibraryWatcher(mode="auto", poll_interval=60, debounce=0.05, max_delay=1)
+
+
+@pytest.mark.unit
+class TestLibraryWatcher:
+
+    @pytest.mark.asyncio
+    async def test_created_video_is_inserted_and_indexed(self, library):
+        await resolver_utils().get_directory_aggregates([library])
+        with open(f"{library}/a/new.mp4", "wb") as file:
+            file.write(b"n" * 5)
+
+        await make_watcher().apply_changes([FileChange(kind="created", path=f"{library}/a/new.mp4")])
+
+        assert await VideoModel.find_one({"path": f"{library}/a/new.mp4"}) is not None
+        root = await DirectoryModel.find_one({"path": library})
+        assert (root.size, root.videoCount) == (35, 3)
+
+    @pytest.mark.asyncio
+    async def test_renamed_video_keeps_its_document(self, library):
+        video = await add_video(f"{library}/a/x.mp4", ["holiday"])
+        os.rename(f"{library}/a/x.mp4", f"{library}/a/b/renamed.mp4")
+
+        watcher = make_watcher()
+        await watcher.apply_changes([
+            FileChange(kind="deleted", path=f"{library}/a/x.mp4"),
+            FileChange(kind="created", path=f"{library}/a/b/renamed.mp4"),
+        ])
+
+        moved = await VideoModel.get(video.id)
+        assert moved.path == f"{library}/a/b/renamed.mp4"
+        assert moved.name == "renamed.mp4"
+        assert moved.tags == ["holiday"]
+        assert watcher.moved == 1 and watcher.created == 0
+
+    @pytest.mark.asyncio
+    async def test_deleted_directory_removes_its_videos_and_index(self, library):
+        await add_video(f"{library}/a/b/y.mkv", ["trip"])
+        await resolver_utils().get_directory_aggregates([library])
+        os.remove(f"{library}/a/b/y.mkv")
+        os.rmdir(f"{library}/a/b")
+
+        await make_watcher().apply_changes([FileChange(kind="deleted", path=f"{library}/a/b", isDir=True)])
+
+        assert await VideoModel.find_one({"path": f"{library}/a/b/y.mkv"}) is None
+        assert await VideoTagModel.find_one({"name": "trip"}) is None
+        assert await DirectoryModel.find_one({"path": f"{library}/a/b"}) is None
+        root = await DirectoryModel.find_one({"path": library})
+        assert (root.size, root.videoCount) == (10, 1)
+
+    @pytest.mark.asyncio
+    async def test_rewritten_video_is_updated(self, library):
+        video = await add_video(f"{library}/a/x.mp4", [])
+        with open(f"{library}/a/x.mp4", "wb") as file:
+            file.write(b"x" * 40)
+
+        await make_watcher().apply_changes([FileChange(kind="modified", path=f"{library}/a/x.mp4")])
+
+        assert (await VideoModel.get(video.id)).size == 40
+
+    def test_polling_detects_new_and_removed_entries(self, library):
+        watch = _PollingWatch(library, 60, lambda change: None)
+        watch.snapshot_tree(library)
+        os.remove(f"{library}/a/x.mp4")
+        os.mkdir(f"{library}/c")
+        # coarse timestamps on some file systems: make the directory change visible
+        os.utime(f"{library}/a", ns=(0, 0))
+        os.utime(library, ns=(0, 0))
+
+        changes = {(change.kind, change.path, change.isDir) for change in watch.poll()}
+
+        assert changes == {("deleted", f"{library}/a/x.mp4", False), ("created", f"{library}/c", True)}
+        assert f"{library}/c" in watch._snapshot
+
+    def test_polling_snapshot_of_a_tree_deeper_than_the_recursion_limit(self, library):
+        deep = f"{library}/c"
+        for _ in range(1100):
+            deep += "/d"
+            os.makedirs(deep)
+
+        watch = _PollingWatch(library, 60, lambda change: None)
+        try:
+            watch.snapshot_tree(library)
+        finally:
+            # pytest removes its temporary directories recursively, it would hit the recursion limit too
+            while deep != library:
+                os.rmdir(deep)
+                deep = os.path.dirname(deep)
+
+        assert f"{library}/c{'/d' * 1100}" in watch._snapshot
+        assert len(watch._snapshot) == 1104
+
+    @pytest.mark.skipif(not inotify_available(), reason="inotify is Linux only")
+    @pytest.mark.asyncio
+    async def test_inotify_changes_are_applied_in_one_batch(self, library):
+        watcher = LibraryWatcher(mode="inotify", poll_interval=60, debounce=0.05, max_delay=1)
+        await watcher.start()
+        try:
+            assert watcher.backends == {library: "inotify"}
+            os.mkdir(f"{library}/d")
+            with open(f"{library}/d/clip.mp4", "wb") as file:
+                file.write(b"c" * 3)
+            for _ in range(100):
+                await asyncio.sleep(0.02)
+                if watcher.batches:
+                    break
+        finally:
+            await watcher.stop()
+
+        assert await VideoModel.find_one({"path": f"{library}/d/clip.mp4"}) is not None
@@ -0,0 +1,193 @@
+import asyncio
+
+import pytest
+
+from src.config import get_settings
+from src.db.models.Video_model import VideoModel
+from src.errors import MediaProcessError
+from src.resolvers.media_worker import MediaPriority, MediaWorkerPool
+from src.resolvers.storyboard import StoryboardLayout
+from src.resolvers.thumbnail_resolver import get_thumbnail_resolver
+from src.resolvers.thumbnail_store import ThumbnailStore
+
+
+@pytest.fixture
+def worker_pool(monkeypatch):
+    pool = MediaWorkerPool(workers=1, backfill=False, backfill_batch_size=10)
+    processed: list[str] = []
+
+    async def process(video_id):
+        processed.append(video_id)
+        await asyncio.sleep(0)
+
+    monkeypatch.setattr(pool, "process", process)
+    pool.processed_ids = processed
+    return pool
+
+
+@pytest.mark.unit
+class TestMediaWorkerPool:
+
+    @pytest.mark.asyncio
+    async def test_viewing_items_are_served_before_backfill(self, worker_pool):
+        worker_pool.enqueue(["b1", "b2", "b3"], MediaPriority.BACKFILL)
+        worker_pool.enqueue(["v1"], MediaPriority.VIEWING)
+        worker_pool.enqueue(["i1"], MediaPriority.IMPORTED)
+
+        worker_pool.start()
+        await asyncio.wait_for(worker_pool._queue.join(), timeout=5)
+        await worker_pool.stop()
+
+        assert worker_pool.processed_ids == ["v1", "i1", "b1", "b2", "b3"]
+
+    @pytest.mark.asyncio
+    async def test_promoted_item_is_processed_once(self, worker_pool):
+        worker_pool.enqueue(["a", "b"], MediaPriority.BACKFILL)
+        worker_pool.enqueue(["b"], MediaPriority.VIEWING)
+        worker_pool.enqueue(["b"], MediaPriority.IMPORTED)
+
+        worker_pool.start()
+        await asyncio.wait_for(worker_pool._queue.join(), timeout=5)
+        await worker_pool.stop()
+
+        assert worker_pool.processed_ids == ["b", "a"]
+        assert worker_pool.stats()["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_wait_for_jumps_the_queue(self, worker_pool):
+        worker_pool.enqueue([f"b{i}" for i in range(20)], MediaPriority.BACKFILL)
+        worker_pool.start()
+
+        assert await worker_pool.wait_for("v1", timeout=5)
+        await worker_pool.stop()
+
+        assert worker_pool.processed_ids.index("v1") <= 1
+
+    @pytest.mark.asyncio
+    async def test_wait_for_runs_inline_without_workers(self, worker_pool):
+        assert await worker_pool.wait_for("v1", timeout=5)
+        assert worker_pool.processed_ids == ["v1"]
+
+    @pytest.mark.asyncio
+    async def test_failed_job_is_counted(self, monkeypatch):
+        pool = MediaWorkerPool(workers=1, backfill=False, backfill_batch_size=10)
+
+        async def process(video_id):
+            raise RuntimeError("ffmpeg exploded")
+
+        monkeypatch.setattr(pool, "process", process)
+
+        assert await pool.wait_for("v1", timeout=5)
+        assert pool.stats()["failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_previews_wait_behind_every_other_job(self, worker_pool, monkeypatch):
+        rendered: list[str] = []
+
+        async def process_preview(video_id):
+            rendered.append(video_id)
+            worker_pool.processed_ids.append(f"preview:{video_id}")
+            return True
+
+        monkeypatch.setattr(worker_pool, "process_preview", process_preview)
+        worker_pool.enqueue_previews(["p1", "p1"])
+        worker_pool.enqueue(["b1"], MediaPriority.BACKFILL)
+
+        worker_pool.start()
+        await asyncio.wait_for(worker_pool._queue.join(), timeout=5)
+        await worker_pool.stop()
+
+        assert worker_pool.processed_ids == ["b1", "preview:p1"]
+        assert worker_pool.stats()["previewsRendered"] == 1
+
+    @pytest.mark.asyncio
+    async def test_storyboards_are_served_after_the_videos_on_screen(self, worker_pool, monkeypatch):
+        async def process_storyboard(video_id):
+            worker_pool.processed_ids.append(f"storyboard:{video_id}")
+            return True
+
+        monkeypatch.setattr(worker_pool, "process_storyboard", process_storyboard)
+        worker_pool.enqueue(["i1"], MediaPriority.IMPORTED)
+        worker_pool.enqueue_storyboards(["s1", "s1"])
+        worker_pool.enqueue(["v1"], MediaPriority.VIEWING)
+
+        worker_pool.start()
+        await asyncio.wait_for(worker_pool._queue.join(), timeout=5)
+        await worker_pool.stop()
+
+        assert worker_pool.processed_ids == ["v1", "storyboard:s1", "i1"]
+        assert worker_pool.stats()["storyboardsRendered"] == 1
+
+    @pytest.mark.asyncio
+    async def test_backfill_does_not_wait_for_preview_clips(self, init_test_db, monkeypatch):
+        pool = MediaWorkerPool(workers=2, backfill=True, backfill_batch_size=1)
+        videos = [
+            await VideoModel(path=f"/lib/v{i}.mp4", name=f"v{i}.mp4", isDir=False, lastModifyTime=0.0, size=1, tags=[]).insert()
+            for i in range(2)
+        ]
+        processed: list[str] = []
+        backfill_done = asyncio.Event()
+
+        async def process(video_id):
+            processed.append(video_id)
+            pool.enqueue_previews([video_id])
+
+        async def process_preview(video_id):
+            # a preview clip still rendering must not hold the next backfill page back
+            await backfill_done.wait()
+
+        monkeypatch.setattr(pool, "process", process)
+        monkeypatch.setattr(pool, "process_preview", process_preview)
+
+        pool.start()
+        await asyncio.wait_for(pool._tasks[-1], timeout=5)
+        backfill_done.set()
+        await pool.stop()
+
+        assert processed == [str(video.id) for video in videos]
+
+    @pytest.mark.asyncio
+    async def test_failed_video_is_recorded_and_skipped_by_backfill(self, init_test_db, monkeypatch):
+        pool = MediaWorkerPool(workers=1, backfill=False, backfill_batch_size=10)
+        video = await VideoModel(path="/lib/broken.mp4", name="broken.mp4", isDir=False, lastModifyTime=0.0, size=1, tags=[]).insert()
+        attempts: list[str] = []
+
+        async def process(video_id):
+            attempts.append(video_id)
+            raise RuntimeError("ffmpeg exploded")
+
+        monkeypatch.setattr(pool, "process", process)
+        monkeypatch.setattr(get_settings().media_worker, "max_attempts", 2)
+        pool.start()
+        for _ in range(3):
+            await asyncio.wait_for(pool._backfill(), timeout=5)
+        await pool.stop()
+
+        assert attempts == [str(video.id)] * 2
+        assert (await VideoModel.get(video.id)).mediaFailures == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_storyboard_is_remembered(self, init_test_db, tmp_path, monkeypatch):
+        pool = MediaWorkerPool(workers=1, backfill=False, backfill_batch_size=10)
+        store = ThumbnailStore(str(tmp_path / "store"), max_size_bytes=1024 * 1024)
+        monkeypatch.setattr("src.resolvers.media_worker.get_thumbnail_store", lambda: store)
+        video_file = tmp_path / "clip.mp4"
+        video_file.write_bytes(b"\x00" * 64)
+        video = await VideoModel(
+            path=str(video_file), name="clip.mp4", isDir=False, lastModifyTime=0.0, size=64, tags=[], duration=30.0
+        ).insert()
+        renders = []
+
+        async def generate_storyboard(video_path, layout):
+            renders.append(video_path)
+            raise MediaProcessError("ffmpeg", "exploded")
+
+        monkeypatch.setattr(get_thumbnail_resolver(), "generate_storyboard", generate_storyboard)
+
+        with pytest.raises(MediaProcessError):
+            await pool.process_storyboard(str(video.id))
+        assert not await pool.process_storyboard(str(video.id))
+
+        key = StoryboardLayout.store_key(video.path, video.lastModifyTime, video.size, get_settings().storyboard)
+        assert pool.storyboard_failed(key)
+        assert len(renders) == 1
@@ -3,7 +3,11 @@ from bson import ObjectId
 from freezegun import freeze_time
 
 from src.app import schema
-from src.db.models.Video_model import VideoModel
+from src.config import get_settings
+from src.db.models.Video_model import DirectoryModel, VideoModel
+from src.resolvers import resolver_utils as resolver_utils_module
+from src.resolvers.mutation_resolver import MutationResolver
+from src.resolvers.resolver_utils import resolver_utils
 
 
 @pytest.mark.unit
@@ -446,6 +450,41 @@ class TestResolveDeleteVideo:
         deleted_video = await VideoModel.get(video.id)
         assert deleted_video is None
 
+    @pytest.mark.asyncio
+    async def test_delete_video_updates_the_ancestor_aggregates(self, init_test_db, tmp_path, monkeypatch):
+        """删除视频后，所有上级目录的大小和视频数随之减少"""
+        root = tmp_path / "lib"
+        (root / "a").mkdir(parents=True)
+        (root / "a" / "x.mp4").write_bytes(b"x" * 10)
+        (root / "y.mp4").write_bytes(b"y" * 20)
+        monkeypatch.setattr(get_settings(), "resource_paths", {"lib": str(root)})
+        monkeypatch.setattr(get_settings(), "ROOT_PATH", None)
+        monkeypatch.setattr(get_settings(), "video_extensions", [".mp4"])
+        resolver_utils_module._dir_cache.clear()
+
+        # mongomock does not accept the `sort` argument pymongo passes for UpdateOne in bulk_write
+        collection = DirectoryModel.get_pymongo_collection()
+
+        async def bulk_write(requests, ordered=True):
+            for request in requests:
+                await collection.update_one(request._filter, request._doc, upsert=request._upsert)
+
+        monkeypatch.setattr(collection, "bulk_write", bulk_write)
+
+        library = resolver_utils().get_path_standard_format(str(root))
+        await resolver_utils().get_directory_aggregates([library])
+        video = VideoModel(path=f"{library}/a/x.mp4", name="x.mp4", isDir=False, lastModifyTime=0.0, size=10, tags=[])
+        await video.insert()
+
+        result = await MutationResolver().resolve_delete_video(str(video.id))
+
+        assert result.success is True
+        parent = await DirectoryModel.find_one({"path": f"{library}/a"})
+        root_aggregate = await DirectoryModel.find_one({"path": library})
+        assert (parent.size, parent.videoCount) == (0, 0)
+        assert (root_aggregate.size, root_aggregate.videoCount) == (20, 1)
+        resolver_utils_module._dir_cache.clear()
+
     @pytest.mark.asyncio
     async def test_delete_nonexistent_video(self, init_test_db):
         """测试删除不存在的视频"""
@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+
+from src.config import get_settings
+from src.resolvers import process_limiter
+from src.resolvers.process_limiter import AdaptiveProcessLimiter, _LatencyStats, get_process_limiter
+
+
+def _limiter(**overrides) -> AdaptiveProcessLimiter:
+    options = dict(
+        initial_limit=2, min_limit=1, max_limit=8, latency_ratio=2.0,
+        max_load_per_cpu=1.5, streams_per_slot=2, adjust_interval=0,
+    )
+    options.update(overrides)
+    return AdaptiveProcessLimiter(**options)
+
+
+@pytest.fixture(autouse=True)
+def idle_machine(monkeypatch):
+    monkeypatch.setattr(process_limiter, "_load_per_cpu", lambda: 0.1)
+
+
+async def _run_jobs(limiter: AdaptiveProcessLimiter, count: int, duration: float, kind: str = "probe"):
+    peak = 0
+
+    async def job():
+        nonlocal peak
+        async with limiter.slot(kind):
+            peak = max(peak, limiter.active)
+            await asyncio.sleep(duration)
+
+    await asyncio.gather(*(job() for _ in range(count)))
+    return peak
+
+
+@pytest.mark.unit
+class TestAdaptiveProcessLimiter:
+
+    @pytest.mark.asyncio
+    async def test_limit_is_enforced(self):
+        limiter = _limiter(adjust_interval=3600)
+        peak = await _run_jobs(limiter, count=6, duration=0.01)
+
+        assert peak == 2
+        assert limiter.stats()["queueDepth"] == 0
+
+    @pytest.mark.asyncio
+    async def test_grows_while_queued_and_latency_is_stable(self):
+        limiter = _limiter()
+        await _run_jobs(limiter, count=20, duration=0.01)
+
+        assert limiter.limit > 2
+        assert limiter.increases > 0
+
+    @pytest.mark.asyncio
+    async def test_shrinks_when_latency_inflates(self):
+        limiter = _limiter(initial_limit=8)
+        for _ in range(_LatencyStats.WARMUP):
+            await _run_jobs(limiter, count=1, duration=0.01)
+        await _run_jobs(limiter, count=4, duration=0.1)
+
+        assert limiter.limit < 8
+        assert limiter.decreases > 0
+
+    def test_mixed_latencies_do_not_collapse_the_limit(self):
+        limiter = _limiter(initial_limit=4)
+        # one kind of job, from short clips to large files
+        for latency in [0.05, 0.05, 0.4, 0.1, 0.05, 0.8, 0.1] * 30:
+            limiter._latency.setdefault("thumbnail", _LatencyStats()).record(latency)
+            limiter._adjust("thumbnail")
+
+        assert limiter.limit == 4
+        assert limiter.decreases == 0
+
+    def test_initial_limit_is_at_least_half_the_cpus(self, monkeypatch):
+        monkeypatch.setattr(process_limiter.os, "cpu_count", lambda: 16)
+        get_process_limiter.cache_clear()
+        try:
+            assert get_process_limiter().limit == max(get_settings().ffmpeg_semaphore_limit, 8)
+        finally:
+            get_process_limiter.cache_clear()
+
+    @pytest.mark.asyncio
+    async def test_shrinks_under_system_load(self, monkeypatch):
+        monkeypatch.setattr(process_limiter, "_load_per_cpu", lambda: 4.0)
+        limiter = _limiter(initial_limit=4)
+        await _run_jobs(limiter, count=1, duration=0.01)
+
+        assert limiter.limit == 3
+
+    @pytest.mark.asyncio
+    async def test_active_streams_lower_the_ceiling(self):
+        limiter = _limiter(initial_limit=8)
+        async with limiter.stream(), limiter.stream(), limiter.stream(), limiter.stream():
+            assert limiter.stats()["activeStreams"] == 4
+            await _run_jobs(limiter, count=1, duration=0.01)
+
+        assert limiter.limit == 6
+        assert limiter.stats()["activeStreams"] == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_ceiling_applies_before_the_next_adjustment(self):
+        limiter = _limiter(initial_limit=4, max_limit=4, streams_per_slot=1, adjust_interval=3600)
+        async with limiter.stream(), limiter.stream():
+            peak = await _run_jobs(limiter, count=6, duration=0.01)
+
+        assert peak == 2
+        assert limiter.limit == 4
+
+    @pytest.mark.asyncio
+    async def test_ended_stream_wakes_queued_jobs(self):
+        limiter = _limiter(initial_limit=2, max_limit=2, streams_per_slot=1, adjust_interval=3600)
+        stream_done = asyncio.Event()
+        peak = 0
+
+        async def playback():
+            async with limiter.stream():
+                await stream_done.wait()
+
+        async def job():
+            nonlocal peak
+            async with limiter.slot("probe"):
+                peak = max(peak, limiter.active)
+                await asyncio.sleep(0.05)
+
+        playing = asyncio.create_task(playback())
+        await asyncio.sleep(0)
+        jobs = asyncio.gather(job(), job())
+        await asyncio.sleep(0.01)
+        assert (limiter.active, limiter.waiting) == (1, 1)
+        stream_done.set()
+        await asyncio.wait_for(jobs, timeout=1)
+        await playing
+
+        assert peak == 2
+
+    def test_condition_follows_the_running_loop(self):
+        limiter = _limiter(initial_limit=1)
+
+        async def one_job():
+            async with limiter.slot("probe"):
+                await asyncio.sleep(0)
+
+        # e.g. the app started twice in one process: the singleton must not keep the first loop's condition
+        asyncio.run(one_job())
+        asyncio.run(one_job())
+
+        assert limiter.active == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_job_releases_its_slot(self):
+        limiter = _limiter(initial_limit=1)
+        with pytest.raises(RuntimeError):
+            async with limiter.slot("probe"):
+                raise RuntimeError("ffprobe failed")
+
+        assert limiter.active == 0
+        assert limiter.stats()["latency"] == {}
@@ -381,3 +381,45 @@ class TestResolveGetVideoById:
 #     @pytest.mark.skip
 #     async def test_browse_with_invalid_path(self, init_test_db):
 #         pass
+
+
+@pytest.mark.unit
+class TestSearchByTechnicalMetadata:
+
+    @pytest.mark.asyncio
+    async def test_filter_by_codec_and_min_height(self, init_test_db, video_factory):
+        probed = {"duration": 60.0, "container": "matroska,webm", "audioCodec": "opus"}
+        await video_factory(path="/test/hevc_4k.mkv", name="hevc_4k", videoCodec="hevc", height=2160, **probed)
+        await video_factory(path="/test/hevc_720.mkv", name="hevc_720", videoCodec="hevc", height=720, **probed)
+        await video_factory(path="/test/h264_4k.mkv", name="h264_4k", videoCodec="h264", height=2160, **probed)
+
+        query = """
+            query SearchVideos($input: VideoSearchInput!) {
+                SearchVideos(input: $input) {
+                    videos {
+                        name
+                        videoCodec
+                        height
+                    }
+                }
+            }
+        """
+
+        result = await schema.execute(
+            query,
+            variable_values={
+                "input": {
+                    "titleKeyword": {},
+                    "author": {},
+                    "tags": [],
+                    "sortBy": "Latest",
+                    "fromPage": "SearchPage",
+                    "currentPageNumber": 1,
+                    "videoCodec": "HEVC",
+                    "minHeight": 1080
+                }
+            },
+        )
+
+        assert result.errors is None
+        assert [v["name"] for v in result.data["SearchVideos"]["videos"]] == ["hevc_4k"]
@@ -0,0 +1,47 @@
+import pytest
+
+from src.config import StoryboardConfig
+from src.resolvers.storyboard import StoryboardLayout
+
+
+@pytest.mark.unit
+class TestStoryboardLayout:
+
+    def test_long_video_is_capped_at_max_tiles(self):
+        layout = StoryboardLayout.for_duration(3600.0, StoryboardConfig(max_tiles=100, columns=10, min_interval=2))
+
+        assert layout.count == 100
+        assert layout.interval == pytest.approx(36.0)
+        assert (layout.columns, layout.rows) == (10, 10)
+        assert "fps=1/36.000" in layout.video_filter()
+        assert layout.video_filter().endswith("tile=10x10")
+
+    def test_short_video_uses_min_interval(self):
+        layout = StoryboardLayout.for_duration(7.0, StoryboardConfig(max_tiles=100, columns=10, min_interval=2))
+
+        assert layout.count == 4
+        assert (layout.columns, layout.rows) == (4, 1)
+
+    def test_webvtt_cues_point_to_tiles(self):
+        layout = StoryboardLayout.for_duration(
+            25.0, StoryboardConfig(max_tiles=100, columns=2, min_interval=10, tile_width=160, tile_height=90)
+        )
+        vtt = layout.to_webvtt("storyboard?video_id=abc")
+
+        assert vtt.startswith("WEBVTT\n\n")
+        assert "00:00:00.000 --> 00:00:10.000\nstoryboard?video_id=abc#xywh=0,0,160,90" in vtt
+        assert "00:00:10.000 --> 00:00:20.000\nstoryboard?video_id=abc#xywh=160,0,160,90" in vtt
+        # the last cue ends with the video
+        assert "00:00:20.000 --> 00:00:25.000\nstoryboard?video_id=abc#xywh=0,90,160,90" in vtt
+
+    def test_identity_changes_with_layout(self):
+        short = StoryboardLayout.for_duration(60.0, StoryboardConfig())
+        wide = StoryboardLayout.for_duration(60.0, StoryboardConfig(tile_width=320, tile_height=180))
+        assert short.identity != wide.identity
+
+    def test_store_key_is_known_before_the_duration(self):
+        key = StoryboardLayout.store_key("/videos/a.mp4", 1.0, 10, StoryboardConfig())
+
+        assert key == StoryboardLayout.store_key("/videos/a.mp4", 1.0, 10, StoryboardConfig())
+        assert key != StoryboardLayout.store_key("/videos/a.mp4", 1.0, 10, StoryboardConfig(columns=5))
+        assert key != StoryboardLayout.store_key("/videos/a.mp4", 2.0, 10, StoryboardConfig())
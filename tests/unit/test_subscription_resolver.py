@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.config import get_settings
+from src.db.models.Video_model import VideoModel
+from src.resolvers.media_worker import get_media_worker
+from src.resolvers.resolver_utils import resolver_utils
+from src.resolvers.subscription_resolver import get_subscription_resolver
+from src.resolvers.thumbnail_resolver import get_thumbnail_resolver
+from src.schema.types.fileBrowse_type import BatchResultType
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch, init_test_db):
+    """5 videos spread over lib, lib/a and lib/a/b, plus a text file"""
+    root = tmp_path / "lib"
+    (root / "a" / "b").mkdir(parents=True)
+    for index, directory in enumerate(["", "", "a", "a/b", "a/b"]):
+        (root / directory / f"v{index}.mp4").write_bytes(b"v" * (index + 1))
+    (root / "a" / "notes.txt").write_text("not a video")
+
+    monkeypatch.setattr(get_settings(), "resource_paths", {"lib": str(root)})
+    monkeypatch.setattr(get_settings(), "ROOT_PATH", None)
+    monkeypatch.setattr(get_settings(), "video_extensions", [".mp4"])
+    monkeypatch.setattr(get_media_worker(), "enqueue", lambda video_ids, priority: None)
+
+    async def no_probe(path):
+        return None
+
+    monkeypatch.setattr(get_thumbnail_resolver(), "quick_probe", no_probe)
+
+    # mongomock does not accept the `sort` argument pymongo passes for UpdateOne in bulk_write
+    collection = VideoModel.get_pymongo_collection()
+
+    async def bulk_write(requests, ordered=True):
+        modified, upserted_ids = 0, {}
+        for index, request in enumerate(requests):
+            result = await collection.update_one(request._filter, request._doc, upsert=request._upsert)
+            modified += result.modified_count
+            if result.upserted_id is not None:
+                upserted_ids[index] = result.upserted_id
+        return SimpleNamespace(modified_count=modified, upserted_count=len(upserted_ids), upserted_ids=upserted_ids)
+
+    monkeypatch.setattr(collection, "bulk_write", bulk_write)
+    return resolver_utils().get_path_standard_format(str(root))
+
+
+@pytest.mark.unit
+class TestDirectoryBatchOperations:
+
+    @pytest.mark.asyncio
+    async def test_walker_yields_bounded_chunks_of_the_whole_tree(self, library):
+        chunks = [chunk async for chunk in resolver_utils().iter_video_entries_in_directory(library, 2)]
+
+        assert all(0 < len(chunk) <= 2 for chunk in chunks)
+        assert sorted(entry.name for chunk in chunks for entry in chunk) == [f"v{i}.mp4" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_chunks_are_written_as_they_are_walked(self, library):
+        statuses = [
+            status async for status in get_subscription_resolver()._batch_update(
+                None, resolver_utils().iter_video_entries_in_directory(library, 2), "someone", None
+            )
+        ]
+
+        results = [status.result for status in statuses if status.result is not None]
+        assert len(results) == 1 and statuses[-1].result is results[0]
+        assert results[0].resultType == BatchResultType.Success
+        assert results[0].message == "5 out of 5 updates succeeded"
+        assert sum("Executed batch update operations" in (status.status or "") for status in statuses) == 3
+        assert await VideoModel.find({"author": "someone"}).count() == 5
+
+    @pytest.mark.asyncio
+    async def test_empty_directory_fails_once(self, library, tmp_path):
+        (tmp_path / "lib" / "empty").mkdir()
+
+        statuses = [
+            status async for status in get_subscription_resolver()._batch_update(
+                None, resolver_utils().iter_video_entries_in_directory(f"{library}/empty", 2), "someone", None
+            )
+        ]
+
+        assert [status.result.resultType for status in statuses if status.result] == [BatchResultType.Failure]
@@ -0,0 +1,56 @@
+import pytest
+
+from src.config import ThumbnailVariant, get_settings
+from src.resolvers.thumbnail_rendition import list_renditions, negotiate_rendition, rendition_key
+from src.resolvers.thumbnail_store import ThumbnailStore
+
+
+@pytest.mark.unit
+class TestThumbnailRendition:
+
+    def test_every_variant_in_both_formats(self):
+        tags = {rendition.tag for rendition in list_renditions()}
+        assert {"tiny-64w-q50.jpeg", "card-320w-q80.jpeg", "poster-1280w-q85.jpeg", "tiny-64w-q50.webp", "card-320w-q80.webp", "poster-1280w-q85.webp"} <= tags
+
+    def test_negotiation(self):
+        assert negotiate_rendition(None, "image/avif,image/webp,*/*").tag == "card-320w-q80.webp"
+        assert negotiate_rendition("poster", "application/json, text/plain, */*").tag == "poster-1280w-q85.jpeg"
+        assert negotiate_rendition("tiny", None).media_type == "image/jpeg"
+        assert negotiate_rendition("huge", "image/webp") is None
+
+    def test_refused_webp_is_not_served(self):
+        assert negotiate_rendition(None, "image/webp;q=0").tag == "card-320w-q80.jpeg"
+        assert negotiate_rendition(None, "image/avif, image/webp ; q=0.0, */*;q=0.8").tag == "card-320w-q80.jpeg"
+        assert negotiate_rendition(None, "image/webp;q=0.5, image/jpeg").tag == "card-320w-q80.webp"
+        # a parameter of another media range is not a match
+        assert negotiate_rendition(None, "text/html;x=image/webp").tag == "card-320w-q80.jpeg"
+
+    def test_default_jpeg_keeps_file_identity_key(self):
+        card = negotiate_rendition("card", None)
+        poster = negotiate_rendition("poster", None)
+
+        assert rendition_key("/v/a.mp4", 1.0, 10, card) == ThumbnailStore.make_key("/v/a.mp4", 1.0, 10)
+        assert rendition_key("/v/a.mp4", 1.0, 10, poster) != rendition_key("/v/a.mp4", 1.0, 10, card)
+
+    def test_encoding_settings_change_the_key(self, monkeypatch):
+        thumbnail_cache = get_settings().thumbnail_cache
+        before = {r.tag: rendition_key("/v/a.mp4", 1.0, 10, r) for r in list_renditions()}
+
+        monkeypatch.setitem(thumbnail_cache.variants, "card", ThumbnailVariant(width=480, quality=80))
+        monkeypatch.setitem(thumbnail_cache.variants, "poster", ThumbnailVariant(width=1280, quality=60))
+        card = negotiate_rendition("card", None)
+        poster = negotiate_rendition("poster", "image/webp")
+
+        assert card.tag == "card-480w-q80.jpeg"
+        # the default JPEG no longer matches the bytes stored under the plain file identity key
+        assert rendition_key("/v/a.mp4", 1.0, 10, card) != ThumbnailStore.make_key("/v/a.mp4", 1.0, 10)
+        assert rendition_key("/v/a.mp4", 1.0, 10, card) not in before.values()
+        assert rendition_key("/v/a.mp4", 1.0, 10, poster) not in before.values()
+
+    def test_encoder_args(self):
+        webp = negotiate_rendition("card", "image/webp")
+        jpeg = negotiate_rendition("card", None)
+
+        assert webp.encoder_args()[:2] == ["-c:v", "libwebp"]
+        assert jpeg.encoder_args()[:2] == ["-c:v", "mjpeg"]
+        assert "min(320,iw)" in jpeg.scale_filter()
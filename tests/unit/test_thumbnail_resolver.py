@@ -0,0 +1,284 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+from src.config import get_settings
+from src.errors import MediaProcessError
+from src.resolvers.frame_selection import SAMPLE_BYTES, sample_timestamps
+from src.resolvers.thumbnail_rendition import negotiate_rendition
+from src.resolvers.thumbnail_resolver import (
+    SingleFlight,
+    ThumbnailResolver,
+    VideoProbeResult,
+    build_thumbnail_command,
+    needs_probe,
+    run_process,
+    thumbnail_seek_target,
+)
+
+
+FFPROBE_OUTPUT = {
+    "packets": [
+        {"stream_index": 0, "pts_time": "0.000000", "flags": "K__"},
+        {"stream_index": 1, "pts_time": "0.010000", "flags": "K__"},
+        {"stream_index": 0, "pts_time": "0.040000", "flags": "___"},
+        {"stream_index": 0, "pts_time": "2.000000", "flags": "K__"},
+        {"stream_index": 0, "pts_time": "4.000000", "flags": "K__"},
+        {"stream_index": 0, "pts_time": "6.500000", "flags": "K__"},
+    ],
+    "streams": [
+        {"index": 0, "codec_name": "h264", "codec_type": "video", "width": 1920, "height": 1080},
+        {"index": 1, "codec_name": "aac", "codec_type": "audio"},
+    ],
+    "format": {"format_name": "mov,mp4,m4a,3gp,3g2,mj2", "duration": "125.500000", "bit_rate": "4500000"},
+}
+
+
+@pytest.mark.unit
+class TestVideoProbeResult:
+
+    def test_parse_ffprobe_json(self):
+        result = VideoProbeResult.from_ffprobe(FFPROBE_OUTPUT)
+
+        assert result.duration == 125.5
+        assert result.container == "mov,mp4,m4a,3gp,3g2,mj2"
+        assert result.videoCodec == "h264"
+        assert result.audioCodec == "aac"
+        assert (result.width, result.height) == (1920, 1080)
+        assert result.bitrate == 4500000
+        # median of 2.0, 2.0, 2.5 - audio keyframes are ignored
+        assert result.keyframeInterval == 2.0
+
+    def test_missing_information(self):
+        result = VideoProbeResult.from_ffprobe({"format": {"duration": "N/A"}, "streams": []})
+
+        assert result.duration == 0.0
+        assert result.videoCodec is None
+        assert result.bitrate is None
+        assert result.keyframeInterval is None
+
+    def test_needs_probe(self):
+        assert needs_probe(0.0, "matroska,webm")
+        assert needs_probe(10.0, None)
+        assert not needs_probe(10.0, "matroska,webm")
+
+
+@pytest.mark.unit
+class TestRunProcess:
+
+    @pytest.mark.asyncio
+    async def test_returns_stdout(self):
+        output = await run_process([sys.executable, "-c", "print('frame')"], timeout=10)
+        assert output.strip() == b"frame"
+
+    @pytest.mark.asyncio
+    async def test_non_zero_exit_captures_stderr(self):
+        with pytest.raises(MediaProcessError) as exc_info:
+            await run_process(
+                [sys.executable, "-c", "import sys; sys.stderr.write('moov atom not found'); sys.exit(1)"],
+                timeout=10
+            )
+        assert "moov atom not found" in exc_info.value.details
+
+    @pytest.mark.asyncio
+    async def test_timeout_kills_process(self):
+        started = time.monotonic()
+        with pytest.raises(MediaProcessError) as exc_info:
+            await run_process([sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.5)
+        assert "timed out" in exc_info.value.details
+        assert time.monotonic() - started < 10
+
+    @pytest.mark.asyncio
+    async def test_cancellation_kills_process(self):
+        task = asyncio.create_task(run_process([sys.executable, "-c", "import time; time.sleep(30)"], timeout=60))
+        await asyncio.sleep(0.5)
+        started = time.monotonic()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert time.monotonic() - started < 10
+
+
+@pytest.mark.unit
+class TestSingleFlight:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_spawn(self):
+        single_flight = SingleFlight()
+        spawns = 0
+
+        async def probe():
+            nonlocal spawns
+            spawns += 1
+            await asyncio.sleep(0.05)
+            return 42.0
+
+        results = await asyncio.gather(*(single_flight.do(("probe", "/a.mp4"), probe) for _ in range(5)))
+
+        assert results == [42.0] * 5
+        assert spawns == 1
+        assert single_flight.stats() == {"calls": 5, "spawnsSaved": 4, "inFlight": 0}
+
+    @pytest.mark.asyncio
+    async def test_exception_is_shared_and_key_released(self):
+        single_flight = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise MediaProcessError("ffmpeg", "boom")
+
+        outcomes = await asyncio.gather(
+            single_flight.do("k", failing), single_flight.do("k", failing), return_exceptions=True
+        )
+        assert all(isinstance(outcome, MediaProcessError) for outcome in outcomes)
+
+        async def succeeding():
+            return "ok"
+
+        assert await single_flight.do("k", succeeding) == "ok"
+
+    @pytest.mark.asyncio
+    async def test_cancelling_one_waiter_keeps_shared_task(self):
+        single_flight = SingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.1)
+            return "done"
+
+        first = asyncio.create_task(single_flight.do("k", slow))
+        second = asyncio.create_task(single_flight.do("k", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+
+@pytest.mark.unit
+class TestQuickProbe:
+
+    @pytest.mark.asyncio
+    async def test_header_duration_skips_ffprobe(self, monkeypatch):
+        resolver = ThumbnailResolver()
+        monkeypatch.setattr("src.resolvers.thumbnail_resolver.read_header_duration", lambda path: 12.5)
+
+        async def fail_probe(path):
+            raise AssertionError("ffprobe must not be spawned")
+
+        monkeypatch.setattr(resolver, "probe_video", fail_probe)
+
+        result = await resolver.quick_probe("/videos/a.mp4")
+        assert result.duration == 12.5
+        # technical fields are left to a later full probe
+        assert needs_probe(result.duration, result.container)
+        assert resolver.stats()["headerDurationHits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_ffprobe(self, monkeypatch):
+        resolver = ThumbnailResolver()
+        monkeypatch.setattr("src.resolvers.thumbnail_resolver.read_header_duration", lambda path: None)
+
+        async def probe(path):
+            return VideoProbeResult(duration=3.0, container="avi")
+
+        monkeypatch.setattr(resolver, "probe_video", probe)
+
+        assert await resolver.get_video_duration("/videos/a.avi") == 3.0
+        assert resolver.stats()["headerDurationMisses"] == 1
+
+
+@pytest.mark.unit
+class TestGenerateThumbnail:
+
+    @pytest.mark.asyncio
+    async def test_renditions_share_one_ffmpeg_pass(self, monkeypatch):
+        commands = []
+
+        async def fake_run_process(command, timeout):
+            commands.append(command)
+            # every output file follows its encoder options
+            for index, argument in enumerate(command):
+                if argument == "-map":
+                    output_path = next(arg for arg in command[index:] if arg.startswith("/"))
+                    with open(output_path, "wb") as output_file:
+                        output_file.write(output_path.encode())
+            return b""
+
+        monkeypatch.setattr("src.resolvers.thumbnail_resolver.run_process", fake_run_process)
+        renditions = [negotiate_rendition("tiny", None), negotiate_rendition("poster", "image/webp")]
+
+        images = await ThumbnailResolver().generate_thumbnail("/videos/a.mp4", renditions)
+
+        assert len(commands) == 1
+        assert "split=2[s0][s1]" in commands[0][commands[0].index("-filter_complex") + 1]
+        assert set(images) == {"tiny-64w-q50.jpeg", "poster-1280w-q85.webp"}
+        assert images["poster-1280w-q85.webp"].endswith(b".webp")
+
+    @pytest.mark.asyncio
+    async def test_failure_raises_a_media_error_and_cleans_up(self, monkeypatch):
+        seeks = []
+        output_dirs = []
+
+        async def fake_run_process(command, timeout):
+            seeks.append(command[command.index("-ss") + 1])
+            output_dirs.append(os.path.dirname(command[-1]))
+            # ffmpeg exits cleanly but writes nothing, e.g. seeking past the end
+            return b""
+
+        monkeypatch.setattr("src.resolvers.thumbnail_resolver.run_process", fake_run_process)
+
+        with pytest.raises(MediaProcessError, match="no frame produced"):
+            await ThumbnailResolver().generate_thumbnail("/videos/a.mp4", [negotiate_rendition(None, None)], 600.0)
+
+        assert seeks == ["60.0", "0"]
+        assert not any(os.path.exists(path) for path in output_dirs)
+
+    def test_seek_target_is_a_fraction_of_the_duration(self):
+        assert thumbnail_seek_target(600.0) == pytest.approx(60.0)
+        # a 5 s clip no longer fails at 10 s
+        assert thumbnail_seek_target(5.0) == pytest.approx(0.5)
+        assert thumbnail_seek_target(None) == 10
+        assert thumbnail_seek_target(0.0) == 10
+
+    def test_fast_seek_options_precede_the_input(self):
+        rendition = negotiate_rendition(None, None)
+        fast = build_thumbnail_command("/v/a.mkv", 60.0, [rendition], ["/tmp/0.jpg"], fast_seek=True)
+        accurate = build_thumbnail_command("/v/a.mkv", 60.0, [rendition], ["/tmp/0.jpg"], fast_seek=False)
+
+        assert fast.index("-skip_frame") < fast.index("-i")
+        assert fast.index("-noaccurate_seek") < fast.index("-i")
+        assert "-skip_frame" not in accurate
+        assert fast[-1] == accurate[-1] == "/tmp/0.jpg"
+
+    @pytest.mark.asyncio
+    async def test_explicit_timestamp_overrides_seek_target(self, monkeypatch):
+        commands = []
+
+        async def fake_process(self, video_path, ss, renditions):
+            commands.append(ss)
+            return {r.tag: b"jpeg" for r in renditions}
+
+        monkeypatch.setattr(ThumbnailResolver, "_generate_thumbnail_process", fake_process)
+
+        await ThumbnailResolver().generate_thumbnail("/videos/a.mp4", [negotiate_rendition(None, None)], 600.0, 123.4)
+        assert commands == [123.4]
+
+    @pytest.mark.asyncio
+    async def test_representative_frame_is_the_most_informative_sample(self, monkeypatch):
+        async def fake_run_process(command, timeout):
+            inputs = command.count("-i")
+            # the third sample is textured, the others are black
+            return b"".join(
+                bytes(range(256)) * (SAMPLE_BYTES // 256) if i == 2 else bytes(SAMPLE_BYTES)
+                for i in range(inputs)
+            )
+
+        monkeypatch.setattr("src.resolvers.thumbnail_resolver.run_process", fake_run_process)
+
+        timestamp = await ThumbnailResolver().select_representative_frame("/videos/a.mp4", 1000.0)
+
+        assert timestamp == sample_timestamps(1000.0, get_settings().thumbnail_cache.representative_samples)[2]
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from src.resolvers.thumbnail_store import ThumbnailStore
+
+
+@pytest.mark.unit
+class TestThumbnailStore:
+
+    def test_key_depends_on_file_identity(self):
+        key = ThumbnailStore.make_key("/test/video.mp4", 1640000000.0, 1024)
+        assert ThumbnailStore.is_valid_key(key)
+        assert key != ThumbnailStore.make_key("/test/video.mp4", 1640000001.0, 1024)
+
+    def test_write_then_read(self, tmp_path):
+        store = ThumbnailStore(str(tmp_path), max_size_bytes=1024)
+        key = ThumbnailStore.make_key("/test/video.mp4", 1.0, 1)
+
+        assert store.read(key) is None
+        store.write(key, b"jpeg-bytes")
+
+        assert store.read(key) == b"jpeg-bytes"
+        assert store.stats()["hits"] == 1
+        assert store.stats()["misses"] == 1
+
+    def test_least_recently_used_is_evicted(self, tmp_path):
+        store = ThumbnailStore(str(tmp_path), max_size_bytes=25)
+        keys = [ThumbnailStore.make_key(f"/test/{i}.mp4", 1.0, 1) for i in range(3)]
+
+        store.write(keys[0], b"0" * 10)
+        store.write(keys[1], b"1" * 10)
+        store.read(keys[0])
+        store.write(keys[2], b"2" * 10)
+
+        assert store.read(keys[1]) is None
+        assert store.read(keys[0]) == b"0" * 10
+        assert store.stats()["bytes"] <= 25
+
+    def test_index_is_rebuilt_from_disk(self, tmp_path):
+        key = ThumbnailStore.make_key("/test/video.mp4", 1.0, 1)
+        ThumbnailStore(str(tmp_path), max_size_bytes=1024).write(key, b"x" * 100)
+
+        reopened = ThumbnailStore(str(tmp_path), max_size_bytes=1024)
+
+        assert reopened.stats()["entries"] == 1
+        assert reopened.stats()["bytes"] == 100
+
+    def test_entries_keep_their_extension(self, tmp_path):
+        store = ThumbnailStore(str(tmp_path), max_size_bytes=1024)
+        jpeg_key, webp_key, clip_key = (ThumbnailStore.make_key(f"/test/{i}.mp4", 1.0, 1) for i in range(3))
+        store.write(jpeg_key, b"j" * 10)
+        store.write(webp_key, b"w" * 20, "webp")
+        store.write(clip_key, b"c" * 30, "webm")
+
+        reopened = ThumbnailStore(str(tmp_path), max_size_bytes=1024)
+
+        assert reopened.stats()["entries"] == 3
+        assert reopened.stats()["bytes"] == 60
+        assert reopened.locate(clip_key, "webm").endswith(f"{clip_key}.webm")
+        assert reopened.read(webp_key, "webp") == b"w" * 20
+        assert reopened.read(webp_key) is None
+
+    def test_invalid_key_is_rejected(self, tmp_path):
+        store = ThumbnailStore(str(tmp_path), max_size_bytes=1024)
+
+        assert store.read("../../etc/passwd") is None
+        with pytest.raises(ValueError):
+            store.write("../escape", b"x")
+        assert os.listdir(tmp_path) == []
+        with pytest.raises(ValueError):
+            store.write(ThumbnailStore.make_key("/test/video.mp4", 1.0, 1), b"x", "../jpg")
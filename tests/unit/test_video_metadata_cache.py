@@ -0,0 +1,77 @@
+import pytest
+from bson import ObjectId
+
+from src.app import schema
+from src.resolvers.video_metadata_cache import VideoMetadataCache, get_video_metadata_cache
+
+
+@pytest.mark.unit
+class TestVideoMetadataCache:
+
+    @pytest.mark.asyncio
+    async def test_hit_after_first_lookup(self, init_test_db, tmp_path, video_factory):
+        video_file = tmp_path / "cached.mp4"
+        video_file.write_bytes(b"x" * 2048)
+        video = await video_factory(path=str(video_file).replace("\\", "/"))
+        cache = VideoMetadataCache(max_size=10, ttl=60)
+
+        first = await cache.get(str(video.id))
+        second = await cache.get(str(video.id))
+
+        assert first.fileSize == 2048
+        assert first.mimeType == "video/mp4"
+        assert second is first
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_missing_file_is_not_cached(self, init_test_db, sample_videos):
+        cache = VideoMetadataCache(max_size=10, ttl=60)
+
+        metadata = await cache.get(str(sample_videos[0].id))
+
+        assert metadata.fileSize == -1
+        assert cache.stats()["size"] == 0
+
+    @pytest.mark.asyncio
+    async def test_unknown_video_returns_none(self, init_test_db):
+        cache = VideoMetadataCache(max_size=10, ttl=60)
+        assert await cache.get(str(ObjectId())) is None
+
+    @pytest.mark.asyncio
+    async def test_get_many_loads_misses_together(self, init_test_db, tmp_path, video_factory):
+        videos = []
+        for name in ("a", "b"):
+            video_file = tmp_path / f"{name}.mp4"
+            video_file.write_bytes(b"x")
+            videos.append(await video_factory(path=str(video_file).replace("\\", "/")))
+        cache = VideoMetadataCache(max_size=10, ttl=60)
+        await cache.get(str(videos[0].id))
+
+        result = await cache.get_many([str(videos[0].id), str(videos[1].id), str(ObjectId()), "not-an-id"])
+
+        assert set(result) == {str(videos[0].id), str(videos[1].id)}
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["size"] == 2
+
+    @pytest.mark.asyncio
+    async def test_update_mutation_invalidates_entry(self, init_test_db, tmp_path, video_factory):
+        video_file = tmp_path / "cached.mp4"
+        video_file.write_bytes(b"x")
+        video = await video_factory(path=str(video_file).replace("\\", "/"))
+        cache = get_video_metadata_cache()
+        await cache.get(str(video.id))
+
+        result = await schema.execute(
+            """
+            mutation Update($input: UpdateVideoMetadataInput!) {
+                updateVideoMetadata(input: $input) { success }
+            }
+            """,
+            variable_values={"input": {"videoId": str(video.id), "author": "Someone", "tags": video.tags}}
+        )
+
+        assert result.errors is None
+        misses = cache.stats()["misses"]
+        await cache.get(str(video.id))
+        assert cache.stats()["misses"] == misses + 1
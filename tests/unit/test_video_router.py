@@ -0,0 +1,295 @@
+import os
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.config import get_settings
+from src.resolvers.hot_thumbnail_cache import HotThumbnailCache
+from src.resolvers.hover_preview import HoverPreviewSpec
+from src.resolvers.http_utils import make_etag
+from src.resolvers.media_worker import get_media_worker
+from src.resolvers.storyboard import StoryboardLayout
+from src.resolvers.thumbnail_store import ThumbnailStore
+from src.resolvers.thumbnail_resolver import thumbnail_seek_target
+from src.router import video_router
+
+
+@pytest.fixture
+async def video_client(init_test_db):
+    app = FastAPI()
+    app.include_router(video_router.router)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.unit
+class TestConditionalGet:
+
+    @pytest.mark.asyncio
+    async def test_stream_revalidation_skips_missing_file(self, video_client, sample_videos):
+        # the file does not exist on disk: a 304 proves no file system work was needed
+        video = sample_videos[0]
+        etag = make_etag(video.path, video.lastModifyTime, video.size)
+
+        response = await video_client.get(f"/video/stream/{video.id}", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.headers["accept-ranges"] == "bytes"
+
+    @pytest.mark.asyncio
+    async def test_thumbnail_revalidation_skips_ffmpeg(self, video_client, sample_videos):
+        video = sample_videos[0]
+        # the default size in JPEG is keyed by the plain file identity
+        etag = f'"{ThumbnailStore.make_key(video.path, video.lastModifyTime, video.size)}"'
+
+        response = await video_client.get(
+            "/video/thumbnail",
+            params={"video_id": str(video.id)},
+            headers={"If-None-Match": etag}
+        )
+
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.headers["vary"] == "Accept"
+        assert "last-modified" in response.headers
+
+    @pytest.mark.asyncio
+    async def test_thumbnail_etag_depends_on_negotiated_format(self, video_client, sample_videos):
+        video = sample_videos[0]
+        jpeg_etag = f'"{ThumbnailStore.make_key(video.path, video.lastModifyTime, video.size)}"'
+
+        response = await video_client.get(
+            "/video/thumbnail",
+            params={"video_id": str(video.id)},
+            headers={"If-None-Match": jpeg_etag, "Accept": "image/webp,image/*"}
+        )
+
+        # the WebP rendition has its own validator: no 304, and the file is missing
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_thumbnail_served_from_memory(self, video_client, video_factory, tmp_path, monkeypatch):
+        store = ThumbnailStore(str(tmp_path / "store"), max_size_bytes=1024 * 1024)
+        hot_cache = HotThumbnailCache(max_size_bytes=1024, max_item_bytes=1024)
+        monkeypatch.setattr("src.resolvers.video_stream_resolver.get_thumbnail_store", lambda: store)
+        monkeypatch.setattr("src.resolvers.video_stream_resolver.get_hot_thumbnail_cache", lambda: hot_cache)
+        video_file = tmp_path / "clip.mp4"
+        video_file.write_bytes(b"\x00" * 64)
+        video = await video_factory(path=str(video_file))
+        key = ThumbnailStore.make_key(video.path, video.lastModifyTime, video.size)
+        store.write(key, b"jpeg-bytes")
+
+        first = await video_client.get("/video/thumbnail", params={"video_id": str(video.id)})
+        # a second request never touches the disk store
+        os.remove(store._file_path(f"{key}.jpg"))
+        second = await video_client.get("/video/thumbnail", params={"video_id": str(video.id)})
+
+        assert first.content == second.content == b"jpeg-bytes"
+        assert hot_cache.stats()["hits"] == 1
+        assert store.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_thumbnail_is_not_retried(self, video_client, video_factory, tmp_path, monkeypatch):
+        store = ThumbnailStore(str(tmp_path / "store"), max_size_bytes=1024 * 1024)
+        monkeypatch.setattr("src.resolvers.video_stream_resolver.get_thumbnail_store", lambda: store)
+        waited = []
+        monkeypatch.setattr(
+            "src.resolvers.media_worker.MediaWorkerPool.wait_for",
+            lambda self, video_id, timeout: waited.append(video_id)
+        )
+        video_file = tmp_path / "broken.mp4"
+        video_file.write_bytes(b"\x00" * 64)
+        video = await video_factory(path=str(video_file), mediaFailures=get_settings().media_worker.max_attempts)
+
+        response = await video_client.get("/video/thumbnail", params={"video_id": str(video.id)})
+
+        assert response.status_code == 500
+        assert "retry-after" not in response.headers
+        assert waited == []
+
+    @pytest.mark.asyncio
+    async def test_unknown_thumbnail_size(self, video_client, sample_videos):
+        response = await video_client.get(
+            "/video/thumbnail", params={"video_id": str(sample_videos[0].id), "size": "huge"}
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_stale_validator_falls_through(self, video_client, sample_videos):
+        video = sample_videos[0]
+
+        response = await video_client.get(f"/video/stream/{video.id}", headers={"If-None-Match": '"stale"'})
+
+        assert response.status_code == 404
+
+
+@pytest.mark.unit
+class TestStoryboard:
+
+    @pytest.mark.asyncio
+    async def test_storyboard_vtt_missing_file(self, video_client, sample_videos):
+        response = await video_client.get("/video/storyboard.vtt", params={"video_id": str(sample_videos[0].id)})
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_storyboard_vtt_for_existing_file(self, video_client, video_factory, tmp_path):
+        video_file = tmp_path / "clip.mp4"
+        video_file.write_bytes(b"\x00" * 128)
+        video = await video_factory(path=str(video_file), duration=30.0)
+
+        response = await video_client.get("/video/storyboard.vtt", params={"video_id": str(video.id)})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/vtt")
+        assert f"storyboard?video_id={video.id}#xywh=0,0," in response.text
+        etag = response.headers["etag"]
+
+        revalidated = await video_client.get(
+            "/video/storyboard.vtt", params={"video_id": str(video.id)}, headers={"If-None-Match": etag}
+        )
+        assert revalidated.status_code == 304
+
+    @pytest.mark.asyncio
+    async def test_missing_sprite_sheet_is_queued(self, video_client, video_factory, tmp_path, monkeypatch):
+        store = ThumbnailStore(str(tmp_path / "store"), max_size_bytes=1024 * 1024)
+        monkeypatch.setattr("src.resolvers.video_stream_resolver.get_thumbnail_store", lambda: store)
+        queued = []
+        monkeypatch.setattr(
+            "src.resolvers.media_worker.MediaWorkerPool.enqueue_storyboards", lambda self, ids: queued.extend(ids)
+        )
+        video_file = tmp_path / "clip.mp4"
+        video_file.write_bytes(b"\x00" * 128)
+        video = await video_factory(path=str(video_file), duration=30.0)
+
+        response = await video_client.get("/video/storyboard", params={"video_id": str(video.id)})
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "5"
+        assert queued == [str(video.id)]
+
+    @pytest.mark.asyncio
+    async def test_sprite_sheet_revalidation_skips_probing(self, video_client, video_factory, tmp_path, monkeypatch):
+        enqueued = []
+        monkeypatch.setattr(get_media_worker(), "enqueue", lambda ids, priority: enqueued.extend(ids))
+        video_file = tmp_path / "clip.mp4"
+        video_file.write_bytes(b"\x00" * 128)
+        # duration not probed yet
+        video = await video_factory(path=str(video_file))
+        key = StoryboardLayout.store_key(video.path, video.lastModifyTime, video.size, get_settings().storyboard)
+
+        revalidated = await video_client.get(
+            "/video/storyboard", params={"video_id": str(video.id)}, headers={"If-None-Match": f'"{key}"'}
+        )
+        response = await video_client.get("/video/storyboard", params={"video_id": str(video.id)})
+
+        assert revalidated.status_code == 304
+        assert response.status_code == 503
+        assert enqueued == [str(video.id)]
+
+    @pytest.mark.asyncio
+    async def test_failed_sprite_sheet_is_not_queued_again(self, video_client, video_factory, tmp_path, monkeypatch):
+        video_file = tmp_path / "clip.mp4"
+        video_file.write_bytes(b"\x00" * 128)
+        video = await video_factory(path=str(video_file), duration=30.0)
+        key = StoryboardLayout.store_key(video.path, video.lastModifyTime, video.size, get_settings().storyboard)
+        monkeypatch.setattr("src.resolvers.media_worker.MediaWorkerPool.storyboard_failed", lambda self, k: k == key)
+
+        response = await video_client.get("/video/storyboard", params={"video_id": str(video.id)})
+
+        assert response.status_code == 500
+
+
+def _parse_form_data(response) -> dict[str, bytes]:
+    boundary = response.headers["content-type"].split("boundary=")[1].encode()
+    parts = {}
+    for chunk in response.content.split(b"--" + boundary)[1:-1]:
+        header, _, data = chunk.strip(b"\r\n").partition(b"\r\n\r\n")
+        name = header.split(b'name="')[1].split(b'"')[0].decode()
+        parts[name] = data
+    return parts
+
+
+@pytest.mark.unit
+class TestBatchThumbnails:
+
+    @pytest.mark.asyncio
+    async def test_hits_are_served_and_misses_rendered(self, video_client, video_factory, tmp_path, monkeypatch):
+        store = ThumbnailStore(str(tmp_path / "store"), max_size_bytes=1024 * 1024)
+        monkeypatch.setattr("src.resolvers.video_stream_resolver.get_thumbnail_store", lambda: store)
+
+        videos = []
+        for name in ("hit", "miss"):
+            video_file = tmp_path / f"{name}.mp4"
+            video_file.write_bytes(b"\x00" * 64)
+            videos.append(await video_factory(path=str(video_file), name=name))
+        hit, miss = videos
+        store.write(ThumbnailStore.make_key(hit.path, hit.lastModifyTime, hit.size), b"hit-jpeg")
+
+        async def render(video_id):
+            video = miss if video_id == str(miss.id) else hit
+            store.write(ThumbnailStore.make_key(video.path, video.lastModifyTime, video.size), b"rendered-jpeg")
+
+        monkeypatch.setattr("src.resolvers.media_worker.MediaWorkerPool.run_now", lambda self, video_id: render(video_id))
+
+        response = await video_client.get(
+            "/video/thumbnails", params=[("video_id", str(hit.id)), ("video_id", str(miss.id)), ("video_id", "0" * 24)]
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("multipart/form-data; boundary=")
+        assert response.headers["x-thumbnails-missing"] == "0" * 24
+        parts = _parse_form_data(response)
+        assert list(parts) == [str(hit.id), str(miss.id)]
+        assert parts[str(hit.id)] == b"hit-jpeg"
+        assert parts[str(miss.id)] == b"rendered-jpeg"
+
+    @pytest.mark.asyncio
+    async def test_too_many_ids(self, video_client):
+        response = await video_client.get("/video/thumbnails", params=[("video_id", f"{i:024d}") for i in range(101)])
+        assert response.status_code == 400
+
+
+@pytest.mark.unit
+class TestHoverPreview:
+
+    @pytest.fixture
+    async def stored_clip(self, video_factory, tmp_path, monkeypatch):
+        store = ThumbnailStore(str(tmp_path / "previews"), max_size_bytes=1024 * 1024)
+        monkeypatch.setattr("src.resolvers.video_stream_resolver.get_preview_store", lambda: store)
+        video_file = tmp_path / "clip.mp4"
+        video_file.write_bytes(b"\x00" * 64)
+        video = await video_factory(path=str(video_file), duration=120.0)
+        spec = HoverPreviewSpec.for_video(120.0, thumbnail_seek_target(120.0), get_settings().preview)
+        return store, video, spec.store_key(video.path, video.lastModifyTime, video.size)
+
+    @pytest.mark.asyncio
+    async def test_missing_clip_is_queued(self, video_client, stored_clip, monkeypatch):
+        _, video, _ = stored_clip
+        queued = []
+        monkeypatch.setattr(
+            "src.resolvers.media_worker.MediaWorkerPool.enqueue_previews", lambda self, ids: queued.extend(ids)
+        )
+
+        response = await video_client.get("/video/preview", params={"video_id": str(video.id)})
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "5"
+        assert queued == [str(video.id)]
+
+    @pytest.mark.asyncio
+    async def test_stored_clip_supports_ranges(self, video_client, stored_clip):
+        store, video, key = stored_clip
+        store.write(key, b"0123456789", "webm")
+
+        response = await video_client.get(
+            "/video/preview", params={"video_id": str(video.id)}, headers={"Range": "bytes=2-5"}
+        )
+
+        assert response.status_code == 206
+        assert response.content == b"2345"
+        assert response.headers["content-type"] == "video/webm"
+        assert response.headers["content-range"] == "bytes 2-5/10"
+        assert response.headers["etag"] == f'"{key}"'
+